@@ -0,0 +1,75 @@
+"""
+Benchmark the memory of the mined commits as dictionaries and as records.
+
+Builds synthetic histories of growing sizes up to one million commits, with
+the author names, file names, paths and methods repeating across the
+commits like in a real repository. Every string is built again for every
+commit, like the miners do. The memory allocated to keep every history as
+commit dictionaries and as commit_record.CommitRecord is measured with
+tracemalloc.
+
+Run the benchmark using pipenv run python scripts/benchmark_memory.py.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from prettytable import PrettyTable
+
+# set the system path to contain the src directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+# pylint: disable=wrong-import-position
+import commit_record  # noqa: E402
+from synthetic_history import generate_commits  # noqa: E402
+
+
+def measure_memory(commit_count, compact):
+    """Return the bytes allocated to keep a synthetic history in a list."""
+    gc.collect()
+    tracemalloc.start()
+    commits = generate_commits(commit_count)
+    if compact:
+        commits = commit_record.compact_commits(commits)
+    commit_list = list(commits)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del commit_list
+    return allocated
+
+
+def main():
+    """Measure the memory of the histories for every size and print the results."""
+    a_parse = argparse.ArgumentParser()
+    a_parse.add_argument(
+        "-c", "--commits", type=int, default=1000000, help="Largest number of commits"
+    )
+    args = vars(a_parse.parse_args())
+    sizes = [args["commits"] // 8, args["commits"] // 4, args["commits"] // 2]
+    sizes.append(args["commits"])
+
+    results = PrettyTable()
+    results.field_names = [
+        "Commits",
+        "Dictionaries MB",
+        "Records MB",
+        "Bytes per commit saved",
+    ]
+    for size in sizes:
+        dictionaries = measure_memory(size, compact=False)
+        records = measure_memory(size, compact=True)
+        results.add_row(
+            [
+                size,
+                round(dictionaries / 1024 / 1024, 1),
+                round(records / 1024 / 1024, 1),
+                round((dictionaries - records) / size),
+            ]
+        )
+    print(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark calculate_individual_metrics on synthetic raw data files.
+
+Writes synthetic raw data .jsonl files of growing sizes up to one million
+commits to a temporary directory and times the calculation of the metrics
+from every file. The time per commit stays about the same for every size
+when the calculation scales linearly.
+
+Run the benchmark using pipenv run python scripts/benchmark_metrics.py.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from prettytable import PrettyTable
+
+# set the system path to contain the src directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+# pylint: disable=wrong-import-position
+import data_collection  # noqa: E402
+import json_handler  # noqa: E402
+from synthetic_history import generate_commits  # noqa: E402
+
+
+def main():
+    """Time the metrics calculation for every size and print the results."""
+    a_parse = argparse.ArgumentParser()
+    a_parse.add_argument(
+        "-c", "--commits", type=int, default=1000000, help="Largest number of commits"
+    )
+    args = vars(a_parse.parse_args())
+    sizes = [args["commits"] // 8, args["commits"] // 4, args["commits"] // 2]
+    sizes.append(args["commits"])
+
+    results = PrettyTable()
+    results.field_names = ["Commits", "Seconds", "Microseconds per commit"]
+    with tempfile.TemporaryDirectory() as data_path:
+        for size in sizes:
+            json_handler.write_entries_to_jsonl_file(
+                generate_commits(size, file_count=20000),
+                "raw_data_benchmark",
+                data_path,
+            )
+            start = time.perf_counter()
+            data_collection.calculate_individual_metrics_from_jsonl(
+                "raw_data_benchmark", data_path
+            )
+            elapsed = time.perf_counter() - start
+            results.add_row(
+                [size, round(elapsed, 2), round(elapsed / size * 1000000, 2)]
+            )
+    print(results)
+
+
+if __name__ == "__main__":
+    main()
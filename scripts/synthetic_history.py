@@ -0,0 +1,34 @@
+"""
+Build the synthetic histories of the benchmarks.
+
+The author names, file names, paths and methods repeat across the commits
+like in a real repository, and every string is built again for every commit,
+like the miners do. The same seed always builds the same history.
+"""
+
+import random
+
+
+def generate_commits(commit_count, author_count=50, file_count=5000, seed=0):
+    """Yield synthetic commits shaped like the ones of collect_commits_hash."""
+    generator = random.Random(seed)
+    for index in range(commit_count):
+        author = "author{}".format(generator.randrange(author_count))
+        files = [generator.randrange(file_count) for _ in range(3)]
+        yield {
+            "hash": "{:040x}".format(index),
+            "author_msg": "Commit {}".format(index),
+            "author_name": author,
+            "author_email": author + "@example.com",
+            "author_date": "2020-01-01T00:00:00Z",
+            "merge": False,
+            "line_added": generator.randrange(100),
+            "line_removed": generator.randrange(50),
+            "lines_of_code": generator.randrange(1000),
+            "complexity": generator.randrange(100),
+            "methods": ["function{}".format(file) for file in files],
+            "filename": ["file{}.py".format(file) for file in files],
+            "filepath": ["src/package/file{}.py".format(file) for file in files],
+            "file_line_added": [generator.randrange(40) for _ in files],
+            "file_line_removed": [generator.randrange(20) for _ in files],
+        }
@@ -0,0 +1,206 @@
+"""Index the commits and lines of every author by day or by week.
+
+The commits are counted in buckets of one day or one week of their author
+date, in UTC. Every row of the index holds the number of commits and the
+lines added and removed by one author in one bucket, so the contributions
+in a window of time and the activity of an author over time are read from
+the index instead of from the raw commits. The index is stored as a .npz
+file next to the raw data.
+"""
+
+import os
+import numpy as np
+import json_handler
+
+EXTENSION = ".npz"
+
+BUCKETS = ["day", "week"]
+
+COUNT_FIELDS = ["commits", "added", "removed"]
+
+
+def get_activity_index_name(json_file_name):
+    """Create the name of the activity index of a raw data file."""
+    # The raw data can be stored in a .npz or .sqlite file as well
+    if json_file_name.endswith((".npz", ".sqlite")):
+        json_file_name = os.path.splitext(json_file_name)[0]
+    return json_file_name + "_activity" + EXTENSION
+
+
+def get_buckets(dates, bucket="day"):
+    """Return the bucket numbers of ISO 8601 dates in UTC.
+
+    Days are counted from 1970-01-01 and weeks start on Monday.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError("Unknown bucket: {}".format(bucket))
+    # The dates of format_commit_date end with Z, NumPy expects naive dates
+    days = (
+        np.array([date.rstrip("Z") for date in dates], dtype="datetime64[s]")
+        .astype("datetime64[D]")
+        .astype(np.int64)
+    )
+    if bucket == "week":
+        # 1970-01-01 was a Thursday, the first Monday is 3 days earlier
+        return (days + 3) // 7
+    return days
+
+
+def get_bucket_date(bucket_number, bucket="day"):
+    """Return the date of the first day of a bucket as YYYY-MM-DD."""
+    day = bucket_number * 7 - 3 if bucket == "week" else bucket_number
+    return str(np.datetime64(int(day), "D"))
+
+
+def aggregate_activity(author_names, buckets, commits, added, removed, bucket="day"):
+    """Create an index by adding up the rows of the same author and bucket.
+
+    The authors are dictionary encoded and the rows are sorted by author,
+    then by bucket.
+    """
+    authors, author_codes = np.unique(
+        np.array(author_names, dtype=str), return_inverse=True
+    )
+    author_codes = author_codes.reshape(-1).astype(np.int64)
+    buckets = np.asarray(buckets, dtype=np.int64)
+    order = np.lexsort((buckets, author_codes))
+    author_codes = author_codes[order]
+    buckets = buckets[order]
+    # A row starts wherever the author or the bucket changes
+    starts = np.flatnonzero(
+        np.concatenate(
+            (
+                [len(order) > 0],
+                (author_codes[1:] != author_codes[:-1]) | (buckets[1:] != buckets[:-1]),
+            )
+        )
+    )
+    index = {
+        "bucket": np.array(bucket),
+        "authors": authors,
+        "author_codes": author_codes[starts],
+        "buckets": buckets[starts],
+    }
+    for field, values in zip(COUNT_FIELDS, [commits, added, removed]):
+        values = np.asarray(values, dtype=np.int64)[order]
+        index[field] = np.add.reduceat(values, starts) if len(starts) else values[:0]
+    return index
+
+
+def build_activity_index(commits, bucket="day"):
+    """Create the activity index of the commits in a single pass.
+
+    The commits without an author_date, mined before it was recorded, are
+    skipped.
+    """
+    author_names = []
+    dates = []
+    added = []
+    removed = []
+    for commit in commits:
+        if commit.get("author_date") is None:
+            continue
+        author_names.append(commit["author_name"])
+        dates.append(commit["author_date"])
+        added.append(commit["line_added"])
+        removed.append(commit["line_removed"])
+    return aggregate_activity(
+        author_names,
+        get_buckets(dates, bucket),
+        np.ones(len(dates), dtype=np.int64),
+        added,
+        removed,
+        bucket,
+    )
+
+
+def merge_activity_indexes(first_index, second_index):
+    """Combine two indexes with the same bucket, like the index of all commits."""
+    bucket = str(first_index["bucket"])
+    if str(second_index["bucket"]) != bucket:
+        raise ValueError("Only indexes with the same bucket can be merged")
+    author_names = np.concatenate(
+        [
+            index["authors"][index["author_codes"]]
+            for index in [first_index, second_index]
+        ]
+    )
+    columns = [
+        np.concatenate([first_index[field], second_index[field]])
+        for field in ["buckets"] + COUNT_FIELDS
+    ]
+    return aggregate_activity(author_names, *columns, bucket=bucket)
+
+
+def write_activity_index(index, file_path):
+    """Write an activity index to a .npz file, replacing it atomically."""
+    with json_handler.atomic_write(file_path) as index_file:
+        np.savez(index_file, **index)
+
+
+def read_activity_index(file_path):
+    """Read an activity index from a .npz file."""
+    with np.load(file_path, allow_pickle=False) as index_file:
+        return {name: index_file[name] for name in index_file.files}
+
+
+def query_activity(index, since=None, until=None):
+    """Add up the commits and lines of every author between two dates.
+
+    The dates are ISO 8601 dates, since is inclusive and until is exclusive,
+    and both are rounded down to the start of their bucket. Every argument
+    left to None does not filter the rows. Only the authors with commits in
+    the window are returned, in alphabetical order.
+    """
+    bucket = str(index["bucket"])
+    selected = np.ones(len(index["buckets"]), dtype=bool)
+    if since is not None:
+        selected &= index["buckets"] >= get_buckets([since], bucket)[0]
+    if until is not None:
+        selected &= index["buckets"] < get_buckets([until], bucket)[0]
+    author_count = len(index["authors"])
+    author_codes = index["author_codes"][selected]
+    totals = {
+        field: np.bincount(
+            author_codes, weights=index[field][selected], minlength=author_count
+        ).astype(np.int64)
+        for field in COUNT_FIELDS
+    }
+    return {
+        author: {
+            "COMMITS": int(totals["commits"][code]),
+            "ADDED": int(totals["added"][code]),
+            "REMOVED": int(totals["removed"][code]),
+        }
+        for code, author in enumerate(index["authors"].tolist())
+        if totals["commits"][code] > 0
+    }
+
+
+def get_activity_series(index, author):
+    """Return the commits and lines of an author in every bucket of its activity.
+
+    The series goes from the first to the last bucket with commits of the
+    author, and the buckets without commits are included with zeros.
+    """
+    bucket = str(index["bucket"])
+    codes = np.flatnonzero(index["authors"] == author)
+    if len(codes) == 0:
+        return []
+    rows = index["author_codes"] == codes[0]
+    buckets = index["buckets"][rows]
+    first_bucket = int(buckets[0])
+    positions = buckets - first_bucket
+    series = {}
+    for field in COUNT_FIELDS:
+        series[field] = np.zeros(int(positions[-1]) + 1, dtype=np.int64)
+        series[field][positions] = index[field][rows]
+    return [
+        {
+            "DATE": get_bucket_date(first_bucket + position, bucket),
+            "COMMITS": int(series["commits"][position]),
+            "ADDED": int(series["added"][position]),
+            "REMOVED": int(series["removed"][position]),
+        }
+        for position in range(len(series["commits"]))
+    ]
@@ -0,0 +1,294 @@
+"""Evaluate many repositories in one run with a shared pool of worker processes.
+
+The repositories are listed in a manifest. Mining the commits and retrieving
+the issues of every repository are scheduled as separate tasks on one pool,
+with a limit on the tasks running against the same host at once. The
+metrics of every repository are written to their own shard, and the shards
+are combined into organization wide contributor tables.
+"""
+import os
+import re
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from urllib.parse import urlparse
+import data_collection
+import data_processor
+import format_index
+import json_handler
+
+GITHUB_API_URL = "https://api.github.com"
+
+# Tasks of local repositories are only limited by the number of workers
+LOCAL_HOST = "local"
+
+# Concurrent tasks allowed per host unless other limits are given
+DEFAULT_HOST_LIMITS = {"github.com": 4, "api.github.com": 2}
+
+ISSUE_EVENTS = [
+    "issues_opened",
+    "issues_commented",
+    "pull_requests_opened",
+    "pull_requests_commented",
+]
+
+
+def get_repository_host(link):
+    """Return the host of a repository URL, or LOCAL_HOST for a local path."""
+    if link.startswith("git@"):
+        # SSH URLs look like git@github.com:org/repo_name.git
+        return link[len("git@") :].split(":")[0]
+    if data_collection.is_remote_repository(link):
+        return urlparse(link).hostname
+    return LOCAL_HOST
+
+
+def get_shard_name(entry):
+    """Create the name of the shard of a manifest entry from its repository."""
+    name = entry["repo"]
+    if name is None:
+        name = os.path.basename(entry["link"].rstrip("/"))
+        if name.endswith(".git"):
+            name = name[: -len(".git")]
+    # Keep the characters that are safe in a file name
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)
+
+
+def read_manifest(manifest_path):
+    """Return the repositories listed in a manifest json file.
+
+    The manifest is a list where every repository is either the URL/path to
+    mine or a dictionary with these keys:
+    - link: URL/path of the repository to mine.
+    - repo: Optional repository name in this format: org/repo_name. The issues
+      are only retrieved for the repositories with a name.
+    - state: Optional state of the issues to retrieve, defaults to all.
+    - branch: Optional branch to mine instead of HEAD.
+    - name: Optional name of the shard, defaults to the repository name.
+    """
+    entries = []
+    for item in json_handler.read_json_file(manifest_path):
+        if isinstance(item, str):
+            item = {"link": item}
+        if "link" not in item:
+            raise ValueError("Every repository of the manifest needs a link")
+        entry = {
+            "link": item["link"],
+            "repo": item.get("repo"),
+            "state": item.get("state", "all"),
+            "branch": item.get("branch"),
+        }
+        entry["name"] = item.get("name", get_shard_name(entry))
+        entries.append(entry)
+    names = Counter(entry["name"] for entry in entries)
+    duplicates = [name for name, count in names.items() if count > 1]
+    if duplicates:
+        raise ValueError("Repeated shard names: " + ", ".join(sorted(duplicates)))
+    return entries
+
+
+def keep_commit_lines(commits, commit_lines):
+    """Yield the commits, keeping the fields read by process_data in commit_lines."""
+    for commit in commits:
+        commit_lines.append(
+            {
+                field: commit[field]
+                for field in data_processor.COMMIT_FIELDS
+                if field in commit
+            }
+        )
+        yield commit
+
+
+def mine_repository(link, branch=None, profile="full"):
+    """Calculate the individual metrics and statistics of a repository.
+
+    This function runs in the worker processes of run_batch. The commits are
+    aggregated as they are mined instead of being kept in memory, only their
+    lines and file names are kept for the statistics of data_processor.
+    """
+    commit_lines = []
+    commits = data_collection.iterate_commits_hash(link, branch=branch, profile=profile)
+    metrics = data_collection.calculate_metrics_from_commits(
+        keep_commit_lines(commits, commit_lines)
+    )
+    return data_processor.process_data(metrics, commit_lines)
+
+
+def retrieve_repository_issues(user_token, repository_name, state, api_url):
+    """Retrieve the issue data of a repository.
+
+    This function runs in the worker processes of run_batch.
+    """
+    ghub = data_collection.authenticate_github(user_token, api_url)
+    repository = ghub.get_repo(repository_name)
+    return data_collection.retrieve_issue_data(repository, state, {}, ghub=ghub)
+
+
+def create_batch_tasks(entries, user_token=None, profile="full", api_url=None):
+    """Create the tasks of the repositories of a manifest.
+
+    Every task is a tuple of the shard name, the kind of task, the host it
+    runs against, the function to run and its arguments.
+    """
+    if api_url is None:
+        api_url = GITHUB_API_URL
+    tasks = []
+    for entry in entries:
+        tasks.append(
+            (
+                entry["name"],
+                "metrics",
+                get_repository_host(entry["link"]),
+                mine_repository,
+                (entry["link"], entry["branch"], profile),
+            )
+        )
+        if entry["repo"] is not None and user_token is not None:
+            tasks.append(
+                (
+                    entry["name"],
+                    "issues",
+                    urlparse(api_url).hostname,
+                    retrieve_repository_issues,
+                    (user_token, entry["repo"], entry["state"], api_url),
+                )
+            )
+    return tasks
+
+
+def write_shard(results, name, shard_path):
+    """Write the merged metrics and issue data of a repository to its shard."""
+    shard = results.get("metrics", {})
+    if "issues" in results:
+        shard = data_collection.merge_metric_and_issue_dicts(shard, results["issues"])
+    json_handler.write_dict_to_json_file(shard, name, shard_path)
+
+
+# pylint: disable=C0330
+def run_batch(
+    manifest_path,
+    user_token=None,
+    shard_path="./data/shards/",
+    workers=4,
+    host_limits=None,
+    profile="full",
+    api_url=None,
+):
+    """Mine and retrieve the issues of every repository of a manifest.
+
+    The tasks run on a pool of workers processes, with at most the limit of
+    host_limits running against the same host. The shard of a repository is
+    written as soon as all of its tasks are done. A failing repository does
+    not stop the others, its error is returned in a dictionary keyed by the
+    name of its shard.
+    """
+    limits = dict(DEFAULT_HOST_LIMITS)
+    if host_limits is not None:
+        limits.update(host_limits)
+    if min(limits.values()) < 1:
+        raise ValueError("Host limits must be at least 1")
+    os.makedirs(shard_path, exist_ok=True)
+    pending = deque(
+        create_batch_tasks(read_manifest(manifest_path), user_token, profile, api_url)
+    )
+    remaining_tasks = Counter(task[0] for task in pending)
+    results = {name: {} for name in remaining_tasks}
+    failures = {}
+    running = {}
+    running_hosts = Counter()
+    # PyDriller writes to the git config of the repositories it opens, so a
+    # repository listed twice is never mined by two workers at once
+    mined_links = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            # Start the first waiting tasks whose host is below its limit
+            for task in list(pending):
+                if len(running) == workers:
+                    break
+                name, kind, host, function, arguments = task
+                if running_hosts[host] >= limits.get(host, workers):
+                    continue
+                if kind == "metrics" and arguments[0] in mined_links:
+                    continue
+                pending.remove(task)
+                running[executor.submit(function, *arguments)] = task
+                running_hosts[host] += 1
+                if kind == "metrics":
+                    mined_links.add(arguments[0])
+            # Nothing runs, so nothing will ever let the waiting tasks start
+            if not running:
+                for task in pending:
+                    failures[task[0]] = "Task could not be scheduled"
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, kind, host, _, arguments = running.pop(future)
+                running_hosts[host] -= 1
+                if kind == "metrics":
+                    mined_links.discard(arguments[0])
+                remaining_tasks[name] -= 1
+                try:
+                    results[name][kind] = future.result()
+                # The errors of one repository are reported with the others
+                # pylint: disable=W0703
+                except Exception as error:
+                    failures[name] = "{}: {}".format(type(error).__name__, error)
+                if remaining_tasks[name] == 0 and name not in failures:
+                    write_shard(results.pop(name), name, shard_path)
+            # Drop the waiting tasks of the repositories that failed
+            for task in list(pending):
+                if task[0] in failures:
+                    pending.remove(task)
+    return failures
+
+
+def combine_shards(shard_path="./data/shards/", names=None):
+    """Combine the shards of the repositories into organization wide metrics.
+
+    The numbers of every contributor are added up over the repositories. The
+    files are prefixed by the name of their shard and the issue numbers are
+    written as shard#number, because different repositories reuse them.
+
+    When names are given, only their shards are combined, like the shards
+    written by one run of run_batch, instead of every shard of the directory.
+    """
+    combined = {}
+    if names is None:
+        names = [
+            file_name[: -len(".json")]
+            for file_name in os.listdir(shard_path)
+            if file_name.endswith(".json")
+        ]
+    for name in sorted(names):
+        shard = json_handler.get_dict_from_json_file(name, shard_path)
+        for username, metrics in shard.items():
+            if username not in combined:
+                combined[username] = {
+                    "EMAIL": "N/A",
+                    "COMMITS": 0,
+                    "ADDED": 0,
+                    "REMOVED": 0,
+                    "FILES": [],
+                    "REPOSITORIES": [],
+                }
+                for event in ISSUE_EVENTS:
+                    combined[username][event] = []
+            user_data = combined[username]
+            if user_data["EMAIL"] == "N/A":
+                user_data["EMAIL"] = metrics.get("EMAIL", "N/A")
+            for key in ["COMMITS", "ADDED", "REMOVED"]:
+                user_data[key] += metrics.get(key, 0)
+            user_data["FILES"] += [
+                name + "/" + file for file in metrics.get("FILES", [])
+            ]
+            user_data["REPOSITORIES"].append(name)
+            for event in ISSUE_EVENTS:
+                user_data[event] += [
+                    "{}#{}".format(name, number) for number in metrics.get(event, [])
+                ]
+            if "FORMAT_INDEX" in metrics:
+                user_data["FORMAT_INDEX"] = format_index.combine_format_indexes(
+                    [user_data.get("FORMAT_INDEX", {}), metrics["FORMAT_INDEX"]]
+                )
+    # Calculate the TOTAL, MODIFIED, RATIO and FORMAT of the combined numbers
+    return data_processor.process_data(combined)
@@ -0,0 +1,152 @@
+"""Attribute the lines that survive at the head of a branch to their authors.
+
+Lines that were added and later deleted count as much as the lines that are
+still in the repository in the ADDED metric. Blaming every file of the head
+commit instead tells how many of the current lines every contributor wrote.
+
+The files are blamed in parallel by a pool of threads, each running git
+blame. The lines of every commit are cached by path and blob hash, so the
+files that did not change since the last run are not blamed again. The lines
+are counted by commit because git blame maps the names of the authors with
+the .mailmap, unlike the mined commits.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from git import Git, Repo
+import data_collection
+import json_handler
+
+# Tree of an empty repository, to list the lines of every file of a commit
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+
+def get_cache_key(path, blob_hash):
+    """Create the key of the cached blame of a file revision."""
+    return blob_hash + " " + path
+
+
+def list_text_files(git_repo, revision="HEAD"):
+    """Return a dictionary of the blob hash of every text file of a commit.
+
+    Binary files and submodules are skipped because they have no lines.
+    """
+    blobs = {}
+    for entry in git_repo.git.ls_tree("-r", "-z", revision).split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        _, object_type, blob_hash = info.split()
+        if object_type == "blob":
+            blobs[path] = blob_hash
+    # Binary files are listed with dashes instead of line counts
+    for entry in git_repo.git.diff(
+        "--numstat", "-z", "--no-renames", EMPTY_TREE, revision
+    ).split("\0"):
+        if entry.startswith("-\t-\t"):
+            blobs.pop(entry[len("-\t-\t") :], None)
+    return blobs
+
+
+def blame_file(repo_path, revision, path):
+    """Count the lines of a file at a commit by the hash of their commit.
+
+    This function runs in the threads of calculate_surviving_lines, so every
+    call uses its own git command.
+    """
+    # The content of the file is not decoded, it may not be valid UTF-8
+    output = Git(repo_path).blame(
+        "--line-porcelain", revision, "--", path, stdout_as_string=False
+    )
+    lines = {}
+    header = True
+    for line in output.split(b"\n"):
+        # Every line starts with a header giving the hash of its commit and
+        # ends with its content, which starts with a tab
+        if header and line:
+            commit_hash = line.split(b" ", 1)[0].decode("ascii")
+            lines[commit_hash] = lines.get(commit_hash, 0) + 1
+            header = False
+        elif line.startswith(b"\t"):
+            header = True
+    return lines
+
+
+def get_commit_authors(git_repo, revision="HEAD"):
+    """Return a dictionary of the author name of every commit of a branch.
+
+    The names are not mapped with the .mailmap, like the ones of the mined
+    commits.
+    """
+    authors = {}
+    for entry in git_repo.git.log(
+        "--no-use-mailmap", "--format=%H%x00%an", revision
+    ).split("\n"):
+        if entry:
+            commit_hash, author = entry.split("\0", 1)
+            authors[commit_hash] = author
+    return authors
+
+
+# pylint: disable=C0330
+def calculate_surviving_lines(
+    repo,
+    branch=None,
+    workers=1,
+    cache_file="blame_commit_cache",
+    data_path="./data/",
+    repository=None,
+):
+    """Return the number of lines of the head of a branch written by every author.
+
+    The blame of every file revision is stored in the cache file, keyed by
+    repository and branch. Only the file revisions that are not in the cache
+    are blamed, by workers threads, and the revisions no longer at the head
+    are dropped from the cache. The repository is repo unless it is given,
+    like when repo is the path of an already mirrored repository.
+    """
+    revision = branch if branch is not None else "HEAD"
+    if repository is None:
+        repository = repo
+    repository_key = data_collection.get_watermark_key(repository, branch)
+    try:
+        cache = json_handler.get_dict_from_json_file(cache_file, data_path)
+    except FileNotFoundError:
+        cache = {}
+    cached_blames = cache.get(repository_key, {})
+    blames = {}
+    with data_collection.local_repository(repo) as repo_path:
+        git_repo = Repo(repo_path)
+        blobs = list_text_files(git_repo, revision)
+        missing_paths = []
+        for path, blob_hash in blobs.items():
+            key = get_cache_key(path, blob_hash)
+            if key in cached_blames:
+                blames[key] = cached_blames[key]
+            else:
+                missing_paths.append(path)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            missing_blames = executor.map(
+                lambda path: blame_file(repo_path, revision, path), missing_paths
+            )
+            for path, lines in zip(missing_paths, missing_blames):
+                blames[get_cache_key(path, blobs[path])] = lines
+        authors = get_commit_authors(git_repo, revision)
+    if missing_paths or len(blames) != len(cached_blames):
+        cache[repository_key] = blames
+        json_handler.write_dict_to_json_file(cache, cache_file, data_path)
+    surviving_lines = {}
+    for lines in blames.values():
+        for commit_hash, count in lines.items():
+            author = authors[commit_hash]
+            surviving_lines[author] = surviving_lines.get(author, 0) + count
+    return surviving_lines
+
+
+def add_surviving_lines(data_dict, surviving_lines):
+    """Add the SURVIVING lines of every contributor to the individual metrics.
+
+    The contributors without surviving lines get 0, the authors of surviving
+    lines that are not in the metrics are skipped.
+    """
+    for author, metrics in data_dict.items():
+        metrics["SURVIVING"] = surviving_lines.get(author, 0)
+    return data_dict
@@ -0,0 +1,132 @@
+"""Keep bare mirrors of the remote repositories between runs.
+
+Every remote repository is cloned once as a bare mirror of its branches and
+tags in the cache directory. Later runs only fetch the new objects into the
+mirror and mine it directly. When the mirrors use more disk space than the
+cache size, the least recently used ones are deleted.
+"""
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from git import Repo
+
+DEFAULT_CACHE_PATH = "./data/clone_cache/"
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
+# Cache used by local_repository, changed with configure_clone_cache
+CLONE_CACHE = {"path": DEFAULT_CACHE_PATH, "max_size": DEFAULT_MAX_SIZE}
+
+
+def configure_clone_cache(cache_path=DEFAULT_CACHE_PATH, max_size=DEFAULT_MAX_SIZE):
+    """Select the directory and the size in bytes of the clone cache."""
+    CLONE_CACHE["path"] = cache_path
+    CLONE_CACHE["max_size"] = max_size
+
+
+def get_mirror_path(url, cache_path):
+    """Create the path of the mirror of a repository URL.
+
+    The name keeps the end of the URL to be readable and a hash of the whole
+    URL to be unique.
+    """
+    readable_name = re.sub(r"[^A-Za-z0-9._-]", "_", url.rstrip("/"))[-60:]
+    url_hash = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_path, "{}-{}.git".format(readable_name, url_hash))
+
+
+@contextmanager
+def locked_file(lock_path, exclusive=False, blocking=True):
+    """Hold a lock on a lock file, yielding whether the lock was acquired."""
+    with open(lock_path, "a") as lock_file:
+        operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file, operation)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def update_mirror(url, mirror_path):
+    """Clone the mirror of a repository, or fetch its new objects if it exists."""
+    if os.path.isdir(mirror_path):
+        Repo(mirror_path).git.fetch("--prune", "--tags", "origin")
+        return
+    # Clone next to the mirror and rename it so a failed clone leaves nothing
+    clone_path = tempfile.mkdtemp(dir=os.path.dirname(mirror_path), suffix=".clone")
+    try:
+        mirror = Repo.clone_from(url, clone_path, bare=True)
+        # Only mirror the branches and tags, not the pull request refs
+        mirror.git.config("remote.origin.fetch", "+refs/heads/*:refs/heads/*")
+        os.rename(clone_path, mirror_path)
+    except BaseException:
+        shutil.rmtree(clone_path, ignore_errors=True)
+        raise
+
+
+def get_directory_size(path):
+    """Return the size in bytes of the files of a directory."""
+    size = 0
+    for directory, _, file_names in os.walk(path):
+        for file_name in file_names:
+            size += os.lstat(os.path.join(directory, file_name)).st_size
+    return size
+
+
+def evict_mirrors(cache_path, max_size, kept_path=None):
+    """Delete the least recently used mirrors until the cache fits in max_size.
+
+    The kept mirror and the mirrors in use by other processes are not deleted.
+    """
+    mirrors = [
+        os.path.join(cache_path, name)
+        for name in os.listdir(cache_path)
+        if name.endswith(".git")
+    ]
+    sizes = {mirror: get_directory_size(mirror) for mirror in mirrors}
+    total_size = sum(sizes.values())
+    # The modification time of a mirror is set every time it is used
+    for mirror in sorted(mirrors, key=os.path.getmtime):
+        if total_size <= max_size:
+            break
+        if mirror == kept_path:
+            continue
+        # Mirrors in use by other processes hold a shared lock
+        with locked_file(mirror + ".lock", exclusive=True, blocking=False) as acquired:
+            if not acquired:
+                continue
+            shutil.rmtree(mirror)
+            total_size -= sizes[mirror]
+
+
+@contextmanager
+def mirrored_repository(url, cache_path=None, max_size=None):
+    """Provide the path of an up to date mirror of a remote repository.
+
+    The mirror can not be evicted while the context is open.
+    """
+    if cache_path is None:
+        cache_path = CLONE_CACHE["path"]
+    if max_size is None:
+        max_size = CLONE_CACHE["max_size"]
+    os.makedirs(cache_path, exist_ok=True)
+    mirror_path = get_mirror_path(url, cache_path)
+    # The shared lock keeps other processes from evicting the mirror in use
+    with locked_file(mirror_path + ".lock"):
+        # Only one process clones or fetches the same mirror at once
+        with locked_file(mirror_path + ".update.lock", exclusive=True):
+            update_mirror(url, mirror_path)
+            # Mark the mirror as the most recently used one
+            os.utime(mirror_path, (time.time(), time.time()))
+        evict_mirrors(cache_path, max_size, mirror_path)
+        yield mirror_path
@@ -2,34 +2,222 @@
 
 # from data_collection import collect_commits
 import argparse
+import os
+from prettytable import PrettyTable
 
 # from pprint import pprint
 
 # from driller import find_repositories
 
+from src import activity_index
+from src import batch_processing
+from src import blame_attribution
 from src import data_collection
+from src import file_index
+from src import graphql_retrieval
 from src import json_handler
+from src import pipeline
+from src import response_cache
 
 
 def main():
     """Execute the CLI."""
     args = retrieve_arguments()
 
-    # Currently only validates the PyGithub repository
-    repository = data_collection.authenticate_repository(args["token"], args["repo"])
+    # Remote repositories are mined from their mirror in the clone cache, which
+    # is configured in the clone_cache module imported by data_collection
+    data_collection.clone_cache.configure_clone_cache(
+        args["clone_cache"], args["clone_cache_size"] * 1024 * 1024
+    )
+
+    # Evaluate every repository of the manifest instead of a single one
+    if args["manifest"] is not None:
+        run_batch(args)
+        return
+
+    # Serve the unchanged GitHub API responses from the persistent cache
+    if args["cache"] or args["clear_cache"]:
+        cache = response_cache.ResponseCache(max_size=args["cache_size"] * 1024 * 1024)
+        if args["clear_cache"]:
+            cache.clear()
+        if args["cache"]:
+            response_cache.install_github_cache(cache)
+
+    # Run every stage in this process without prompts or intermediate files
+    if args["pipeline"]:
+        run_pipeline(args)
+        return
+
+    # Mine the raw commit data when a repository URL/path was provided
+    if args["link"] is not None:
+        # Streaming writes every commit to a .jsonl file as soon as it is mined
+        if args["stream"]:
+            collect_raw_data = data_collection.collect_and_stream_raw_data_to_jsonl
+            # The streamed file already holds the mined commits, no checkpoint
+            checkpoint_args = {}
+        else:
+            collect_raw_data = data_collection.collect_and_add_raw_data_to_json
+            checkpoint_args = {
+                "checkpoint_every": args["checkpoint_every"],
+                "resume": args["resume"],
+            }
+        collect_raw_data(
+            args["link"],
+            incremental=args["incremental"],
+            branch=args["branch"],
+            workers=args["workers"],
+            profile=args["profile"],
+            bucket=args["bucket"],
+            **checkpoint_args,
+        )
+
+    # Attribute the lines at the head of the branch to the contributors
+    if args["blame"]:
+        print_surviving_lines(args["link"], args["branch"], args["workers"])
+
+    # Windowed questions are answered from the activity index of the raw data
+    if args["since"] is not None or args["until"] is not None:
+        print_activity(args["since"], args["until"])
+
+    # Ownership and churn questions are answered from the file index
+    if args["hotspots"]:
+        print_hotspots(args["hotspots"])
+
+    # The issues are only retrieved for a repository given with -r
+    if args["repo"] is None:
+        return
 
     # Temporary structure given issue retrieval is the only function
     contributor_data = data_collection.initialize_contributor_data(
         "contributor_data_template"
     )
-    contributor_data = data_collection.retrieve_issue_data(
-        repository, args["state"], contributor_data
-    )
+    if args["backend"] == "graphql":
+        contributor_data = graphql_retrieval.retrieve_issue_data_graphql(
+            args["token"], args["repo"], args["state"], contributor_data
+        )
+    else:
+        # Currently only validates the PyGithub repository
+        ghub = data_collection.authenticate_github(args["token"])
+        repository = ghub.get_repo(args["repo"])
+        if args["sync"]:
+            contributor_data = data_collection.sync_issue_data(
+                repository, args["state"], contributor_data, args["workers"], ghub
+            )
+        else:
+            contributor_data = data_collection.retrieve_issue_data(
+                repository,
+                args["state"],
+                contributor_data,
+                args["workers"],
+                ghub,
+                args["bulk"],
+            )
 
     # Intermediate between data_collection and data_processor
     json_handler.write_dict_to_json_file(contributor_data, "contributor_data")
 
 
+def run_batch(args):
+    """Evaluate the repositories of a manifest and print the combined metrics."""
+    failures = batch_processing.run_batch(
+        args["manifest"],
+        args["token"],
+        args["shard_path"],
+        args["workers"],
+        dict(args["host_limit"] or []),
+        args["profile"],
+    )
+    for name, error in failures.items():
+        print("Could not evaluate {}: {}".format(name, error))
+    # Only combine the shards written by this run, not those of older manifests
+    names = [
+        entry["name"]
+        for entry in batch_processing.read_manifest(args["manifest"])
+        if entry["name"] not in failures
+    ]
+    organization_data = batch_processing.combine_shards(args["shard_path"], names)
+    json_handler.write_dict_to_json_file(organization_data, "organization_metrics")
+    data_collection.print_individual_in_table(
+        data_dict=organization_data, headings=["EMAIL", "COMMITS", "ADDED", "REMOVED"]
+    )
+
+
+def run_pipeline(args):
+    """Evaluate a repository from mining to the merged metrics and print them."""
+    data = pipeline.run_pipeline(
+        args["link"],
+        args["token"],
+        args["repo"],
+        args["state"] or "all",
+        args["branch"],
+        args["workers"],
+        args["profile"],
+        args["backend"],
+        args["bulk"],
+        args["blame"],
+    )
+    json_handler.write_dict_to_json_file(data, "individual_metrics_storage")
+    headings = ["EMAIL", "COMMITS", "ADDED", "REMOVED"]
+    if args["blame"]:
+        headings.append("SURVIVING")
+    data_collection.print_individual_in_table(data_dict=data, headings=headings)
+
+
+def print_activity(since, until, data_path="./data/"):
+    """Print the commits and lines of every contributor between two dates."""
+    index = activity_index.read_activity_index(
+        os.path.join(
+            data_path, activity_index.get_activity_index_name("raw_data_storage")
+        )
+    )
+    activity = activity_index.query_activity(index, since, until)
+    if not activity:
+        print("No commits between {} and {}".format(since, until))
+        return
+    data_collection.print_individual_in_table(
+        data_dict=activity, headings=["COMMITS", "ADDED", "REMOVED"]
+    )
+
+
+def print_surviving_lines(link, branch=None, workers=1):
+    """Write and print the lines of the head of a branch of every contributor."""
+    surviving_lines = blame_attribution.calculate_surviving_lines(link, branch, workers)
+    json_handler.write_dict_to_json_file(surviving_lines, "surviving_lines")
+    if not surviving_lines:
+        print("No lines to attribute")
+        return
+    data_collection.print_individual_in_table(
+        data_dict={
+            author: {"SURVIVING": lines} for author, lines in surviving_lines.items()
+        },
+        headings=["SURVIVING"],
+    )
+
+
+def print_hotspots(count, data_path="./data/"):
+    """Print the most modified files with their main owner and the bus factor."""
+    index = file_index.read_file_index(
+        os.path.join(data_path, file_index.get_file_index_name("raw_data_storage"))
+    )
+    headings = ["PATH", "COMMITS", "MODIFIED", "AUTHORS", "OWNER"]
+    data_table = PrettyTable()
+    data_table.field_names = headings
+    for hotspot in file_index.get_hotspots(index, count):
+        data_table.add_row([hotspot[heading] for heading in headings])
+    print(data_table)
+    print("Bus factor: {}".format(file_index.calculate_bus_factor(index)))
+
+
+def parse_host_limit(host_limit):
+    """Parse a HOST=N limit of concurrent batch tasks into a host and a limit."""
+    host, _, limit = host_limit.partition("=")
+    if not host or not limit.isdigit() or int(limit) < 1:
+        raise argparse.ArgumentTypeError(
+            "expected HOST=N with N at least 1, got {}".format(host_limit)
+        )
+    return host, int(limit)
+
+
 def retrieve_arguments():
     """Retrieve the user arguments and return the args dictionary."""
     # As no other functions exist in master as of this pull request, the args
@@ -40,15 +228,172 @@ def retrieve_arguments():
     a_parse.add_argument(
         "-t", "--token", required=True, type=str, help="Github User Token"
     )
+    a_parse.add_argument("-r", "--repo", type=str, help="User's Repository")
+    a_parse.add_argument("-s", "--state", type=str, help="State of the Issue")
+    a_parse.add_argument(
+        "-b", "--branch", type=str, help="Branch to mine instead of HEAD"
+    )
+    a_parse.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="Only mine the commits made since the last run",
+    )
+    a_parse.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes mining commits and threads fetching comments",
+    )
+    a_parse.add_argument(
+        "-p",
+        "--profile",
+        choices=["full", "fast"],
+        default="full",
+        help="Metrics to mine, fast skips the complexity and methods analysis",
+    )
+    a_parse.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the raw data to a .jsonl file while mining",
+    )
     a_parse.add_argument(
-        "-r", "--repo", required=True, type=str, help="User's Repository"
+        "--checkpoint-every",
+        type=int,
+        default=0,
+        help="Number of mined commits between checkpoints, 0 disables them",
     )
     a_parse.add_argument(
-        "-s", "--state", required=True, type=str, help="State of the Issue"
+        "--resume",
+        action="store_true",
+        help="Continue mining after the commits saved by an interrupted run",
+    )
+    a_parse.add_argument(
+        "--bucket",
+        choices=activity_index.BUCKETS,
+        default="day",
+        help="Size of the buckets of the activity index of the mined commits",
+    )
+    a_parse.add_argument(
+        "--since",
+        type=str,
+        help="Print the contributions made since this date, as YYYY-MM-DD",
+    )
+    a_parse.add_argument(
+        "--until",
+        type=str,
+        help="Print the contributions made before this date, as YYYY-MM-DD",
+    )
+    a_parse.add_argument(
+        "--blame",
+        action="store_true",
+        help="Count the lines at the head of the branch written by every author",
+    )
+    a_parse.add_argument(
+        "--hotspots",
+        type=int,
+        default=0,
+        help="Print this number of the most modified files and the bus factor",
+    )
+    a_parse.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Fetch the comments of all issues with the repository wide listing",
+    )
+    a_parse.add_argument(
+        "--backend",
+        choices=["rest", "graphql"],
+        default="rest",
+        help="GitHub API used to retrieve the issues and pull requests",
+    )
+    a_parse.add_argument(
+        "--cache",
+        action="store_true",
+        help="Cache the GitHub API responses and only download the changed ones",
+    )
+    a_parse.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        help="Size in MB above which the least recently used responses are evicted",
+    )
+    a_parse.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Delete the cached GitHub API responses before running",
+    )
+    a_parse.add_argument(
+        "--clone-cache",
+        default=data_collection.clone_cache.DEFAULT_CACHE_PATH,
+        help="Directory of the mirrors of the remote repositories",
+    )
+    a_parse.add_argument(
+        "--clone-cache-size",
+        type=int,
+        default=data_collection.clone_cache.DEFAULT_MAX_SIZE // (1024 * 1024),
+        help="Size in MB above which the least recently used mirrors are evicted",
+    )
+    a_parse.add_argument(
+        "--sync",
+        action="store_true",
+        help="Only fetch the issues updated since the last sync",
+    )
+
+    a_parse.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Mine, retrieve the issues, merge and print the metrics in one run",
+    )
+    a_parse.add_argument(
+        "-m",
+        "--manifest",
+        type=str,
+        help="Json file listing the repositories to evaluate in one batch",
+    )
+    a_parse.add_argument(
+        "--shard-path",
+        default="./data/shards/",
+        help="Directory of the metrics of every repository of the batch",
+    )
+    a_parse.add_argument(
+        "--host-limit",
+        action="append",
+        type=parse_host_limit,
+        help="Concurrent batch tasks allowed per host, as HOST=N",
     )
 
     args = vars(a_parse.parse_args())
 
+    # The pipeline mines a repository, its issues are only retrieved with -r
+    if args["pipeline"]:
+        if args["link"] is None:
+            a_parse.error(
+                "the following arguments are required with --pipeline: -l/--link"
+            )
+    # A single repository is evaluated without a manifest, mining and the
+    # questions answered from the indexes do not need the issues
+    elif args["manifest"] is None:
+        mines_or_queries = (
+            args["link"] is not None
+            or args["since"] is not None
+            or args["until"] is not None
+            or args["hotspots"]
+        )
+        if args["repo"] is None and args["state"] is None and not mines_or_queries:
+            a_parse.error("the following arguments are required: -r/--repo, -s/--state")
+        if (args["repo"] is None) != (args["state"] is None):
+            a_parse.error("the arguments -r/--repo and -s/--state go together")
+
+    # Only the commits mined into a .json file from the start are checkpointed
+    for argument in ["stream", "incremental"]:
+        if args["resume"] and args[argument]:
+            a_parse.error("argument --resume: not allowed with argument --" + argument)
+
+    # The lines are blamed in the mined repository
+    if args["blame"] and args["link"] is None:
+        a_parse.error("the following arguments are required with --blame: -l/--link")
+
     # pprint(find_repositories(args["link"]))
 
     return args
@@ -0,0 +1,222 @@
+"""Store raw commit data in typed NumPy columns instead of a list of dictionaries.
+
+Every field of the commits of RAW_DATA becomes a column of a .npz file. The
+author dates and the lines of every file are optional because the older raw
+data does not have them. The author names, emails, file names, file paths and
+methods are dictionary encoded: the unique strings are stored once, sorted,
+and the commits only store their integer codes. The lists of every commit are
+stored as one column of codes with the offsets where the list of every commit
+starts.
+
+The hashes and author dates have the same length in every commit and are
+stored as ASCII bytes. The messages can be of any length, so they are
+stored as their concatenated UTF-8 bytes with the offsets where every
+message starts, instead of a fixed width column sized by the longest one.
+"""
+import numpy as np
+
+EXTENSION = ".npz"
+
+NUMBER_FIELDS = ["line_added", "line_removed", "lines_of_code", "complexity"]
+ENCODED_FIELDS = ["author_name", "author_email"]
+LIST_FIELDS = ["methods", "filename", "filepath"]
+# Lines of every file, stored like the file names but without encoding
+FILE_NUMBER_FIELDS = ["file_line_added", "file_line_removed"]
+
+
+def encode_strings(values):
+    """Dictionary encode strings into their sorted unique values and their codes.
+
+    None is encoded as -1, for example for the path of a deleted file.
+    """
+    present_values = sorted({value for value in values if value is not None})
+    lookup = {value: code for code, value in enumerate(present_values)}
+    codes = np.fromiter(
+        (lookup[value] if value is not None else -1 for value in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+    return np.array(present_values, dtype=str), codes
+
+
+def decode_strings(unique_values, codes):
+    """Return the strings of dictionary encoded codes as a list."""
+    unique_values = unique_values.tolist()
+    return [unique_values[code] if code >= 0 else None for code in codes.tolist()]
+
+
+def encode_text(values):
+    """Encode strings as their concatenated UTF-8 bytes and their offsets."""
+    encoded_values = [value.encode("utf-8") for value in values]
+    offsets = np.concatenate(
+        ([0], np.cumsum([len(value) for value in encoded_values], dtype=np.int64))
+    )
+    return np.frombuffer(b"".join(encoded_values), dtype=np.uint8), offsets
+
+
+def decode_text(text_bytes, offsets):
+    """Return the strings of encode_text as a list."""
+    text_bytes = text_bytes.tobytes()
+    offsets = offsets.tolist()
+    return [
+        text_bytes[offsets[index] : offsets[index + 1]].decode("utf-8")
+        for index in range(len(offsets) - 1)
+    ]
+
+
+def encode_ascii(values):
+    """Encode strings of the same length, like hashes, as a column of bytes."""
+    return np.array([value.encode("ascii") for value in values], dtype=bytes)
+
+
+def decode_ascii(values):
+    """Return the strings of encode_ascii as a list."""
+    return [value.decode("ascii") for value in values.tolist()]
+
+
+def commits_to_columns(commits):
+    """Create the columns of a list of commit dictionaries."""
+    columns = {
+        "hash": encode_ascii([commit["hash"] for commit in commits]),
+        "merge": np.array([commit["merge"] for commit in commits], dtype=bool),
+    }
+    columns["author_msg"], columns["author_msg_offsets"] = encode_text(
+        [commit["author_msg"] for commit in commits]
+    )
+    if commits and "author_date" in commits[0]:
+        columns["author_date"] = encode_ascii(
+            [commit["author_date"] for commit in commits]
+        )
+    for field in NUMBER_FIELDS:
+        columns[field] = np.array([commit[field] for commit in commits], dtype=np.int64)
+    for field in ENCODED_FIELDS:
+        values, codes = encode_strings([commit[field] for commit in commits])
+        columns[field + "_values"] = values
+        columns[field + "_codes"] = codes
+    for field in LIST_FIELDS:
+        lengths = [len(commit[field]) for commit in commits]
+        values, codes = encode_strings(
+            [value for commit in commits for value in commit[field]]
+        )
+        columns[field + "_values"] = values
+        columns[field + "_codes"] = codes
+        # The list of the commit i is codes[offsets[i]:offsets[i + 1]]
+        columns[field + "_offsets"] = np.concatenate(
+            ([0], np.cumsum(lengths, dtype=np.int64))
+        )
+    if commits and FILE_NUMBER_FIELDS[0] in commits[0]:
+        # The lines of the files share the offsets of the file names
+        for field in FILE_NUMBER_FIELDS:
+            columns[field] = np.array(
+                [value for commit in commits for value in commit[field]],
+                dtype=np.int64,
+            )
+    return columns
+
+
+def columns_to_commits(columns):
+    """Create the list of commit dictionaries of the columns."""
+    fields = {
+        "hash": decode_ascii(columns["hash"]),
+        "author_msg": decode_text(columns["author_msg"], columns["author_msg_offsets"]),
+        "merge": columns["merge"].tolist(),
+    }
+    if "author_date" in columns:
+        fields["author_date"] = decode_ascii(columns["author_date"])
+    for field in NUMBER_FIELDS:
+        fields[field] = columns[field].tolist()
+    for field in ENCODED_FIELDS:
+        fields[field] = decode_strings(
+            columns[field + "_values"], columns[field + "_codes"]
+        )
+    for field in LIST_FIELDS:
+        values = decode_strings(columns[field + "_values"], columns[field + "_codes"])
+        offsets = columns[field + "_offsets"].tolist()
+        fields[field] = [
+            values[offsets[index] : offsets[index + 1]]
+            for index in range(len(offsets) - 1)
+        ]
+    file_offsets = columns["filename_offsets"].tolist()
+    for field in FILE_NUMBER_FIELDS:
+        if field in columns:
+            values = columns[field].tolist()
+            fields[field] = [
+                values[file_offsets[index] : file_offsets[index + 1]]
+                for index in range(len(file_offsets) - 1)
+            ]
+    # Keep the order of the keys of collect_commits_hash
+    keys = ["hash", "author_msg", "author_name", "author_email"]
+    if "author_date" in fields:
+        keys.append("author_date")
+    keys += ["merge"] + NUMBER_FIELDS + LIST_FIELDS
+    keys += [field for field in FILE_NUMBER_FIELDS if field in fields]
+    return [dict(zip(keys, values)) for values in zip(*[fields[key] for key in keys])]
+
+
+def write_raw_data(raw_data_dict, columnar_file):
+    """Write the RAW_DATA of a dictionary to a columnar .npz file.
+
+    The file is either a path or a file opened for writing bytes. Only the
+    RAW_DATA key can be stored in a columnar file.
+    """
+    if set(raw_data_dict.keys()) - {"RAW_DATA"}:
+        raise ValueError("Columnar files can only store the RAW_DATA key")
+    columns = commits_to_columns(raw_data_dict.get("RAW_DATA", []))
+    np.savez(columnar_file, **columns)
+
+
+def read_raw_data_columns(file_path):
+    """Read the columns of a columnar .npz file into a dictionary of arrays."""
+    with np.load(file_path, allow_pickle=False) as columnar_file:
+        return {name: columnar_file[name] for name in columnar_file.files}
+
+
+def read_raw_data(file_path):
+    """Read a columnar .npz file into a dictionary with the RAW_DATA key."""
+    return {"RAW_DATA": columns_to_commits(read_raw_data_columns(file_path))}
+
+
+def aggregate_by_author(columns):
+    """Group the commits of the columns by author name with vectorized operations.
+
+    Return a list with a tuple of the name, the email of the first commit,
+    the number of commits, the lines added, the lines removed and the sorted
+    file names of every author, in the order of their first commit.
+    """
+    author_codes = columns["author_name_codes"]
+    author_names = columns["author_name_values"]
+    author_count = len(author_names)
+    commit_count = len(author_codes)
+    commits = np.bincount(author_codes, minlength=author_count)
+    added = np.zeros(author_count, dtype=np.int64)
+    np.add.at(added, author_codes, columns["line_added"])
+    removed = np.zeros(author_count, dtype=np.int64)
+    np.add.at(removed, author_codes, columns["line_removed"])
+    # Index of the first commit of every author
+    first_commits = np.full(author_count, commit_count, dtype=np.int64)
+    np.minimum.at(first_commits, author_codes, np.arange(commit_count))
+    emails = columns["author_email_values"][
+        columns["author_email_codes"][first_commits]
+    ]
+
+    # Unique (author, file) pairs, sorted by author then by file name because
+    # the codes follow the order of the sorted unique values
+    file_names = columns["filename_values"]
+    file_count = max(len(file_names), 1)
+    file_authors = np.repeat(author_codes, np.diff(columns["filename_offsets"]))
+    pairs = np.unique(file_authors * file_count + columns["filename_codes"])
+    pair_authors = pairs // file_count
+    pair_files = file_names[pairs % file_count]
+    boundaries = np.searchsorted(pair_authors, np.arange(author_count + 1))
+
+    return [
+        (
+            str(author_names[author]),
+            str(emails[author]),
+            int(commits[author]),
+            int(added[author]),
+            int(removed[author]),
+            pair_files[boundaries[author] : boundaries[author + 1]].tolist(),
+        )
+        for author in np.argsort(first_commits, kind="stable").tolist()
+    ]
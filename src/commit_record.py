@@ -0,0 +1,119 @@
+"""Keep mined commits in compact records instead of dictionaries.
+
+A record stores the fields of a commit in __slots__, so it has no dictionary
+of its own. The author names, emails, file names, file paths and method
+names repeat across the whole history, so they are interned and every record
+refers to a single copy of them. The lists of strings are stored as tuples
+and the lines of every file as arrays of integers.
+
+Records can be read like the commit dictionaries of collect_commits_hash,
+and json_handler writes them with to_dict, so the dictionaries only exist
+while the commits are serialized.
+"""
+import sys
+from array import array
+
+FIELDS = (
+    "hash",
+    "author_msg",
+    "author_name",
+    "author_email",
+    "author_date",
+    "merge",
+    "line_added",
+    "line_removed",
+    "lines_of_code",
+    "complexity",
+    "methods",
+    "filename",
+    "filepath",
+    "file_line_added",
+    "file_line_removed",
+)
+
+# Fields only collected by some of the miners, None when they are missing
+OPTIONAL_FIELDS = ["author_date", "file_line_added", "file_line_removed"]
+
+INTERNED_FIELDS = ["author_name", "author_email"]
+
+INTERNED_LIST_FIELDS = ["methods", "filename", "filepath"]
+
+NUMBER_LIST_FIELDS = ["file_line_added", "file_line_removed"]
+
+
+def intern_string(value):
+    """Return the interned copy of a string, None is kept."""
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
+class CommitRecord:
+    """Read-only commit with the fields of a commit dictionary."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, commit):
+        """Copy the fields of a commit dictionary."""
+        for field in FIELDS:
+            value = commit.get(field)
+            if field in INTERNED_FIELDS:
+                value = intern_string(value)
+            elif field in INTERNED_LIST_FIELDS:
+                value = tuple(intern_string(item) for item in value)
+            elif field in NUMBER_LIST_FIELDS and value is not None:
+                value = array("q", value)
+            setattr(self, field, value)
+
+    def __contains__(self, field):
+        """Check if the commit has a field, like a commit dictionary."""
+        if field in OPTIONAL_FIELDS:
+            return getattr(self, field) is not None
+        return field in FIELDS
+
+    def __getitem__(self, field):
+        """Return the value of a field, like a commit dictionary."""
+        if field not in self:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        """Return the value of a field, or default when the commit lacks it."""
+        if field not in self:
+            return default
+        return getattr(self, field)
+
+    def keys(self):
+        """Return the fields of the commit in the order of a commit dictionary."""
+        return [field for field in FIELDS if field in self]
+
+    def to_dict(self):
+        """Create the commit dictionary of the record."""
+        commit = {}
+        for field in self.keys():
+            value = getattr(self, field)
+            if field in INTERNED_LIST_FIELDS:
+                value = list(value)
+            elif field in NUMBER_LIST_FIELDS:
+                value = value.tolist()
+            commit[field] = value
+        return commit
+
+    def __eq__(self, other):
+        """Compare the commit with a record or a commit dictionary."""
+        if isinstance(other, CommitRecord):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    # Records are compared by value like dictionaries, so they are unhashable
+    __hash__ = None
+
+    def __repr__(self):
+        """Show the commit like its dictionary."""
+        return "CommitRecord({!r})".format(self.to_dict())
+
+
+def compact_commits(commits):
+    """Yield the record of every commit dictionary."""
+    for commit in commits:
+        yield CommitRecord(commit)
@@ -24,23 +24,62 @@ Enter the repository name similar to this example GatorCogitate/cogitate_tool
 Enter the entries you would like to merge in the data set.
 """
 from __future__ import division
+import codecs
+import functools
+import itertools
+import multiprocessing
 import os
-from pydriller import RepositoryMining
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from git import GitCommandError, Repo
+from pydriller import GitRepository, RepositoryMining
 from prettytable import PrettyTable
 from github import Github
+import activity_index
+import clone_cache
+import columnar_storage
+import commit_record
+import file_index
 import json_handler
 
+# Fields of the commits read by the activity and file indexes
+INDEX_FIELDS = [
+    "author_name",
+    "author_date",
+    "line_added",
+    "line_removed",
+    "filepath",
+    "file_line_added",
+    "file_line_removed",
+]
+
+# Commits added to the indexes at once while streaming
+INDEX_BATCH_SIZE = 10000
+
 
 # Note: needs tested, likely not testable
 def authenticate_repository(user_token, repository_name):
     """Authenticate the Github repository using provided credentials."""
     # Credentials for PyGithub functions and methods
-    ghub = Github(user_token)
+    ghub = authenticate_github(user_token)
     repository = ghub.get_repo(repository_name)
 
     return repository
 
 
+def authenticate_github(user_token, base_url=None):
+    """Create the Github object used for every PyGithub request.
+
+    The base_url is only needed for GitHub Enterprise servers.
+    """
+    if base_url is None:
+        return Github(user_token)
+    return Github(user_token, base_url=base_url)
+
+
 # Written as a temporary pass-through in case this variable is converted to a global
 # variable, in which case that process would occur here. Pass-through will be eliminated
 # during refactoring.
@@ -52,56 +91,203 @@ def initialize_contributor_data(file_path):
 
 
 # NOTE: Test case for this function not counting in code coverage
-def retrieve_issue_data(repository, state, contributor_data):
-    """Retrieve a contributor's involvement based upon issues and pull request threads."""
+# pylint: disable=C0330
+def retrieve_issue_data(
+    repository, state, contributor_data, workers=1, ghub=None, bulk=False
+):
+    """Retrieve a contributor's involvement based upon issues and pull request threads.
+
+    When workers is greater than one, the comments of that many issues are
+    fetched at the same time by a pool of threads. When the authenticated
+    Github object is given, the threads wait for the rate limit to reset
+    instead of running out of requests.
+
+    When bulk is True, all of the comments are fetched through the repository
+    wide listing instead of one listing per issue, so the number of requests
+    depends on the number of comments instead of the number of issues.
+    """
     issues = repository.get_issues(state=state)
 
-    for issue in issues:
-        for comment in issue.get_comments():
-            if comment.user.login in contributor_data.keys():
-                if issue.pull_request is None:
-                    contributor_data[comment.user.login]["issues_commented"].append(
-                        issue.number
-                    )
-                else:
-                    contributor_data[comment.user.login][
-                        "pull_requests_commented"
-                    ].append(issue.number)
-            else:
-                contributor_data[comment.user.login] = {
-                    "issues_commented": [],
-                    "pull_requests_commented": [],
-                    "issues_opened": [],
-                    "pull_requests_opened": [],
-                }
-                if issue.pull_request is None:
-                    contributor_data[comment.user.login]["issues_commented"].append(
-                        issue.number
-                    )
-                else:
-                    contributor_data[comment.user.login][
-                        "pull_requests_commented"
-                    ].append(issue.number)
-
-        if issue.user.login in contributor_data.keys():
-            if issue.pull_request is None:
-                contributor_data[issue.user.login]["issues_opened"].append(issue.number)
-            else:
-                contributor_data[issue.user.login]["pull_requests_opened"].append(
-                    issue.number
-                )
+    if bulk:
+        logins_by_issue = get_comment_logins_by_issue(repository)
+        issue_comments = (
+            (issue, logins_by_issue.get(issue.number, [])) for issue in issues
+        )
+    elif workers > 1:
+        issue_comments = iterate_issue_comments_concurrently(issues, workers, ghub)
+    else:
+        issue_comments = ((issue, get_comment_logins(issue, ghub)) for issue in issues)
+
+    for issue, comment_logins in issue_comments:
+        add_issue_to_contributor_data(
+            contributor_data,
+            issue.number,
+            issue.user.login,
+            issue.pull_request is not None,
+            comment_logins,
+        )
 
     return contributor_data
 
 
-def collect_commits_hash(repo):
-    """Create a list of dictionaries that contains commit info.
+# pylint: disable=C0330
+def sync_issue_data(
+    repository,
+    state,
+    contributor_data,
+    workers=1,
+    ghub=None,
+    sync_file="issue_sync_state",
+    data_path="./data/",
+):
+    """Retrieve the issues updated since the last sync and merge them with the others.
+
+    The author and the commenters of every issue are stored in the sync file
+    with the time of the last sync. Only the issues updated since then are
+    fetched and their comments replace the stored ones, so edited and deleted
+    comments are never counted twice. The contributor data is then filled
+    from every stored issue like retrieve_issue_data does.
+    """
+    sync_key = repository.full_name + "@" + state
+    try:
+        sync_states = json_handler.get_dict_from_json_file(sync_file, data_path)
+    except FileNotFoundError:
+        sync_states = {}
+    sync_state = sync_states.get(sync_key, {"since": None, "issues": {}})
+    # Updates made while syncing are fetched again by the next sync
+    sync_started = datetime.now(timezone.utc)
+
+    if sync_state["since"] is None:
+        issues = repository.get_issues(state=state)
+    else:
+        # Issues that changed state must be fetched to be removed
+        since = datetime.strptime(sync_state["since"], "%Y-%m-%dT%H:%M:%SZ")
+        issues = repository.get_issues(state="all", since=since)
+
+    if workers > 1:
+        issue_comments = iterate_issue_comments_concurrently(issues, workers, ghub)
+    else:
+        issue_comments = ((issue, get_comment_logins(issue, ghub)) for issue in issues)
+
+    stored_issues = sync_state["issues"]
+    for issue, comment_logins in issue_comments:
+        if state != "all" and issue.state != state:
+            stored_issues.pop(str(issue.number), None)
+            continue
+        stored_issues[str(issue.number)] = {
+            "author": issue.user.login,
+            "pull_request": issue.pull_request is not None,
+            "comments": comment_logins,
+        }
+
+    sync_states[sync_key] = {
+        "since": sync_started.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "issues": stored_issues,
+    }
+    json_handler.write_dict_to_json_file(sync_states, sync_file, data_path)
+
+    # Fill the data from the newest issue like the issues listing does
+    for number in sorted(stored_issues, key=int, reverse=True):
+        stored_issue = stored_issues[number]
+        add_issue_to_contributor_data(
+            contributor_data,
+            int(number),
+            stored_issue["author"],
+            stored_issue["pull_request"],
+            stored_issue["comments"],
+        )
+    return contributor_data
+
+
+# pylint: disable=C0330
+def add_issue_to_contributor_data(
+    contributor_data, number, author_login, is_pull_request, comment_logins
+):
+    """Add an issue or pull request and its commenters to the contributor data."""
+    for login in comment_logins:
+        if login not in contributor_data.keys():
+            contributor_data[login] = {
+                "issues_commented": [],
+                "pull_requests_commented": [],
+                "issues_opened": [],
+                "pull_requests_opened": [],
+            }
+        if not is_pull_request:
+            contributor_data[login]["issues_commented"].append(number)
+        else:
+            contributor_data[login]["pull_requests_commented"].append(number)
+
+    if author_login in contributor_data.keys():
+        if not is_pull_request:
+            contributor_data[author_login]["issues_opened"].append(number)
+        else:
+            contributor_data[author_login]["pull_requests_opened"].append(number)
+
+
+def wait_for_rate_limit(ghub, minimum_remaining=1):
+    """Sleep until the rate limit resets when too few requests remain.
+
+    The remaining requests and the reset time come from the headers of the
+    last response, so checking them does not use a request.
+    """
+    if ghub is None:
+        return
+    remaining, _ = ghub.rate_limiting
+    if remaining < minimum_remaining:
+        # Wait one more second to make sure the limit was reset
+        time.sleep(max(ghub.rate_limiting_resettime - time.time(), 0) + 1)
+
+
+def get_comment_logins(issue, ghub=None, minimum_remaining=1):
+    """Fetch the comments of an issue and return the logins of their authors."""
+    wait_for_rate_limit(ghub, minimum_remaining)
+    return [comment.user.login for comment in issue.get_comments()]
+
+
+def get_comment_logins_by_issue(repository):
+    """Fetch every issue comment of the repository with the repository wide listing.
+
+    Return the logins of the authors of the comments keyed by issue number,
+    in the same order as the listing of the comments of every issue.
+    """
+    comment_logins = {}
+    for comment in repository.get_issues_comments():
+        # The number of the issue is the last part of its url
+        issue_number = int(comment.issue_url.rsplit("/", 1)[-1])
+        comment_logins.setdefault(issue_number, []).append(comment.user.login)
+    return comment_logins
+
+
+def iterate_issue_comments_concurrently(issues, workers, ghub=None):
+    """Yield every issue with the logins of its commenters, in issue order.
+
+    The comments are fetched by a pool of threads. Only a few issues per
+    thread are in flight at a time, so the issues are not all held in memory.
+    """
+    # Keep a request per thread in reserve because the threads check the
+    # rate limit at the same time
+    minimum_remaining = workers
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for issue in issues:
+            future = executor.submit(get_comment_logins, issue, ghub, minimum_remaining)
+            pending.append((issue, future))
+            if len(pending) >= workers * 2:
+                issue, future = pending.popleft()
+                yield issue, future.result()
+        while pending:
+            issue, future = pending.popleft()
+            yield issue, future.result()
+
+
+def get_commit_dict(commit):
+    """Create a dictionary that contains the info of a PyDriller commit.
 
     hash (str): hash of the commit
     msg (str): commit message
     author_name (str): commit author name
     author_email (str): commit author email
-    author_date (datetime): authored date
+    author_date (str): authored date in UTC, see format_commit_date
     merge (Bool): True if the commit is a merge commit
     added: number of lines added
     removed: number of lines removed
@@ -110,54 +296,561 @@ def collect_commits_hash(repo):
     methods: list of methods of the file.
     filename: files modified by commit.
     filepath: filepaths of files modified by commit.
+    file_line_added: number of lines added to every file.
+    file_line_removed: number of lines removed from every file.
     """
-    commit_list = []
+    line_added = 0
+    line_removed = 0
+    line_of_code = 0
+    complexity = 0
+    methods = []
+    filename = []
+    filepath = []
+    file_line_added = []
+    file_line_removed = []
 
-    for commit in RepositoryMining(repo).traverse_commits():
-
-        line_added = 0
-        line_removed = 0
-        line_of_code = 0
-        complexity = 0
-        methods = []
-        filename = []
-        filepath = []
-
-        for item in commit.modifications:
-            # modifications is a list of files and its changes
-            line_added += item.added
-            line_removed += item.removed
-            if item.nloc is not None:
-                line_of_code += item.nloc
-            if item.complexity is not None:
-                complexity += item.complexity
-
-            for method in item.methods:
-                methods.append(method.name)
-            filename.append(item.filename)
-            filepath.append(item.new_path)
-
-        single_commit_dict = {
-            "hash": commit.hash,
-            "author_msg": commit.msg,
-            "author_name": commit.author.name,
-            "author_email": commit.author.email,
-            # "author_date": commit.author_date,
-            "merge": commit.merge,
-            "line_added": line_added,
-            "line_removed": line_removed,
-            "lines_of_code": line_of_code,
-            "complexity": complexity,
-            "methods": methods,
-            "filename": filename,
-            "filepath": filepath,
-        }
+    for item in commit.modifications:
+        # modifications is a list of files and its changes
+        line_added += item.added
+        line_removed += item.removed
+        if item.nloc is not None:
+            line_of_code += item.nloc
+        if item.complexity is not None:
+            complexity += item.complexity
+
+        for method in item.methods:
+            methods.append(method.name)
+        filename.append(item.filename)
+        filepath.append(item.new_path)
+        file_line_added.append(item.added)
+        file_line_removed.append(item.removed)
+
+    single_commit_dict = {
+        "hash": commit.hash,
+        "author_msg": commit.msg,
+        "author_name": commit.author.name,
+        "author_email": commit.author.email,
+        "author_date": format_commit_date(commit.author_date),
+        "merge": commit.merge,
+        "line_added": line_added,
+        "line_removed": line_removed,
+        "lines_of_code": line_of_code,
+        "complexity": complexity,
+        "methods": methods,
+        "filename": filename,
+        "filepath": filepath,
+        "file_line_added": file_line_added,
+        "file_line_removed": file_line_removed,
+    }
+
+    return single_commit_dict
+
+
+# pylint: disable=C0330
+def collect_commits_hash(
+    repo, from_commit=None, branch=None, workers=1, profile="full", compact=False
+):
+    """Create a list of dictionaries that contains commit info.
 
-        commit_list.append(single_commit_dict)
+    The info of every commit is described in get_commit_dict.
 
+    When from_commit is given, only that commit and the commits after it are
+    mined. When branch is given, the history of that branch is mined instead
+    of the history of HEAD. When workers is greater than one, the commits are
+    mined in parallel by that many processes.
+
+    The "full" profile analyzes the source of every modified file. The "fast"
+    profile only collects the fields that come from git log --numstat.
+
+    When compact is True, the commits are kept as commit_record.CommitRecord
+    instead of dictionaries, which takes much less memory for long histories.
+    """
+    commits = iterate_commits_hash(repo, from_commit, branch, workers, profile)
+    if compact:
+        commits = commit_record.compact_commits(commits)
+    return list(commits)
+
+
+# pylint: disable=C0330
+def iterate_commits_hash(
+    repo, from_commit=None, branch=None, workers=1, profile="full"
+):
+    """Yield the commit dictionaries of collect_commits_hash one at a time.
+
+    Every commit is yielded as soon as it is mined, so the history is never
+    held in memory as a whole.
+    """
+    if profile == "fast":
+        yield from iterate_commits_numstat(repo, from_commit, branch)
+    elif workers > 1:
+        yield from iterate_commits_parallel(repo, workers, from_commit, branch)
+    else:
+        # Mine the mirror instead of letting PyDriller clone remote repositories
+        with local_repository(repo) as repo_path:
+            miner = RepositoryMining(
+                repo_path, from_commit=from_commit, to_commit=branch
+            )
+            for commit in miner.traverse_commits():
+                yield get_commit_dict(commit)
+
+
+def is_remote_repository(repo):
+    """Check if the repository is an URL instead of a local path."""
+    return repo.startswith("git@") or repo.startswith("https://")
+
+
+@contextmanager
+def local_repository(repo):
+    """Provide a local path to the repository, mirroring it first if it is remote.
+
+    Remote repositories are mined from their mirror in the clone cache, which
+    only fetches the new objects when the repository was mirrored before.
+    """
+    if not is_remote_repository(repo):
+        yield repo
+        return
+    with clone_cache.mirrored_repository(repo) as mirror_path:
+        yield mirror_path
+
+
+def get_revisions(git_repo, from_commit=None, branch=None):
+    """Create the git rev-list revisions of the commits PyDriller would mine.
+
+    As in PyDriller, from_commit is included and only the commits that are
+    not ancestors of its parents are selected.
+    """
+    revisions = [branch if branch is not None else "HEAD"]
+    if from_commit is not None:
+        # Raises an exception when from_commit is not in the repository
+        parents = git_repo.commit(from_commit).parents
+        revisions += ["^" + parent.hexsha for parent in parents]
+    return revisions
+
+
+def get_commit_hashes(repo_path, from_commit=None, branch=None):
+    """List the hashes of a local repository in the order PyDriller mines them."""
+    git_repo = Repo(repo_path)
+    revisions = get_revisions(git_repo, from_commit, branch)
+    return git_repo.git.rev_list("--reverse", *revisions).split()
+
+
+def is_commit_in_history(repo, commit_hash, branch=None):
+    """Check if a commit is still in the history of the mined branch.
+
+    False is returned when the commit is gone or is no longer an ancestor of
+    the branch, like after a rebase or a force push. Any other git error is
+    raised.
+    """
+    revision = branch if branch is not None else "HEAD"
+    with local_repository(repo) as repo_path:
+        git_repo = Repo(repo_path)
+        # Both commands exit with 1 for a missing commit or a non ancestor
+        try:
+            git_repo.git.rev_parse("--verify", "--quiet", commit_hash + "^{commit}")
+            git_repo.git.merge_base("--is-ancestor", commit_hash, revision)
+        except GitCommandError as error:
+            if error.status == 1:
+                return False
+            raise
+    return True
+
+
+def split_into_chunks(items, chunk_count):
+    """Split a list into at most chunk_count contiguous chunks of similar size."""
+    if not items:
+        return []
+    chunk_size = -(-len(items) // chunk_count)
+    return [
+        items[index : index + chunk_size] for index in range(0, len(items), chunk_size)
+    ]
+
+
+# Repository opened once by every worker process of collect_commits_hash_parallel
+WORKER_REPOSITORY = {}
+
+
+def initialize_mining_worker(repo_path, lock):
+    """Open the repository to be mined by a worker process.
+
+    PyDriller writes to the git config when it opens a repository, so the
+    workers take turns to avoid failing on the config lock file.
+    """
+    with lock:
+        git_repo = GitRepository(repo_path)
+        # Getting the head commit forces the repository to be opened
+        git_repo.get_head()
+    WORKER_REPOSITORY["git_repo"] = git_repo
+
+
+def collect_commits_in_range(commit_hashes):
+    """Create the commit dictionaries of a range of commits.
+
+    This function runs in the worker processes of collect_commits_hash_parallel.
+    """
+    git_repo = WORKER_REPOSITORY["git_repo"]
+    commit_list = [
+        get_commit_dict(git_repo.get_commit(commit_hash))
+        for commit_hash in commit_hashes
+    ]
     return commit_list
 
 
+def iterate_commits_parallel(repo, workers, from_commit=None, branch=None):
+    """Yield the same commits as collect_commits_hash with a pool of processes.
+
+    The history is split into ranges of consecutive commits that are mined
+    by the workers, then the ranges are yielded back in commit order. At
+    most twice as many ranges as workers are submitted at once, so the mined
+    ranges do not pile up while the earlier ones are consumed.
+    """
+    # Clone remote repositories once instead of once per worker
+    with local_repository(repo) as repo_path:
+        commit_hashes = get_commit_hashes(repo_path, from_commit, branch)
+        # Use more ranges than workers so that a slow range does not stall the pool
+        chunks = split_into_chunks(commit_hashes, workers * 4)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=initialize_mining_worker,
+            initargs=(repo_path, multiprocessing.Lock()),
+        ) as executor:
+            # The futures are consumed in the order of the chunks
+            running = deque()
+            for chunk in chunks:
+                running.append(executor.submit(collect_commits_in_range, chunk))
+                if len(running) == workers * 2:
+                    yield from running.popleft().result()
+            while running:
+                yield from running.popleft().result()
+
+
+def format_commit_date(date):
+    """Format the date of a commit in UTC like the dates of the GitHub API.
+
+    Dates in this format are compared in chronological order as strings.
+    """
+    return date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_numstat_record(record):
+    """Create the commit dictionary of a commit record of iterate_commits_numstat.
+
+    The output of git log lists the raw entries of a commit, which hold the
+    status and paths of the files, followed by its numstat entries, which hold
+    the number of lines added and removed, in the same order.
+    """
+    commit_hash, name, email, timestamp, parents, message, entries = record.split(
+        "\x1f"
+    )
+    file_changes = []
+    line_counts = []
+    tokens = iter(entries.split("\0"))
+    for token in tokens:
+        token = token.strip("\n")
+        if token.startswith(":"):
+            # Renamed and copied files list the old and new paths
+            status = token.split()[-1]
+            old_path = next(tokens)
+            new_path = next(tokens) if status[0] in "RC" else old_path
+            if status == "D":
+                new_path = None
+            file_changes.append((old_path, new_path))
+        elif token:
+            added, removed, _ = token.split("\t", 2)
+            # Binary files are listed with dashes instead of line counts
+            line_counts.append(
+                (
+                    int(added) if added != "-" else 0,
+                    int(removed) if removed != "-" else 0,
+                )
+            )
+            if token.endswith("\t"):
+                # Skip the paths of renamed files, they are in file_changes
+                next(tokens)
+                next(tokens)
+    return {
+        "hash": commit_hash,
+        "author_msg": message.strip(),
+        "author_name": name,
+        "author_email": email,
+        "author_date": format_commit_date(
+            datetime.fromtimestamp(int(timestamp), timezone.utc)
+        ),
+        "merge": len(parents.split()) > 1,
+        "line_added": sum(added for added, _ in line_counts),
+        "line_removed": sum(removed for _, removed in line_counts),
+        "lines_of_code": 0,
+        "complexity": 0,
+        "methods": [],
+        "filename": [
+            os.path.basename(new_path if new_path is not None else old_path)
+            for old_path, new_path in file_changes
+        ],
+        "filepath": [new_path for _, new_path in file_changes],
+        "file_line_added": [added for added, _ in line_counts],
+        "file_line_removed": [removed for _, removed in line_counts],
+    }
+
+
+def iterate_log_records(stream, chunk_size=65536):
+    """Yield the commit records of a git log output read from a binary stream.
+
+    Every commit record starts with a record separator character.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        pending += decoder.decode(chunk)
+        records = pending.split("\x1e")
+        # The last record may not be complete yet
+        pending = records.pop()
+        for record in records:
+            if record:
+                yield record
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iterate_commits_numstat(repo, from_commit=None, branch=None):
+    """Yield the same commits as collect_commits_hash without source analysis.
+
+    The commits are read from a single git log with numstat, so the source
+    of the files is never retrieved. Because of that lines_of_code and
+    complexity are always 0 and methods is always empty.
+    """
+    with local_repository(repo) as repo_path:
+        git_repo = Repo(repo_path)
+        revisions = get_revisions(git_repo, from_commit, branch)
+        process = git_repo.git.log(
+            "--reverse",
+            "--raw",
+            "--numstat",
+            "-M",
+            "-z",
+            "--format=%x1e%H%x1f%an%x1f%ae%x1f%at%x1f%P%x1f%B%x1f",
+            *revisions,
+            as_process=True
+        )
+        for record in iterate_log_records(process.proc.stdout):
+            yield parse_numstat_record(record)
+        # Raises an exception when git log failed
+        process.wait()
+
+
+def get_watermark_key(repo, branch=None):
+    """Create the key used to store the watermark of a repository branch."""
+    if branch is None:
+        branch = "HEAD"
+    return repo + "@" + branch
+
+
+def get_mining_watermark(
+    repo, branch=None, watermark_file="mining_watermarks", data_path="./data/"
+):
+    """Return the hash of the last commit mined from the repository branch.
+
+    None is returned when the repository branch was never mined.
+    """
+    try:
+        watermarks = json_handler.get_dict_from_json_file(watermark_file, data_path)
+    except FileNotFoundError:
+        return None
+    return watermarks.get(get_watermark_key(repo, branch))
+
+
+# pylint: disable=C0330
+def set_mining_watermark(
+    repo,
+    commit_hash,
+    branch=None,
+    watermark_file="mining_watermarks",
+    data_path="./data/",
+):
+    """Store the hash of the last commit mined from the repository branch."""
+    watermark = {get_watermark_key(repo, branch): commit_hash}
+    try:
+        json_handler.add_entry(watermark, watermark_file, data_path)
+    except FileNotFoundError:
+        json_handler.write_dict_to_json_file(watermark, watermark_file, data_path)
+
+
+def collect_new_commits_hash(repo, last_hash, branch=None, workers=1, profile="full"):
+    """Use collect_commits_hash to collect the commits made after last_hash.
+
+    The commits are returned as compact commit records.
+
+    Return None when last_hash is no longer part of the history, which happens
+    when the history was rewritten by a rebase or a force push.
+    """
+    try:
+        commit_list = collect_commits_hash(
+            repo, last_hash, branch, workers, profile, compact=True
+        )
+    # PyDriller raises a bare Exception when from_commit does not exist
+    # pylint: disable=W0703
+    except Exception:
+        return None
+    # from_commit is inclusive, so the last mined commit must be in the list
+    # unless it is not an ancestor of the mined branch anymore
+    if last_hash not in [commit["hash"] for commit in commit_list]:
+        return None
+    return [commit for commit in commit_list if commit["hash"] != last_hash]
+
+
+# pylint: disable=C0330
+def collect_incremental_raw_data(
+    path_to_repo,
+    json_file_name="raw_data_storage",
+    data_path="./data/",
+    branch=None,
+    workers=1,
+    profile="full",
+):
+    """Append the commits made since the last run to the stored raw data.
+
+    Fall back to mining the whole history when there is no watermark, when
+    the stored raw data does not end with the watermark or when the history
+    was rewritten.
+    """
+    last_hash = get_mining_watermark(path_to_repo, branch, data_path=data_path)
+    try:
+        stored_data = json_handler.get_dict_from_json_file(json_file_name, data_path)
+    except FileNotFoundError:
+        stored_data = {}
+    stored_commits = stored_data.get("RAW_DATA", [])
+    # Only trust the watermark if the stored data was mined up to it
+    if last_hash is not None and stored_commits:
+        if stored_commits[-1]["hash"] == last_hash:
+            new_commits = collect_new_commits_hash(
+                path_to_repo, last_hash, branch, workers, profile
+            )
+            if new_commits is not None:
+                # Keep the stored commits as compact records like the new ones
+                return list(commit_record.compact_commits(stored_commits)) + new_commits
+    return collect_commits_hash(
+        path_to_repo, branch=branch, workers=workers, profile=profile, compact=True
+    )
+
+
+def get_checkpoint_name(json_file_name):
+    """Create the name of the checkpoint files of a raw data file."""
+    return json_file_name + "_checkpoint"
+
+
+def load_mining_checkpoint(checkpoint, json_file_name, data_path="./data/"):
+    """Return the commits saved by an interrupted run with the same arguments.
+
+    The checkpoint dictionary holds the repository, branch and profile of the
+    current run. An empty list is returned when there is no checkpoint of a
+    run with the same arguments.
+    """
+    checkpoint_name = get_checkpoint_name(json_file_name)
+    try:
+        stored_checkpoint = json_handler.get_dict_from_json_file(
+            checkpoint_name, data_path
+        )
+        commits = json_handler.get_entries_from_jsonl_file(checkpoint_name, data_path)
+        # Commits written after the last checkpoint are not trusted
+        commit_list = list(
+            commit_record.compact_commits(
+                itertools.islice(commits, stored_checkpoint["commits"])
+            )
+        )
+    except FileNotFoundError:
+        return []
+    for key in ["repo", "branch", "profile"]:
+        if stored_checkpoint.get(key) != checkpoint[key]:
+            return []
+    if len(commit_list) != stored_checkpoint["commits"]:
+        return []
+    return commit_list
+
+
+def save_mining_checkpoint(checkpoint, new_commits, json_file_name, data_path):
+    """Append the commits mined since the last checkpoint and record them."""
+    checkpoint_name = get_checkpoint_name(json_file_name)
+    json_handler.write_entries_to_jsonl_file(
+        new_commits, checkpoint_name, data_path, append=True
+    )
+    checkpoint["commits"] += len(new_commits)
+    checkpoint["last_hash"] = new_commits[-1]["hash"]
+    # The jsonl file is written first so that it always holds the commits
+    json_handler.write_dict_to_json_file(checkpoint, checkpoint_name, data_path)
+
+
+def clear_mining_checkpoint(json_file_name, data_path="./data/"):
+    """Delete the checkpoint files of a raw data file once mining finished."""
+    checkpoint_name = get_checkpoint_name(json_file_name)
+    for extension in [".json", ".jsonl"]:
+        try:
+            os.remove(os.path.join(data_path, checkpoint_name + extension))
+        except FileNotFoundError:
+            pass
+
+
+# pylint: disable=C0330
+def collect_checkpointed_raw_data(
+    path_to_repo,
+    json_file_name="raw_data_storage",
+    data_path="./data/",
+    branch=None,
+    workers=1,
+    profile="full",
+    checkpoint_every=1000,
+    resume=False,
+):
+    """Mine the commits while saving them to a checkpoint every few commits.
+
+    When resume is True, the commits saved by an interrupted run with the
+    same arguments are kept and mining continues after the last of them.
+    The checkpoint is only deleted by clear_mining_checkpoint, after the
+    mined commits were stored.
+    """
+    checkpoint = {
+        "repo": path_to_repo,
+        "branch": branch,
+        "profile": profile,
+        "last_hash": None,
+        "commits": 0,
+    }
+    commit_list = []
+    if resume:
+        commit_list = load_mining_checkpoint(checkpoint, json_file_name, data_path)
+        if not commit_list:
+            print("No checkpoint to resume, mining the whole history...")
+    # The history was rewritten since the checkpoint, start over
+    if commit_list and not is_commit_in_history(
+        path_to_repo, commit_list[-1]["hash"], branch
+    ):
+        commit_list = []
+    if commit_list:
+        checkpoint["commits"] = len(commit_list)
+        checkpoint["last_hash"] = commit_list[-1]["hash"]
+    else:
+        # Start a new checkpoint, dropping the commits of an older run
+        json_handler.write_entries_to_jsonl_file(
+            [], get_checkpoint_name(json_file_name), data_path
+        )
+    last_hash = checkpoint["last_hash"]
+    # from_commit also selects the commits of branches merged after it
+    mined_hashes = {commit["hash"] for commit in commit_list}
+    new_commits = []
+    # Errors while mining keep the checkpoint as it is for the next resume
+    for commit in iterate_commits_hash(
+        path_to_repo, last_hash, branch, workers, profile
+    ):
+        if commit["hash"] in mined_hashes:
+            continue
+        new_commits.append(commit_record.CommitRecord(commit))
+        if len(new_commits) == checkpoint_every:
+            save_mining_checkpoint(checkpoint, new_commits, json_file_name, data_path)
+            commit_list += new_commits
+            new_commits = []
+    if new_commits:
+        save_mining_checkpoint(checkpoint, new_commits, json_file_name, data_path)
+    return commit_list + new_commits
+
+
 def get_commit_average(lines, commits):
     """Find average lines modified per commit."""
     # Loop through the dictionary and calculate the average lines per commits
@@ -168,6 +861,8 @@ def get_commit_average(lines, commits):
     return 0
 
 
+# The same file names come up in the commits of every author
+@functools.lru_cache(maxsize=65536)
 def parse_for_type(name):
     """Parse through file name and returns its format."""
     if "." in name:
@@ -179,29 +874,157 @@ def parse_for_type(name):
 
 def get_file_formats(files):
     """Create a list of unique file formats."""
-    formats = []
-    for file in files:
-        current_format = parse_for_type(file)
-        if current_format not in formats:
-            formats.append(current_format)
+    # a set removes the duplicates without searching the list for every file
+    formats = {parse_for_type(file) for file in files}
     # sort data to ensure consistency for test
-    formats = sorted(formats)
-    return formats
+    return sorted(formats)
+
+
+def get_index_fields(commit):
+    """Return the fields of a commit read by the activity and file indexes."""
+    return {field: commit[field] for field in INDEX_FIELDS if field in commit}
+
+
+def get_index_paths(json_file_name, data_path="./data/"):
+    """Return the paths of the activity and file indexes of a raw data file."""
+    return (
+        os.path.join(data_path, activity_index.get_activity_index_name(json_file_name)),
+        os.path.join(data_path, file_index.get_file_index_name(json_file_name)),
+    )
+
+
+def build_commit_indexes(commits, bucket="day"):
+    """Return a list of the activity index and the file index of the commits."""
+    return [
+        activity_index.build_activity_index(commits, bucket),
+        file_index.build_file_index(commits),
+    ]
+
+
+def add_to_commit_indexes(indexes, commits, bucket="day"):
+    """Return the activity and file indexes with the commits added to them."""
+    activity, files = indexes
+    return [
+        activity_index.merge_activity_indexes(
+            activity, activity_index.build_activity_index(commits, bucket)
+        ),
+        file_index.merge_file_indexes(files, file_index.build_file_index(commits)),
+    ]
+
+
+def index_streamed_commits(commits, indexes, bucket="day", batch_size=INDEX_BATCH_SIZE):
+    """Yield the commits while adding them to the indexes in batches.
+
+    The indexes list holds the activity and file indexes, which are replaced
+    every batch_size commits. Only the index fields of one batch are kept,
+    so the memory depends on the authors, buckets and files instead of on
+    the number of commits.
+    """
+    batch = []
+    for commit in commits:
+        batch.append(get_index_fields(commit))
+        if len(batch) == batch_size:
+            indexes[:] = add_to_commit_indexes(indexes, batch, bucket)
+            batch = []
+        yield commit
+    indexes[:] = add_to_commit_indexes(indexes, batch, bucket)
+
+
+def write_indexes(indexes, json_file_name, data_path="./data/"):
+    """Write the activity and file indexes of a raw data file."""
+    activity_path, files_path = get_index_paths(json_file_name, data_path)
+    activity_index.write_activity_index(indexes[0], activity_path)
+    file_index.write_file_index(indexes[1], files_path)
+
+
+def write_commit_indexes(commits, json_file_name, data_path="./data/", bucket="day"):
+    """Write the activity and file indexes of a list of commits."""
+    write_indexes(build_commit_indexes(commits, bucket), json_file_name, data_path)
+
+
+# pylint: disable=C0330
+def append_commit_indexes(
+    new_commits, json_file_name, data_path="./data/", bucket="day"
+):
+    """Merge the indexes of new commits into the stored indexes.
+
+    Return False without writing anything when the indexes are missing or
+    were built with another bucket.
+    """
+    activity_path, files_path = get_index_paths(json_file_name, data_path)
+    try:
+        stored_activity = activity_index.read_activity_index(activity_path)
+        stored_files = file_index.read_file_index(files_path)
+    except FileNotFoundError:
+        return False
+    if str(stored_activity["bucket"]) != bucket:
+        return False
+    write_indexes(
+        add_to_commit_indexes([stored_activity, stored_files], new_commits, bucket),
+        json_file_name,
+        data_path,
+    )
+    return True
 
 
 # This function simplifies gathering and writing raw data to json file
 # pylint: disable=C0330
 def collect_and_add_raw_data_to_json(
-    path_to_repo, json_file_name="raw_data_storage", data_path="./data/", overwrite=True
+    path_to_repo,
+    json_file_name="raw_data_storage",
+    data_path="./data/",
+    overwrite=True,
+    incremental=False,
+    branch=None,
+    workers=1,
+    profile="full",
+    checkpoint_every=None,
+    resume=False,
+    bucket="day",
 ):
     """Use collect_commits_hash to collect data from the repository path.
 
     Overwrite any data in the chosen file unless otherwise specified.
 
     Default file is raw_data_storage unless otherwise specified.
+
+    When incremental is True, only the commits made since the last run are
+    mined and appended to the data already stored in the chosen file.
+
+    When workers is greater than one, the commits are mined in parallel.
+
+    The profile selects which metrics are mined, see collect_commits_hash.
+
+    When checkpoint_every is given, the mined commits are saved to a
+    checkpoint every checkpoint_every commits. When resume is True, mining
+    continues after the commits saved by an interrupted run.
+
+    The activity index of the commits, with buckets of one day or one week,
+    and their file index are written next to the raw data, see
+    write_commit_indexes.
     """
     # collects data from collect_commits_hash and reformat dicitionary
-    raw_data = {"RAW_DATA": collect_commits_hash(path_to_repo)}
+    if incremental:
+        commit_list = collect_incremental_raw_data(
+            path_to_repo, json_file_name, data_path, branch, workers, profile
+        )
+    elif checkpoint_every or resume:
+        commit_list = collect_checkpointed_raw_data(
+            path_to_repo,
+            json_file_name,
+            data_path,
+            branch,
+            workers,
+            profile,
+            checkpoint_every or 1000,
+            resume,
+        )
+    else:
+        commit_list = collect_commits_hash(
+            path_to_repo, branch=branch, workers=workers, profile=profile, compact=True
+        )
+    # The commit records are only turned into dictionaries while being written
+    raw_data = {"RAW_DATA": commit_list}
     # Write raw data to .json file
     # Checks if overwriting the file was picked
     if overwrite:
@@ -210,6 +1033,85 @@ def collect_and_add_raw_data_to_json(
     else:
         # use json handler to update the old content
         json_handler.add_entry(raw_data, json_file_name, data_path)
+    write_commit_indexes(commit_list, json_file_name, data_path, bucket)
+    # Remember the last mined commit for the next incremental run
+    if commit_list:
+        set_mining_watermark(
+            path_to_repo, commit_list[-1]["hash"], branch, data_path=data_path
+        )
+    # The checkpoint is not needed once the commits were stored
+    if not incremental and (checkpoint_every or resume):
+        clear_mining_checkpoint(json_file_name, data_path)
+
+
+# pylint: disable=C0330
+def collect_and_stream_raw_data_to_jsonl(
+    path_to_repo,
+    jsonl_file_name="raw_data_storage",
+    data_path="./data/",
+    incremental=False,
+    branch=None,
+    workers=1,
+    profile="full",
+    bucket="day",
+):
+    """Write every commit to a .jsonl file as soon as it is mined.
+
+    The arguments are the same as collect_and_add_raw_data_to_json, but the
+    mined history is never held in memory. When incremental is True, the new
+    commits are appended to the file and added to the indexes.
+    """
+    new_commits = None
+    if incremental:
+        last_hash = get_mining_watermark(path_to_repo, branch, data_path=data_path)
+        try:
+            last_commit = json_handler.get_last_entry_from_jsonl_file(
+                jsonl_file_name, data_path
+            )
+        except FileNotFoundError:
+            last_commit = None
+        # Only trust the watermark if the stored data was mined up to it
+        if last_hash is not None and last_commit is not None:
+            if last_commit["hash"] == last_hash:
+                new_commits = collect_new_commits_hash(
+                    path_to_repo, last_hash, branch, workers, profile
+                )
+    if new_commits is not None:
+        last_commit = json_handler.write_entries_to_jsonl_file(
+            new_commits, jsonl_file_name, data_path, append=True
+        )
+        if not append_commit_indexes(new_commits, jsonl_file_name, data_path, bucket):
+            # Index the whole file again, the new commits were appended to it
+            indexes = build_commit_indexes([], bucket)
+            deque(
+                index_streamed_commits(
+                    json_handler.get_entries_from_jsonl_file(
+                        jsonl_file_name, data_path
+                    ),
+                    indexes,
+                    bucket,
+                ),
+                maxlen=0,
+            )
+            write_indexes(indexes, jsonl_file_name, data_path)
+    else:
+        # The commits are indexed in batches while they are streamed
+        indexes = build_commit_indexes([], bucket)
+        last_commit = json_handler.write_entries_to_jsonl_file(
+            index_streamed_commits(
+                iterate_commits_hash(path_to_repo, None, branch, workers, profile),
+                indexes,
+                bucket,
+            ),
+            jsonl_file_name,
+            data_path,
+        )
+        write_indexes(indexes, jsonl_file_name, data_path)
+    # Remember the last mined commit for the next incremental run
+    if last_commit is not None:
+        set_mining_watermark(
+            path_to_repo, last_commit["hash"], branch, data_path=data_path
+        )
 
 
 # pylint: disable=C0330
@@ -243,54 +1145,106 @@ def calculate_individual_metrics(
     json_file_name="raw_data_storage", data_path="./data/"
 ):
     """Retrieve the data from .json file and create a dictionary keyed by user."""
+    # columnar files are aggregated without creating the commit dictionaries
+    if json_file_name.endswith(columnar_storage.EXTENSION):
+        return calculate_metrics_from_columns(
+            columnar_storage.read_raw_data_columns(
+                os.path.join(data_path, json_file_name)
+            )
+        )
     # retreive data from raw data json
     current_data = json_handler.get_dict_from_json_file(json_file_name, data_path)
-    # creates a dictionary where the key is the authors username
-    data_dict = {}
     # Check if RAW_DATA is in json tp prevent a key error
     if "RAW_DATA" in current_data.keys():
-        for commit in current_data["RAW_DATA"]:
-            author = commit["author_name"]
-            email = commit["author_email"]
-            # NOTE check date compatibility with json
-            # check if the key already in in the dicitionary
-            if author in data_dict:
-                # condition passed, adds one to the number of commits
-                data_dict[author]["COMMITS"] += 1
-            else:
-                # condition fails, creates a new key and adds empty data
-                data_dict[author] = {
-                    "EMAIL": email,
-                    "COMMITS": 1,
-                    "ADDED": 0,
-                    "REMOVED": 0,
-                    "TOTAL": 0,
-                    "MODIFIED": 0,
-                    "RATIO": 0,
-                    "FILES": [],
-                    "FORMAT": [],
-                    "issues_commented": [],
-                    "issues_opened": [],
-                    "pull_requests_commented": [],
-                    "pull_requests_opened": [],
-                }
-
-            data_dict[author]["ADDED"] += commit["line_added"]
-            data_dict[author]["REMOVED"] += commit["line_removed"]
-            # check if the explored file is not in the list in index seven
-            current_files = commit["filename"]
-            # add the current_files to the user files list without duplicates
-            data_dict[author]["FILES"] = list(
-                set(data_dict[author]["FILES"]) | set(current_files)
-            )
-            # Sort list to ensure consistency when testing
-            data_dict[author]["FILES"] = sorted(data_dict[author]["FILES"])
-        return data_dict
+        return calculate_metrics_from_commits(current_data["RAW_DATA"])
     # if RAW_DATA key was not found, empty dictionary will be returned
     return {}
     # NOTE: for printing the data please use the file print_table.py
 
 
+def calculate_individual_metrics_from_jsonl(
+    jsonl_file_name="raw_data_storage", data_path="./data/"
+):
+    """Read the commits from a .jsonl file one at a time and create a dictionary.
+
+    Only the metrics are kept in memory, never the whole history.
+    """
+    try:
+        commits = json_handler.get_entries_from_jsonl_file(jsonl_file_name, data_path)
+        return calculate_metrics_from_commits(commits)
+    except FileNotFoundError:
+        # if the file was not found, empty dictionary will be returned
+        return {}
+
+
+def calculate_metrics_from_commits(commits):
+    """Create a dictionary keyed by user in a single pass over the commits.
+
+    The files of every author are accumulated in a set and only sorted once
+    all of the commits were read, so the time grows linearly with the commits.
+    """
+    # creates a dictionary where the key is the authors username
+    data_dict = {}
+    # files modified by every author without duplicates
+    author_files = {}
+    for commit in commits:
+        author = commit["author_name"]
+        email = commit["author_email"]
+        # NOTE check date compatibility with json
+        # check if the key already in in the dicitionary
+        if author in data_dict:
+            # condition passed, adds one to the number of commits
+            data_dict[author]["COMMITS"] += 1
+        else:
+            # condition fails, creates a new key and adds empty data
+            data_dict[author] = create_author_metrics(email, 1)
+            author_files[author] = set()
+
+        data_dict[author]["ADDED"] += commit["line_added"]
+        data_dict[author]["REMOVED"] += commit["line_removed"]
+        # add the current files to the user files without duplicates
+        author_files[author].update(commit["filename"])
+    for author, files in author_files.items():
+        # Sort list to ensure consistency when testing
+        data_dict[author]["FILES"] = sorted(files)
+    return data_dict
+
+
+def calculate_metrics_from_columns(columns):
+    """Create a dictionary keyed by user from the columns of a columnar file.
+
+    The commits are grouped by author with vectorized operations and give the
+    same dictionary as calculate_metrics_from_commits.
+    """
+    data_dict = {}
+    author_metrics = columnar_storage.aggregate_by_author(columns)
+    for author, email, commits, added, removed, files in author_metrics:
+        data_dict[author] = create_author_metrics(email, commits)
+        data_dict[author]["ADDED"] = added
+        data_dict[author]["REMOVED"] = removed
+        data_dict[author]["FILES"] = files
+    return data_dict
+
+
+def create_author_metrics(email, commits):
+    """Create the metrics dictionary of an author without any lines or files."""
+    return {
+        "EMAIL": email,
+        "COMMITS": commits,
+        "ADDED": 0,
+        "REMOVED": 0,
+        "TOTAL": 0,
+        "MODIFIED": 0,
+        "RATIO": 0,
+        "FILES": [],
+        "FORMAT": [],
+        "issues_commented": [],
+        "issues_opened": [],
+        "pull_requests_commented": [],
+        "pull_requests_opened": [],
+    }
+
+
 # This pylint supression is regarding a potentially dangerous empty argument
 # Note: not testable
 # pylint: disable=W0102
@@ -329,11 +1283,16 @@ def print_individual_in_table(
 
 
 # NOTE: not testable
+@contextmanager
 def find_repositories(repo):
-    """Locates a Github repository with the URL provided by the user."""
+    """Locates a Github repository with the URL provided by the user.
+
+    The miner reads the repository lazily, so it is only provided while the
+    mirror of a remote repository is held, for the whole mining run.
+    """
     # ask the user for a URL of a Github repository
-    miner = RepositoryMining(path_to_repo=repo)
-    return miner
+    with local_repository(repo) as repo_path:
+        yield RepositoryMining(path_to_repo=repo_path)
 
 
 def merge_metric_and_issue_dicts(metrics_dict, issues_dict):
@@ -419,9 +1378,21 @@ if __name__ == "__main__":
     ISSUE_DATA = {}
     ISSUE_DATA = retrieve_issue_data(current_repo, "all", ISSUE_DATA)
     DATA = merge_metric_and_issue_dicts(DATA, ISSUE_DATA)
+    # identity_resolution imports this module, so it is only imported when run
+    import identity_resolution  # pylint: disable=import-outside-toplevel
+
+    # Merge the usernames with a name, an email or a .mailmap line in common
+    RAW_DATA = json_handler.get_dict_from_json_file("raw_data_storage")["RAW_DATA"]
+    DATA = identity_resolution.merge_identities(
+        DATA,
+        identity_resolution.resolve_identities(
+            DATA, RAW_DATA, identity_resolution.read_mailmap_file(".mailmap")
+        ),
+    )
     # Prints table from dictionary, only the commits column
     print_individual_in_table(data_dict=DATA, headings=["COMMITS"])
-    choice = True
+    # The remaining duplicates can be reviewed and merged by hand
+    choice = input("would you like to merge usernames by hand? y/n: ") == "y"
     while choice:
         remove = input("enter username to be merged then deleted: ")
         keep = input("enter username to be merged into: ")
@@ -432,6 +1403,10 @@ if __name__ == "__main__":
         pick = input("would you like to continue? y/n: ")
         if pick == "n":
             choice = False
+    # data_processor imports this module, so it is only imported when run
+    import data_processor  # pylint: disable=import-outside-toplevel
+
+    DATA = data_processor.process_data(DATA)
     print("Writing data to json file...")
     # Write reformatted dictionary to json, optional parameters not supported
     json_handler.write_dict_to_json_file(DATA, "individual_metrics_storage")
@@ -1,6 +1,151 @@
-"""Process data retrieved by data_miner.py."""
-# import data_collection
+"""Process data retrieved by data_miner.py.
 
+The statistics of all of the contributors are calculated at once with NumPy
+arrays instead of one contributor at a time.
+"""
+import numpy as np
+import data_collection
+import format_index
 
-def process_data():
-    """Process the calculated data."""
+# Percentiles of the lines per commit of every contributor, with the median
+PERCENTILES = [25, 75, 90]
+
+# Fields of the commits read by process_data, the lines of every file are
+# only recorded by the newer miners
+COMMIT_FIELDS = [
+    "author_name",
+    "line_added",
+    "line_removed",
+    "filename",
+    "file_line_added",
+    "file_line_removed",
+]
+
+
+def process_data(data_dict, commits=None):
+    """Fill the TOTAL, MODIFIED, RATIO and FORMAT fields of every contributor.
+
+    TOTAL is the lines added minus the lines removed, MODIFIED is the lines
+    added plus the lines removed and RATIO is the average lines modified per
+    commit, like get_commit_average. FORMAT lists the formats of the FILES.
+
+    When the commits are given, the average, median and percentiles of the
+    lines modified per commit of every contributor are added as well, with
+    the FORMAT_INDEX of format_index. Only the COMMIT_FIELDS of the commits
+    are read.
+
+    The dictionary is updated and returned.
+    """
+    authors = list(data_dict)
+    if not authors:
+        return data_dict
+    added = np.array([data_dict[author]["ADDED"] for author in authors], dtype=np.int64)
+    removed = np.array(
+        [data_dict[author]["REMOVED"] for author in authors], dtype=np.int64
+    )
+    commit_counts = np.array(
+        [data_dict[author]["COMMITS"] for author in authors], dtype=np.int64
+    )
+    total = added - removed
+    modified = added + removed
+    # Contributors without commits keep a ratio of 0
+    ratio = np.zeros(len(authors), dtype=np.int64)
+    np.floor_divide(modified, commit_counts, out=ratio, where=commit_counts != 0)
+    formats = calculate_file_formats([data_dict[author]["FILES"] for author in authors])
+    for index, author in enumerate(authors):
+        data_dict[author]["TOTAL"] = int(total[index])
+        data_dict[author]["MODIFIED"] = int(modified[index])
+        data_dict[author]["RATIO"] = int(ratio[index])
+        data_dict[author]["FORMAT"] = formats[index]
+
+    if commits is not None:
+        format_indexes = format_index.index_file_formats(commits, authors)
+        for author in authors:
+            data_dict[author]["FORMAT_INDEX"] = format_indexes.get(author, {})
+        author_codes, lines = get_commit_lines(commits, authors)
+        averages, percentiles = calculate_lines_per_commit(
+            author_codes, lines, len(authors), [50] + PERCENTILES
+        )
+        for index, author in enumerate(authors):
+            statistics = {
+                "AVERAGE": round(float(averages[index]), 2),
+                "MEDIAN": round(float(percentiles[index, 0]), 2),
+            }
+            for column, percentile in enumerate(PERCENTILES, start=1):
+                statistics["P{}".format(percentile)] = round(
+                    float(percentiles[index, column]), 2
+                )
+            data_dict[author]["LINES_PER_COMMIT"] = statistics
+    return data_dict
+
+
+def calculate_file_formats(files_by_author):
+    """Return the sorted unique formats of the files of every author.
+
+    Every unique file name is parsed once, then the formats of all of the
+    authors are deduplicated at once.
+    """
+    lengths = [len(files) for files in files_by_author]
+    all_files = [file for files in files_by_author for file in files]
+    if not all_files:
+        return [[] for _ in files_by_author]
+    file_names, file_codes = np.unique(
+        np.array(all_files, dtype=str), return_inverse=True
+    )
+    formats = [data_collection.parse_for_type(name) for name in file_names.tolist()]
+    format_names, format_codes = np.unique(
+        np.array(formats, dtype=str), return_inverse=True
+    )
+    # Unique (author, format) pairs, sorted by author then by format
+    format_count = len(format_names)
+    file_authors = np.repeat(np.arange(len(lengths)), lengths)
+    pairs = np.unique(file_authors * format_count + format_codes[file_codes])
+    pair_formats = format_names[pairs % format_count]
+    boundaries = np.searchsorted(pairs // format_count, np.arange(len(lengths) + 1))
+    return [
+        pair_formats[boundaries[index] : boundaries[index + 1]].tolist()
+        for index in range(len(lengths))
+    ]
+
+
+def get_commit_lines(commits, authors):
+    """Return the author codes and the lines modified of the commits.
+
+    The code of an author is its index in authors, the commits of the other
+    authors are skipped.
+    """
+    codes = {author: index for index, author in enumerate(authors)}
+    author_codes = []
+    lines = []
+    for commit in commits:
+        if commit["author_name"] in codes:
+            author_codes.append(codes[commit["author_name"]])
+            lines.append(commit["line_added"] + commit["line_removed"])
+    return np.array(author_codes, dtype=np.int64), np.array(lines, dtype=np.int64)
+
+
+def calculate_lines_per_commit(author_codes, lines, author_count, percentiles):
+    """Calculate the average and percentiles of the lines per commit of every author.
+
+    Return the averages and an array with a row for every author and a
+    column for every percentile, interpolated linearly like np.percentile.
+    Authors without commits get 0.
+    """
+    counts = np.bincount(author_codes, minlength=author_count)
+    sums = np.bincount(author_codes, weights=lines, minlength=author_count)
+    averages = np.divide(sums, counts, out=np.zeros(author_count), where=counts > 0)
+    if len(lines) == 0:
+        return averages, np.zeros((author_count, len(percentiles)))
+    # The lines of every author are sorted and stored one author after another
+    sorted_lines = lines[np.lexsort((lines, author_codes))].astype(float)
+    starts = np.cumsum(counts) - counts
+    positions = starts[:, np.newaxis] + np.outer(
+        np.maximum(counts - 1, 0), np.array(percentiles) / 100
+    )
+    lower = np.minimum(np.floor(positions).astype(np.int64), len(lines) - 1)
+    upper = np.minimum(np.ceil(positions).astype(np.int64), len(lines) - 1)
+    values = sorted_lines[lower] + (sorted_lines[upper] - sorted_lines[lower]) * (
+        positions - lower
+    )
+    values[counts == 0] = 0
+    return averages, values
@@ -0,0 +1,192 @@
+"""Index the lines and commits of every contributor in every file.
+
+The paths and the authors are interned: they are stored once, sorted, and
+every row of the index refers to them by their position. A row holds the
+number of commits and the lines added and removed by one author in one path,
+and the rows are sorted by path, then by author. Ownership, bus factor and
+hotspot questions are answered from these arrays instead of from the raw
+commits. The index is stored as a .npz file next to the raw data.
+"""
+import os
+import numpy as np
+import json_handler
+
+EXTENSION = ".npz"
+
+COUNT_FIELDS = ["commits", "added", "removed"]
+
+
+def get_file_index_name(json_file_name):
+    """Create the name of the file index of a raw data file."""
+    # The raw data can be stored in a .npz or .sqlite file as well
+    if json_file_name.endswith((".npz", ".sqlite")):
+        json_file_name = os.path.splitext(json_file_name)[0]
+    return json_file_name + "_files" + EXTENSION
+
+
+def aggregate_files(paths, author_names, commits, added, removed):
+    """Create an index by adding up the rows of the same path and author."""
+    index = {}
+    codes = []
+    for name, values in [("paths", paths), ("authors", author_names)]:
+        index[name], value_codes = np.unique(
+            np.array(values, dtype=str), return_inverse=True
+        )
+        codes.append(value_codes.reshape(-1).astype(np.int64))
+    path_codes, author_codes = codes
+    order = np.lexsort((author_codes, path_codes))
+    path_codes = path_codes[order]
+    author_codes = author_codes[order]
+    # A row starts wherever the path or the author changes
+    starts = np.flatnonzero(
+        np.concatenate(
+            (
+                [len(order) > 0],
+                (path_codes[1:] != path_codes[:-1])
+                | (author_codes[1:] != author_codes[:-1]),
+            )
+        )
+    )
+    index["path_codes"] = path_codes[starts]
+    index["author_codes"] = author_codes[starts]
+    for field, values in zip(COUNT_FIELDS, [commits, added, removed]):
+        values = np.asarray(values, dtype=np.int64)[order]
+        index[field] = np.add.reduceat(values, starts) if len(starts) else values[:0]
+    return index
+
+
+def build_file_index(commits):
+    """Create the file index of the commits in a single pass.
+
+    Deleted files have no path and are skipped, like the commits mined
+    before the lines of every file were recorded.
+    """
+    paths = []
+    author_names = []
+    added = []
+    removed = []
+    for commit in commits:
+        if "file_line_added" not in commit:
+            continue
+        for path, path_added, path_removed in zip(
+            commit["filepath"], commit["file_line_added"], commit["file_line_removed"]
+        ):
+            if path is None:
+                continue
+            paths.append(path)
+            author_names.append(commit["author_name"])
+            added.append(path_added)
+            removed.append(path_removed)
+    return aggregate_files(
+        paths, author_names, np.ones(len(paths), dtype=np.int64), added, removed
+    )
+
+
+def merge_file_indexes(first_index, second_index):
+    """Combine two indexes, like the index of the commits of both."""
+    indexes = [first_index, second_index]
+    paths = np.concatenate([index["paths"][index["path_codes"]] for index in indexes])
+    author_names = np.concatenate(
+        [index["authors"][index["author_codes"]] for index in indexes]
+    )
+    counts = [
+        np.concatenate([index[field] for index in indexes]) for field in COUNT_FIELDS
+    ]
+    return aggregate_files(paths, author_names, *counts)
+
+
+def write_file_index(index, file_path):
+    """Write a file index to a .npz file, replacing it atomically."""
+    with json_handler.atomic_write(file_path) as index_file:
+        np.savez(index_file, **index)
+
+
+def read_file_index(file_path):
+    """Read a file index from a .npz file."""
+    with np.load(file_path, allow_pickle=False) as index_file:
+        return {name: index_file[name] for name in index_file.files}
+
+
+def get_file_owners(index, path):
+    """Return the contributors of a path, the largest owner first.
+
+    Every contributor gets its commits, lines added and removed, and its
+    SHARE of the lines modified in the path.
+    """
+    path_code = np.searchsorted(index["paths"], path)
+    if path_code == len(index["paths"]) or index["paths"][path_code] != path:
+        return []
+    # The rows of a path are contiguous
+    start, end = np.searchsorted(index["path_codes"], [path_code, path_code + 1])
+    modified = index["added"][start:end] + index["removed"][start:end]
+    total = modified.sum()
+    owners = [
+        {
+            "AUTHOR": str(index["authors"][index["author_codes"][row]]),
+            "COMMITS": int(index["commits"][row]),
+            "ADDED": int(index["added"][row]),
+            "REMOVED": int(index["removed"][row]),
+            "SHARE": round(float(modified[row - start] / total), 2) if total else 0.0,
+        }
+        for row in range(start, end)
+    ]
+    return sorted(owners, key=lambda owner: -owner["ADDED"] - owner["REMOVED"])
+
+
+def get_main_owners(index):
+    """Return the author code of the contributor with most lines of every path.
+
+    Ties go to the author that comes first alphabetically.
+    """
+    modified = index["added"] + index["removed"]
+    # Sort the rows of every path by lines, the last row is the main owner
+    order = np.lexsort((-index["author_codes"], modified, index["path_codes"]))
+    last_rows = np.flatnonzero(
+        np.append(np.diff(index["path_codes"][order]) != 0, len(order) > 0)
+    )
+    return index["author_codes"][order[last_rows]]
+
+
+def calculate_bus_factor(index, threshold=0.5):
+    """Return the fewest contributors that are the main owners of most paths.
+
+    This is the number of contributors whose departure leaves more than the
+    threshold of the paths without their main owner.
+    """
+    main_owners = get_main_owners(index)
+    if len(main_owners) == 0:
+        return 0
+    owned_paths = np.sort(np.bincount(main_owners))[::-1]
+    covered = np.cumsum(owned_paths)
+    return int(np.searchsorted(covered, threshold * len(main_owners), "right")) + 1
+
+
+def get_hotspots(index, count=10):
+    """Return the paths with the most lines modified, the most modified first.
+
+    Every path gets the number of commits, the lines modified, the number of
+    contributors and its main owner.
+    """
+    path_count = len(index["paths"])
+    churn = np.bincount(
+        index["path_codes"],
+        weights=index["added"] + index["removed"],
+        minlength=path_count,
+    ).astype(np.int64)
+    commits = np.bincount(
+        index["path_codes"], weights=index["commits"], minlength=path_count
+    ).astype(np.int64)
+    authors = np.bincount(index["path_codes"], minlength=path_count)
+    main_owners = get_main_owners(index)
+    # Most modified first, then by path
+    hotspots = np.lexsort((np.arange(path_count), -churn))[:count]
+    return [
+        {
+            "PATH": str(index["paths"][path_code]),
+            "COMMITS": int(commits[path_code]),
+            "MODIFIED": int(churn[path_code]),
+            "AUTHORS": int(authors[path_code]),
+            "OWNER": str(index["authors"][main_owners[path_code]]),
+        }
+        for path_code in hotspots
+    ]
@@ -0,0 +1,65 @@
+"""Index the file formats of every contributor in one pass over the commits.
+
+For every format of a contributor, the index counts the unique files of that
+format and the lines modified in them, from the lines of every file of the
+commits. The commits mined before the lines of every file were recorded
+only add their files, not their lines.
+"""
+import data_collection
+
+
+def index_file_formats(commits, authors=None):
+    """Create the format index of every author of the commits.
+
+    The index of an author maps its formats, sorted, to a dictionary with the
+    number of FILES and the LINES modified. When authors are given, the
+    commits of the other authors are skipped.
+    """
+    if authors is not None:
+        authors = set(authors)
+    # format -> set of file names and format -> lines, for every author
+    author_files = {}
+    author_lines = {}
+    for commit in commits:
+        author = commit["author_name"]
+        if authors is not None and author not in authors:
+            continue
+        if author not in author_files:
+            author_files[author] = {}
+            author_lines[author] = {}
+        files = author_files[author]
+        lines = author_lines[author]
+        # Without the lines of every file, the lines of the commit are unknown
+        file_lines = zip(
+            commit.get("file_line_added") or [0] * len(commit["filename"]),
+            commit.get("file_line_removed") or [0] * len(commit["filename"]),
+        )
+        for file, (added, removed) in zip(commit["filename"], file_lines):
+            file_format = data_collection.parse_for_type(file)
+            if file_format not in files:
+                files[file_format] = set()
+                lines[file_format] = 0
+            files[file_format].add(file)
+            lines[file_format] += added + removed
+    return {
+        author: {
+            file_format: {
+                "FILES": len(files[file_format]),
+                "LINES": author_lines[author][file_format],
+            }
+            for file_format in sorted(files)
+        }
+        for author, files in author_files.items()
+    }
+
+
+def combine_format_indexes(indexes):
+    """Add up the format indexes of the same author in different repositories."""
+    combined = {}
+    for index in indexes:
+        for file_format, counts in index.items():
+            if file_format not in combined:
+                combined[file_format] = {"FILES": 0, "LINES": 0}
+            combined[file_format]["FILES"] += counts["FILES"]
+            combined[file_format]["LINES"] += counts["LINES"]
+    return {file_format: combined[file_format] for file_format in sorted(combined)}
@@ -0,0 +1,217 @@
+"""Retrieve issue and pull request data with the GitHub GraphQL API.
+
+The issues, pull requests, their authors and the authors of their comments
+are fetched in large batched queries with cursor pagination instead of one
+REST request per page of issues and per issue.
+"""
+import time
+import requests
+import data_collection
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Seconds to wait for the connection and for every read of a response
+REQUEST_TIMEOUT = 60
+
+# Both issues and pull requests are listed by this query, the connection and
+# the type of its states are filled in before sending it
+CONNECTION_QUERY = """
+query($owner: String!, $name: String!, $states: [%(state_type)s!],
+      $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    %(connection)s(first: $first, after: $after, states: $states,
+                   orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        id
+        number
+        author { login __typename }
+        comments(first: $first) {
+          pageInfo { hasNextPage endCursor }
+          nodes { author { login __typename } }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Used for the issues and pull requests with more comments than fit in a page
+COMMENTS_QUERY = """
+query($id: ID!, $first: Int!, $after: String) {
+  node(id: $id) {
+    ... on Issue {
+      comments(first: $first, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes { author { login __typename } }
+      }
+    }
+    ... on PullRequest {
+      comments(first: $first, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes { author { login __typename } }
+      }
+    }
+  }
+}
+"""
+
+# States of the REST API mapped to the states of issues and pull requests
+ISSUE_STATES = {"open": ["OPEN"], "closed": ["CLOSED"], "all": None}
+PULL_REQUEST_STATES = {"open": ["OPEN"], "closed": ["CLOSED", "MERGED"], "all": None}
+
+
+def run_graphql_query(user_token, query, variables, url=GRAPHQL_URL):
+    """Send a GraphQL query and return its data.
+
+    When the rate limit headers show that no request remains, wait for the
+    rate limit to reset before returning. A query that times out raises a
+    RuntimeError, like a query with errors.
+    """
+    try:
+        response = requests.post(
+            url,
+            json={"query": query, "variables": variables},
+            headers={"Authorization": "bearer " + str(user_token)},
+            timeout=REQUEST_TIMEOUT,
+        )
+    except requests.Timeout as error:
+        raise RuntimeError("GraphQL query timed out: {}".format(error)) from error
+    response.raise_for_status()
+    result = response.json()
+    # GraphQL reports errors in the body of successful responses
+    if result.get("errors"):
+        raise RuntimeError(
+            "; ".join(error.get("message", "") for error in result["errors"])
+        )
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        reset_time = int(response.headers.get("X-RateLimit-Reset", "0"))
+        # Wait one more second to make sure the limit was reset
+        time.sleep(max(reset_time - time.time(), 0) + 1)
+    return result["data"]
+
+
+def get_login(actor):
+    """Return the login of an author, deleted accounts are shown as ghost.
+
+    The REST API shows the logins of bots with a [bot] suffix, which the
+    GraphQL API leaves out, so it is added to get the same contributors.
+    """
+    if actor is None:
+        return "ghost"
+    if actor.get("__typename") == "Bot":
+        return actor["login"] + "[bot]"
+    return actor["login"]
+
+
+def get_all_comment_logins(user_token, node, page_size=100, url=GRAPHQL_URL):
+    """Return the logins of the authors of all of the comments of a node.
+
+    The first page of comments comes with the node, the next pages are
+    fetched only when there are more comments than fit in a page.
+    """
+    comments = node["comments"]
+    comment_logins = [get_login(comment["author"]) for comment in comments["nodes"]]
+    while comments["pageInfo"]["hasNextPage"]:
+        data = run_graphql_query(
+            user_token,
+            COMMENTS_QUERY,
+            {
+                "id": node["id"],
+                "first": page_size,
+                "after": comments["pageInfo"]["endCursor"],
+            },
+            url,
+        )
+        comments = data["node"]["comments"]
+        comment_logins += [
+            get_login(comment["author"]) for comment in comments["nodes"]
+        ]
+    return comment_logins
+
+
+# pylint: disable=C0330
+def iterate_graphql_issues(
+    user_token,
+    repository_name,
+    connection,
+    states=None,
+    page_size=100,
+    url=GRAPHQL_URL,
+):
+    """Yield the number, author login and comment logins of issues or pull requests.
+
+    The connection is either "issues" or "pullRequests".
+    """
+    owner, name = repository_name.split("/")
+    state_type = "IssueState" if connection == "issues" else "PullRequestState"
+    query = CONNECTION_QUERY % {"connection": connection, "state_type": state_type}
+    cursor = None
+    has_next_page = True
+    while has_next_page:
+        data = run_graphql_query(
+            user_token,
+            query,
+            {
+                "owner": owner,
+                "name": name,
+                "states": states,
+                "first": page_size,
+                "after": cursor,
+            },
+            url,
+        )
+        page = data["repository"][connection]
+        for node in page["nodes"]:
+            yield (
+                node["number"],
+                get_login(node["author"]),
+                get_all_comment_logins(user_token, node, page_size, url),
+            )
+        has_next_page = page["pageInfo"]["hasNextPage"]
+        cursor = page["pageInfo"]["endCursor"]
+
+
+# pylint: disable=C0330
+def retrieve_issue_data_graphql(
+    user_token,
+    repository_name,
+    state,
+    contributor_data,
+    page_size=100,
+    url=GRAPHQL_URL,
+):
+    """Fill the contributor data like retrieve_issue_data with the GraphQL API.
+
+    The repository name is in this format: org/repo_name. The issues and
+    pull requests are added from the most recent one like in the REST API.
+    """
+    issues = [
+        (number, author_login, False, comment_logins)
+        for number, author_login, comment_logins in iterate_graphql_issues(
+            user_token,
+            repository_name,
+            "issues",
+            ISSUE_STATES[state],
+            page_size,
+            url,
+        )
+    ]
+    issues += [
+        (number, author_login, True, comment_logins)
+        for number, author_login, comment_logins in iterate_graphql_issues(
+            user_token,
+            repository_name,
+            "pullRequests",
+            PULL_REQUEST_STATES[state],
+            page_size,
+            url,
+        )
+    ]
+    # Issues and pull requests share their numbers, which grow with time
+    issues.sort(key=lambda issue: issue[0], reverse=True)
+    for number, author_login, is_pull_request, comment_logins in issues:
+        data_collection.add_issue_to_contributor_data(
+            contributor_data, number, author_login, is_pull_request, comment_logins
+        )
+    return contributor_data
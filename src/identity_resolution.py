@@ -0,0 +1,273 @@
+"""Find the usernames of the same contributor and merge their metrics.
+
+The metrics are keyed by the author name of the commits and by the GitHub
+login of the issues, so the same contributor often has several entries.
+Every username is linked to its normalized name and to the normalized
+emails it committed with, and the lines of a .mailmap file link the names
+and emails they list. The usernames linked to each other are grouped with
+union-find and the entries of every group are merged in a single pass.
+"""
+
+import re
+import unicodedata
+from git import GitCommandError, Repo
+import data_collection
+import data_processor
+
+# Emails that are shared by unrelated contributors and never link them
+IGNORED_EMAILS = {"", "n/a", "none", "noreply@github.com", "none@none"}
+
+# Emails GitHub uses for the commits made with the web interface
+NOREPLY_DOMAIN = "@users.noreply.github.com"
+
+# Metrics that are added up and lists that are joined when merging, the FILES
+# are joined without duplicates
+SUMMED_CATEGORIES = ["COMMITS", "ADDED", "REMOVED", "SURVIVING"]
+JOINED_CATEGORIES = [
+    "issues_commented",
+    "issues_opened",
+    "pull_requests_opened",
+    "pull_requests_commented",
+]
+
+
+def normalize_name(name):
+    """Return a name or login without case, accents, spaces and punctuation.
+
+    For example "Noor Buchi" and "noorbuchi" are the same. None is returned
+    when nothing is left.
+    """
+    if name is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", name)
+    normalized = "".join(
+        character
+        for character in decomposed.casefold()
+        if character.isalnum() and not unicodedata.combining(character)
+    )
+    return normalized or None
+
+
+def normalize_email(email):
+    """Return an email without case and surrounding spaces, or None if ignored."""
+    if email is None:
+        return None
+    email = email.strip().casefold()
+    if email in IGNORED_EMAILS or "@" not in email:
+        return None
+    return email
+
+
+def get_noreply_login(email):
+    """Return the GitHub login of a GitHub noreply email, or None.
+
+    These emails look like 12345+login@users.noreply.github.com.
+    """
+    if email is None or not email.endswith(NOREPLY_DOMAIN):
+        return None
+    return email[: -len(NOREPLY_DOMAIN)].split("+")[-1]
+
+
+def parse_mailmap(text):
+    """Return the names, emails and proper name of every line of a .mailmap.
+
+    The proper name is the name at the start of the line, or None when the
+    line starts with an email.
+    """
+    entries = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        pairs = re.findall(r"([^<]*)<([^>]*)>", line)
+        if not pairs:
+            continue
+        names = [name.strip() for name, _ in pairs if name.strip()]
+        emails = [email for _, email in pairs]
+        proper_name = pairs[0][0].strip() or None
+        entries.append((names, emails, proper_name))
+    return entries
+
+
+def read_mailmap_file(file_path=".mailmap"):
+    """Return the lines of a .mailmap file, or an empty list when it is missing."""
+    try:
+        with open(file_path, encoding="utf-8") as mailmap_file:
+            return parse_mailmap(mailmap_file.read())
+    except FileNotFoundError:
+        return []
+
+
+def read_repository_mailmap(repo, branch=None):
+    """Return the lines of the .mailmap of a repository, or an empty list."""
+    revision = branch if branch is not None else "HEAD"
+    with data_collection.local_repository(repo) as repo_path:
+        try:
+            text = Repo(repo_path).git.show(revision + ":.mailmap")
+        except GitCommandError:
+            return []
+    return parse_mailmap(text)
+
+
+def find_root(parents, item):
+    """Return the root of the group of an item, compressing the path to it."""
+    root = item
+    while parents.setdefault(root, root) != root:
+        root = parents[root]
+    while parents[item] != root:
+        parents[item], item = root, parents[item]
+    return root
+
+
+def union(parents, first_item, second_item):
+    """Join the groups of two items."""
+    first_root = find_root(parents, first_item)
+    second_root = find_root(parents, second_item)
+    if first_root != second_root:
+        parents[second_root] = first_root
+
+
+def get_identity_keys(username, emails, match_names=True):
+    """Return the keys of the name and of the emails of a username."""
+    keys = []
+    name = normalize_name(username)
+    if name is not None and match_names:
+        keys.append("name:" + name)
+    for email in emails:
+        email = normalize_email(email)
+        if email is None:
+            continue
+        keys.append("email:" + email)
+        login = normalize_name(get_noreply_login(email))
+        if login is not None:
+            keys.append("name:" + login)
+    return keys
+
+
+def collect_emails(data_dict, commits=None):
+    """Return the emails of every username of the metrics.
+
+    The metrics only keep the email of the first commit of an author, the
+    commits give all of them.
+    """
+    emails = {
+        username: {metrics.get("EMAIL")} if isinstance(metrics, dict) else set()
+        for username, metrics in data_dict.items()
+    }
+    for commit in commits or []:
+        if commit["author_name"] in emails:
+            emails[commit["author_name"]].add(commit["author_email"])
+    return emails
+
+
+def resolve_identities(data_dict, commits=None, mailmap=None, match_names=True):
+    """Group the usernames of the metrics that belong to the same contributor.
+
+    Usernames with the same normalized name or with a normalized email in
+    common are grouped, as are the names and emails of a line of the
+    mailmap. Different people with the same name are grouped as well, unless
+    match_names is False.
+
+    Return a dictionary with the name of every group and the list of its
+    usernames, in the order of the metrics. The name is the proper name of
+    the mailmap, or the username with the most commits, and the groups with
+    the same name are joined.
+    """
+    parents = {}
+    proper_names = {}
+    for names, emails, proper_name in mailmap or []:
+        keys = [key for name in names for key in get_identity_keys(name, [])]
+        keys += get_identity_keys(None, emails)
+        for key in keys:
+            union(parents, keys[0], key)
+            if proper_name is not None:
+                proper_names.setdefault(key, proper_name)
+    emails = collect_emails(data_dict, commits)
+    groups = {}
+    for username in data_dict:
+        keys = get_identity_keys(username, emails[username], match_names)
+        # Usernames without a name or email are only grouped with themselves
+        keys.append("username:" + username)
+        for key in keys:
+            union(parents, keys[0], key)
+    for username in data_dict:
+        root = find_root(parents, "username:" + username)
+        groups.setdefault(root, []).append(username)
+    # Find the proper name of every group from the keys of the mailmap
+    group_names = {}
+    for key, proper_name in proper_names.items():
+        group_names.setdefault(find_root(parents, key), proper_name)
+    clusters = {}
+    for root, usernames in groups.items():
+        name = group_names.get(root)
+        if name is None:
+            name = max(usernames, key=lambda username: get_commits(data_dict, username))
+        # Groups with the same name, like a proper name of the mailmap that is
+        # also the username of another group, are merged as well
+        clusters.setdefault(name, []).extend(usernames)
+    return clusters
+
+
+def get_commits(data_dict, username):
+    """Return the number of commits of a username, 0 when it has no metrics."""
+    metrics = data_dict[username]
+    if isinstance(metrics, dict):
+        return metrics.get("COMMITS", 0)
+    return 0
+
+
+def merge_identities(data_dict, clusters):
+    """Merge the entries of every group of usernames into one entry.
+
+    The entry of the username with the most commits is kept and the metrics
+    of the other usernames are added to it, which are listed in ALIASES. The
+    TOTAL, MODIFIED, RATIO and FORMAT are not updated, see
+    data_processor.process_data.
+    """
+    merged_dict = {}
+    for name, usernames in clusters.items():
+        if len(usernames) == 1 and name == usernames[0]:
+            merged_dict[name] = data_dict[name]
+            continue
+        kept_username = max(
+            usernames, key=lambda username: get_commits(data_dict, username)
+        )
+        merged = dict(data_dict[kept_username])
+        files = set(merged.get("FILES", []))
+        for username in usernames:
+            if username == kept_username:
+                continue
+            metrics = data_dict[username]
+            for category in SUMMED_CATEGORIES:
+                if category in metrics:
+                    merged[category] = merged.get(category, 0) + metrics[category]
+            for category in JOINED_CATEGORIES:
+                if category in metrics:
+                    merged[category] = merged.get(category, []) + metrics[category]
+            files.update(metrics.get("FILES", []))
+        if "FILES" in merged or files:
+            # sort the files for testing consistency
+            merged["FILES"] = sorted(files)
+        merged["ALIASES"] = [username for username in usernames if username != name]
+        merged_dict[name] = merged
+    return merged_dict
+
+
+def rename_commit_authors(commits, clusters):
+    """Return the commits with the name of the group of their author.
+
+    Only the fields read by data_processor.process_data are kept.
+    """
+    group_names = {
+        username: name for name, usernames in clusters.items() for username in usernames
+    }
+    renamed_commits = []
+    for commit in commits:
+        renamed_commit = {
+            field: commit[field]
+            for field in data_processor.COMMIT_FIELDS
+            if field in commit
+        }
+        renamed_commit["author_name"] = group_names.get(
+            commit["author_name"], commit["author_name"]
+        )
+        renamed_commits.append(renamed_commit)
+    return renamed_commits
@@ -1,6 +1,185 @@
 """Access and store JSON data."""
 import json
+import mmap
 import os
+import stat
+import tempfile
+from contextlib import contextmanager
+import columnar_storage
+import sqlite_storage
+
+# Faster JSON libraries are used when they are installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Files of at least this size in bytes are memory-mapped instead of read
+MMAP_THRESHOLD = 1024 * 1024
+
+# Permissions of the new files, mkstemp only gives them to their owner
+NEW_FILE_MODE = 0o644
+
+
+def encode_object(value):
+    """Return the JSON shape of the objects the JSON libraries do not know.
+
+    Objects with a to_dict method, like the commit records, are written as
+    their dictionary.
+    """
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value)))
+
+
+def encode_json_stdlib(data, pretty=False):
+    """Encode data to compact or indented JSON bytes with the json module."""
+    if pretty:
+        return json.dumps(data, indent=4, default=encode_object).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), default=encode_object).encode(
+        "utf-8"
+    )
+
+
+def decode_json_stdlib(content):
+    """Decode JSON bytes, text or a memory-mapped buffer with the json module."""
+    if isinstance(content, memoryview):
+        # The json module can not read buffers, only bytes and text
+        content = content.tobytes()
+    return json.loads(content)
+
+
+def encode_json_orjson(data, pretty=False):
+    """Encode data to JSON bytes with orjson."""
+    # orjson can only indent by two spaces, keep the usual indent of four
+    if pretty:
+        return encode_json_stdlib(data, pretty)
+    try:
+        return orjson.dumps(data, default=encode_object, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        # For example integers larger than 64 bits
+        return encode_json_stdlib(data)
+
+
+def decode_json_orjson(content):
+    """Decode JSON bytes with orjson."""
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # For example NaN, which the json module writes but orjson rejects
+        return decode_json_stdlib(content)
+
+
+def encode_json_ujson(data, pretty=False):
+    """Encode data to JSON bytes with ujson."""
+    if pretty:
+        return encode_json_stdlib(data, pretty)
+    try:
+        return ujson.dumps(
+            data,
+            ensure_ascii=False,
+            escape_forward_slashes=False,
+            default=encode_object,
+        ).encode("utf-8")
+    except (OverflowError, TypeError):
+        return encode_json_stdlib(data)
+
+
+def decode_json_ujson(content):
+    """Decode JSON bytes with ujson."""
+    if isinstance(content, memoryview):
+        content = content.tobytes()
+    try:
+        return ujson.loads(content)
+    except ValueError:
+        return decode_json_stdlib(content)
+
+
+# Decoding and encoding functions of every installed JSON library
+JSON_CODECS = {"json": (decode_json_stdlib, encode_json_stdlib)}
+if ujson is not None:
+    JSON_CODECS["ujson"] = (decode_json_ujson, encode_json_ujson)
+if orjson is not None:
+    JSON_CODECS["orjson"] = (decode_json_orjson, encode_json_orjson)
+
+# The fastest installed library is used unless another one is selected
+JSON_CODEC = {"codec": JSON_CODECS[list(JSON_CODECS)[-1]]}
+
+
+def set_json_codec(name):
+    """Select the JSON library used to read and write the json files.
+
+    Raise ValueError when the library is not installed.
+    """
+    if name not in JSON_CODECS:
+        raise ValueError(
+            "JSON codec {} is not installed, use one of {}".format(
+                name, ", ".join(JSON_CODECS)
+            )
+        )
+    JSON_CODEC["codec"] = JSON_CODECS[name]
+
+
+def decode_json(content):
+    """Decode JSON bytes or text with the selected JSON library."""
+    return JSON_CODEC["codec"][0](content)
+
+
+def encode_json(data, pretty=False):
+    """Encode data to JSON bytes with the selected JSON library.
+
+    The output is compact unless pretty is True, then it is indented.
+    """
+    return JSON_CODEC["codec"][1](data, pretty)
+
+
+def read_json_file(file_path):
+    """Decode a json file, memory-mapping it when it is large.
+
+    A memory-mapped file is decoded from the pages of the file without being
+    copied into a Python buffer first, when the JSON library supports it.
+    """
+    with open(file_path, "rb") as json_file:
+        if os.fstat(json_file.fileno()).st_size < MMAP_THRESHOLD:
+            return decode_json(json_file.read())
+        with mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # The view must be released before the mapping is closed
+            with memoryview(mapped) as content:
+                return decode_json(content)
+
+
+@contextmanager
+def atomic_write(file_path):
+    """Open a temporary file that replaces file_path once it was fully written.
+
+    The temporary file is created in the same directory so that renaming it
+    is atomic, and it is deleted when writing fails. A crash while writing
+    therefore leaves either the old or the new file, never a truncated one.
+    """
+    directory, file_name = os.path.split(os.path.abspath(file_path))
+    descriptor, temporary_path = tempfile.mkstemp(
+        prefix="." + file_name + ".", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as temporary_file:
+            yield temporary_file
+            # Make sure the content is on the disk before the file is renamed
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        # Keep the permissions of the replaced file or the usual ones
+        try:
+            mode = stat.S_IMODE(os.stat(file_path).st_mode)
+        except FileNotFoundError:
+            mode = NEW_FILE_MODE
+        os.chmod(temporary_path, mode)
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
 
 
 def get_dict_from_json_file(json_name, data_path="./data/"):
@@ -10,15 +189,23 @@ def get_dict_from_json_file(json_name, data_path="./data/"):
     - json_file_name: The name of the file to open.
     - data_path: Default/optional argument that stores the relative path
       to the directory containing the file.
+
+    Names ending with .npz are read from a columnar raw data file and names
+    ending with .sqlite are read from a SQLite database.
     """
-    with open(os.path.join(data_path, json_name + ".json"), "r") as json_file:
-        # In the open() function, "r" specifies read-only access
-        user_data_dict = json.load(json_file)
-        # json.load() converts a json file into a python dictionary
+    if json_name.endswith(columnar_storage.EXTENSION):
+        return columnar_storage.read_raw_data(os.path.join(data_path, json_name))
+    if json_name.endswith(sqlite_storage.EXTENSION):
+        return sqlite_storage.read_dict(os.path.join(data_path, json_name))
+    # read_json_file() converts the json content into a python dictionary
+    user_data_dict = read_json_file(os.path.join(data_path, json_name + ".json"))
     return user_data_dict
 
 
-def write_dict_to_json_file(user_data_dict, json_file_name, data_path="./data/"):
+# pylint: disable=C0330
+def write_dict_to_json_file(
+    user_data_dict, json_file_name, data_path="./data/", pretty=False
+):
     """Overwrite specified json file with data from a given dictionary.
 
     Arguments:
@@ -26,13 +213,28 @@ def write_dict_to_json_file(user_data_dict, json_file_name, data_path="./data/")
     - json_file_name: The name of the file to which to write.
     - data_path: Default/optional argument that stores the relative path
       to the directory containing the file.
+    - pretty: Indent the json file to make it readable instead of writing
+      compact json.
+
+    Names ending with .npz are written as a columnar raw data file, which can
+    only store the RAW_DATA key. Names ending with .sqlite are written to a
+    SQLite database.
     """
-    with open(os.path.join(data_path, json_file_name + ".json"), "w") as json_file:
-        # In the open() function, "w" specifies write access
-        json.dump(user_data_dict, json_file, indent=4)
-        # json.dump() converts a dictionary into a json-formatted string.
-        # Specifying an indent does not alter the data itself, it only
-        # increases readability in the json file.
+    if json_file_name.endswith(columnar_storage.EXTENSION):
+        with atomic_write(os.path.join(data_path, json_file_name)) as columnar_file:
+            columnar_storage.write_raw_data(user_data_dict, columnar_file)
+        return
+    if json_file_name.endswith(sqlite_storage.EXTENSION):
+        sqlite_storage.write_dict(
+            user_data_dict, os.path.join(data_path, json_file_name)
+        )
+        return
+    # The file is only replaced once the new content was completely written
+    with atomic_write(os.path.join(data_path, json_file_name + ".json")) as json_file:
+        json_file.write(encode_json(user_data_dict, pretty))
+        # encode_json() converts a dictionary into json-formatted bytes.
+        # Indenting does not alter the data itself, it only increases
+        # readability in the json file at the cost of a larger file.
 
 
 def add_user_to_users_dictionary(user_data_dict, to_add):
@@ -41,7 +243,136 @@ def add_user_to_users_dictionary(user_data_dict, to_add):
 
 
 def add_entry(new_entry, json_file_name, data_path="./data/"):
-    """Append data to the users dictionary."""
+    """Append data to the users dictionary.
+
+    SQLite databases only replace the rows of the keys of the new entry.
+    """
+    if json_file_name.endswith(sqlite_storage.EXTENSION):
+        sqlite_storage.add_entry(new_entry, os.path.join(data_path, json_file_name))
+        return
     data = get_dict_from_json_file(json_file_name, data_path)
     data.update(new_entry)
     write_dict_to_json_file(data, json_file_name, data_path)
+
+
+def is_incomplete_line(line):
+    """Check if a line of a JSON Lines file was cut off while it was written.
+
+    Only the last line of a file can be cut off, like when the writing
+    process crashed or was interrupted before writing the whole entry.
+    """
+    if not line.strip():
+        return False
+    try:
+        decode_json(line)
+    except ValueError:
+        return True
+    return False
+
+
+def find_last_line(jsonl_file, block_size=4096):
+    """Return the position and the content of the last line of a binary file.
+
+    The last line is the one after the last newline, which is empty when the
+    file ends with a newline.
+    """
+    end = jsonl_file.seek(0, os.SEEK_END)
+    position = end
+    tail = b""
+    while position > 0 and b"\n" not in tail:
+        read_size = min(block_size, position)
+        position -= read_size
+        jsonl_file.seek(position)
+        tail = jsonl_file.read(read_size) + tail
+    start = end - len(tail.rsplit(b"\n", 1)[-1])
+    jsonl_file.seek(start)
+    return start, jsonl_file.read()
+
+
+def repair_jsonl_file(jsonl_file):
+    """Make a JSON Lines file end with a complete line before appending to it.
+
+    A line that was cut off is removed and a complete last line without a
+    newline gets one.
+    """
+    start, line = find_last_line(jsonl_file)
+    if is_incomplete_line(line):
+        jsonl_file.truncate(start)
+    elif line.strip():
+        jsonl_file.write(b"\n")
+
+
+def write_entries_to_jsonl_file(
+    entries, jsonl_file_name, data_path="./data/", append=False
+):
+    """Write every entry of an iterable to a JSON Lines file as it is produced.
+
+    Arguments:
+    - entries: Iterable of dictionaries, it is consumed one entry at a time.
+    - jsonl_file_name: The name of the file to which to write.
+    - data_path: Default/optional argument that stores the relative path
+      to the directory containing the file.
+    - append: Add the entries after the ones already in the file instead of
+      overwriting it. A last line that was cut off is removed first.
+
+    Returns the last entry written, or None if the iterable was empty.
+    """
+    last_entry = None
+    mode = "a+b" if append else "wb"
+    with open(os.path.join(data_path, jsonl_file_name + ".jsonl"), mode) as jsonl_file:
+        if append:
+            repair_jsonl_file(jsonl_file)
+        for entry in entries:
+            # Every line of a JSON Lines file holds exactly one json value
+            jsonl_file.write(encode_json(entry) + b"\n")
+            last_entry = entry
+    return last_entry
+
+
+def get_entries_from_jsonl_file(jsonl_file_name, data_path="./data/"):
+    """Yield the entries of a JSON Lines file one at a time.
+
+    Arguments:
+    - jsonl_file_name: The name of the file to open.
+    - data_path: Default/optional argument that stores the relative path
+      to the directory containing the file.
+
+    A last line that was cut off while it was written is skipped.
+    """
+    with open(os.path.join(data_path, jsonl_file_name + ".jsonl"), "rb") as jsonl_file:
+        for line in jsonl_file:
+            # Only the last line can be missing its newline
+            if not line.endswith(b"\n") and is_incomplete_line(line):
+                break
+            # Blank lines are allowed, for example at the end of the file
+            if line.strip():
+                yield decode_json(line)
+
+
+def get_last_entry_from_jsonl_file(jsonl_file_name, data_path="./data/"):
+    """Return the last entry of a JSON Lines file without reading the whole file.
+
+    A last line that was cut off while it was written is skipped. Returns
+    None if the file does not have any entries.
+    """
+    block_size = 4096
+    with open(os.path.join(data_path, jsonl_file_name + ".jsonl"), "rb") as jsonl_file:
+        position = jsonl_file.seek(0, os.SEEK_END)
+        tail = b""
+        # Read blocks backwards until the last two non blank lines are complete,
+        # the one before the last is needed when the last one was cut off
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            jsonl_file.seek(position)
+            tail = jsonl_file.read(read_size) + tail
+            if len([line for line in tail.split(b"\n") if line.strip()]) > 2:
+                break
+    lines = tail.split(b"\n")
+    # The part after the last newline was cut off unless it is a whole entry
+    if is_incomplete_line(lines[-1]):
+        lines.pop()
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return None
+    return decode_json(lines[-1])
@@ -0,0 +1,139 @@
+"""Evaluate a repository from mining to the merged metrics in one run.
+
+Every stage passes its results to the next one in memory instead of writing
+them to json files and reading them back. The stages that only wait on the
+network or on git run in threads while the commits are mined, so fetching
+the issues and blaming the files overlap with mining:
+
+- the commits are mined and kept as compact commit records,
+- the issues and pull requests are retrieved from GitHub,
+- the lines at the head of the branch are blamed,
+- the metrics and the issues are merged, the usernames of the same
+  contributor are merged and the statistics are calculated.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import blame_attribution
+import commit_record
+import data_collection
+import data_processor
+import graphql_retrieval
+import identity_resolution
+
+
+def mine_commits(link, branch=None, workers=1, profile="full"):
+    """Return the commits of a repository as compact commit records."""
+    return list(
+        commit_record.compact_commits(
+            data_collection.iterate_commits_hash(
+                link, branch=branch, workers=workers, profile=profile
+            )
+        )
+    )
+
+
+# pylint: disable=C0330
+def retrieve_issues(
+    user_token,
+    repository_name,
+    state="all",
+    backend="rest",
+    workers=1,
+    bulk=False,
+    api_url=None,
+):
+    """Return the issue data of a repository from the REST or GraphQL API.
+
+    The repository name is in this format: org/repo_name. The default GitHub
+    API is used unless api_url is given.
+    """
+    if backend == "graphql":
+        url = graphql_retrieval.GRAPHQL_URL
+        if api_url is not None:
+            url = api_url.rstrip("/") + "/graphql"
+        return graphql_retrieval.retrieve_issue_data_graphql(
+            user_token, repository_name, state, {}, url=url
+        )
+    ghub = data_collection.authenticate_github(user_token, api_url)
+    repository = ghub.get_repo(repository_name)
+    return data_collection.retrieve_issue_data(
+        repository, state, {}, workers, ghub, bulk
+    )
+
+
+# pylint: disable=C0330
+def run_pipeline(
+    link,
+    user_token=None,
+    repository_name=None,
+    state="all",
+    branch=None,
+    workers=1,
+    profile="full",
+    backend="rest",
+    bulk=False,
+    blame=False,
+    match_names=True,
+    api_url=None,
+):
+    """Return the individual metrics of a repository without any prompt.
+
+    The issues are only retrieved when the token and the repository name
+    are given, and the SURVIVING lines are only counted when blame is True.
+    Both run in threads while the commits are mined, from the same mirror of
+    a remote repository. When the mining fails, the stages that did not start
+    yet are cancelled and the error is raised without waiting for the running
+    ones. The usernames of the same contributor are merged with the .mailmap
+    of the mined branch, see identity_resolution.resolve_identities.
+    """
+    with data_collection.local_repository(link) as repo_path:
+        executor = ThreadPoolExecutor(max_workers=2)
+        issues = None
+        surviving_lines = None
+        try:
+            if user_token is not None and repository_name is not None:
+                issues = executor.submit(
+                    retrieve_issues,
+                    user_token,
+                    repository_name,
+                    state,
+                    backend,
+                    workers,
+                    bulk,
+                    api_url,
+                )
+            if blame:
+                surviving_lines = executor.submit(
+                    blame_attribution.calculate_surviving_lines,
+                    repo_path,
+                    branch,
+                    workers,
+                    repository=link,
+                )
+            commits = mine_commits(repo_path, branch, workers, profile)
+            data_dict = data_collection.calculate_metrics_from_commits(commits)
+            mailmap = identity_resolution.read_repository_mailmap(repo_path, branch)
+            # Wait for the other stages only once the commits were processed
+            if issues is not None:
+                data_dict = data_collection.merge_metric_and_issue_dicts(
+                    data_dict, issues.result()
+                )
+            # The lines of the aliases are added up when the identities are merged
+            if surviving_lines is not None:
+                blame_attribution.add_surviving_lines(
+                    data_dict, surviving_lines.result()
+                )
+        except BaseException:
+            # Raise the error right away instead of after the other stages
+            for future in (issues, surviving_lines):
+                if future is not None:
+                    future.cancel()
+            executor.shutdown(wait=False)
+            raise
+        executor.shutdown()
+    clusters = identity_resolution.resolve_identities(
+        data_dict, commits, mailmap, match_names
+    )
+    data_dict = identity_resolution.merge_identities(data_dict, clusters)
+    return data_processor.process_data(
+        data_dict, identity_resolution.rename_commit_authors(commits, clusters)
+    )
@@ -0,0 +1,238 @@
+"""Persistent cache of GitHub API responses using conditional requests.
+
+The responses of GET requests are stored in a SQLite database keyed by URL
+and by a hash of the token that requested them, with their ETag and
+Last-Modified values. Later requests for the same URL with the same token
+are sent with If-None-Match and If-Modified-Since headers, and the stored
+body is served when GitHub answers 304 Not Modified, which does not count
+against the rate limit. The responses of private repositories are never
+served to another token.
+"""
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+import requests
+from github.Requester import (
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+    Requester,
+)
+
+DEFAULT_CACHE_PATH = "./data/response_cache.sqlite"
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# These headers describe the body as it was sent, not the decoded body stored
+SKIPPED_HEADERS = ["content-encoding", "content-length", "transfer-encoding"]
+
+
+class ResponseCache:
+    """SQLite table of responses evicted by least recent use above a total size."""
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, max_size=DEFAULT_MAX_SIZE):
+        """Open the cache database, creating it if needed.
+
+        Arguments:
+        - cache_path: Path of the SQLite database file.
+        - max_size: Total size in bytes of the stored responses above which the
+          least recently used responses are evicted.
+        """
+        self.max_size = max_size
+        # The connection is shared by the threads fetching comments
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(cache_path, check_same_thread=False)
+        with self.lock, self.connection:
+            # The url column holds the key of get_cache_key
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                "headers TEXT, body BLOB, size INTEGER, last_used REAL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used "
+                "ON responses (last_used)"
+            )
+
+    def get(self, key):
+        """Return the stored response of a key as a dictionary, or None."""
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, headers, body FROM responses "
+                "WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE responses SET last_used = ? WHERE url = ?", (time.time(), key)
+            )
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "headers": json.loads(row[2]),
+            "body": bytes(row[3]),
+        }
+
+    def put(self, key, etag, last_modified, headers, body):
+        """Store the response of a key then evict responses above the size limit."""
+        headers = json.dumps(headers)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    etag,
+                    last_modified,
+                    headers,
+                    sqlite3.Binary(body),
+                    len(body) + len(headers),
+                    time.time(),
+                ),
+            )
+            self.evict()
+
+    def evict(self):
+        """Delete the least recently used responses until the size limit is met.
+
+        Must be called while holding the lock.
+        """
+        total_size = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        evicted_urls = []
+        for url, size in self.connection.execute(
+            "SELECT url, size FROM responses ORDER BY last_used"
+        ).fetchall():
+            if total_size <= self.max_size:
+                break
+            evicted_urls.append((url,))
+            total_size -= size
+        self.connection.executemany("DELETE FROM responses WHERE url = ?", evicted_urls)
+
+    def clear(self):
+        """Delete every stored response."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM responses")
+
+    def close(self):
+        """Close the cache database."""
+        self.connection.close()
+
+
+def get_cache_key(request):
+    """Create the key of a request from its URL and a hash of its token.
+
+    Requests without an Authorization header share the key of the URL alone.
+    """
+    authorization = request.headers.get("Authorization")
+    if authorization is None:
+        return request.url
+    token_hash = hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+    return token_hash + " " + request.url
+
+
+def create_cached_response(request, response, cached):
+    """Create a 200 response with the stored body of a 304 response.
+
+    The rate limit headers come from the 304 response to stay up to date.
+    """
+    cached_response = requests.Response()
+    cached_response.status_code = 200
+    cached_response.reason = "OK"
+    cached_response.url = request.url
+    cached_response.request = request
+    cached_response.headers = requests.structures.CaseInsensitiveDict(cached["headers"])
+    for name, value in response.headers.items():
+        if name.lower().startswith("x-ratelimit"):
+            cached_response.headers[name] = value
+    cached_response.raw = io.BytesIO(cached["body"])
+    return cached_response
+
+
+class CachingAdapter(requests.adapters.BaseAdapter):
+    """Transport adapter sending GET requests through a ResponseCache."""
+
+    def __init__(self, cache, adapter):
+        """Wrap the adapter that actually sends the requests."""
+        super().__init__()
+        self.cache = cache
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """Send a conditional request and serve the stored body when not modified."""
+        if request.method != "GET":
+            return self.adapter.send(request, **kwargs)
+        key = get_cache_key(request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if cached["etag"] is not None:
+                request.headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"] is not None:
+                request.headers["If-Modified-Since"] = cached["last_modified"]
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            response.close()
+            return create_cached_response(request, response, cached)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            headers = {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in SKIPPED_HEADERS
+            }
+            self.cache.put(key, etag, last_modified, headers, response.content)
+        return response
+
+    def close(self):
+        """Close the wrapped adapter."""
+        self.adapter.close()
+
+
+def create_cached_connection_class(connection_class, cache):
+    """Create a PyGithub connection class whose requests go through the cache.
+
+    PyGithub creates a connection per request once connection classes are
+    injected, so every connection shares one session to keep the sockets
+    open between requests.
+    """
+    shared = {}
+    lock = threading.Lock()
+
+    class CachedConnection(connection_class):
+        """PyGithub connection using the shared session of the cache."""
+
+        def __init__(self, *args, **kwargs):
+            """Replace the session of the connection with the shared session."""
+            super().__init__(*args, **kwargs)
+            with lock:
+                if "session" not in shared:
+                    prefix = self.protocol + "://"
+                    adapter = self.session.get_adapter(prefix)
+                    self.session.mount(prefix, CachingAdapter(cache, adapter))
+                    shared["session"] = self.session
+                    return
+            self.session.close()
+            self.session = shared["session"]
+
+        def close(self):
+            """Keep the shared session open for the other connections."""
+
+    return CachedConnection
+
+
+def install_github_cache(cache):
+    """Send the requests of the Github objects created afterwards through the cache."""
+    Requester.injectConnectionClasses(
+        create_cached_connection_class(HTTPRequestsConnectionClass, cache),
+        create_cached_connection_class(HTTPSRequestsConnectionClass, cache),
+    )
+
+
+def uninstall_github_cache():
+    """Stop sending the requests of new Github objects through a cache."""
+    Requester.resetConnectionClasses()
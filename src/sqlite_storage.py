@@ -0,0 +1,282 @@
+"""Store the dictionaries of json_handler in a SQLite database.
+
+The commits of RAW_DATA are stored in the commits table with their files in
+the files table. Every other key of the dictionary, usually a username, is a
+row of the contributors table, and the lists of issue and pull request
+numbers of a contributor are rows of the issue_events table. Updating a
+contributor only replaces its rows instead of rewriting the whole file, and
+the indexes on the author and date of the commits let reports read a subset
+of the commits.
+"""
+import json
+import os
+import sqlite3
+
+EXTENSION = ".sqlite"
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS commits ("
+    "position INTEGER PRIMARY KEY, hash TEXT, author_msg TEXT, author_name TEXT, "
+    "author_email TEXT, author_date TEXT, merge INTEGER, line_added INTEGER, "
+    "line_removed INTEGER, lines_of_code INTEGER, complexity INTEGER, methods TEXT, "
+    "file_lines INTEGER)",
+    "CREATE INDEX IF NOT EXISTS commits_hash ON commits (hash)",
+    "CREATE INDEX IF NOT EXISTS commits_author ON commits (author_name)",
+    "CREATE INDEX IF NOT EXISTS commits_date ON commits (author_date)",
+    "CREATE TABLE IF NOT EXISTS files ("
+    "commit_position INTEGER, position INTEGER, filename TEXT, filepath TEXT, "
+    "line_added INTEGER, line_removed INTEGER, "
+    "PRIMARY KEY (commit_position, position))",
+    "CREATE INDEX IF NOT EXISTS files_filename ON files (filename)",
+    "CREATE TABLE IF NOT EXISTS contributors ("
+    "name TEXT PRIMARY KEY, position INTEGER, data TEXT)",
+    "CREATE TABLE IF NOT EXISTS issue_events ("
+    "name TEXT, event TEXT, position INTEGER, number INTEGER, "
+    "PRIMARY KEY (name, event, position))",
+    "CREATE INDEX IF NOT EXISTS issue_events_number ON issue_events (number)",
+]
+
+COMMIT_COLUMNS = [
+    "hash",
+    "author_msg",
+    "author_name",
+    "author_email",
+    "author_date",
+    "merge",
+    "line_added",
+    "line_removed",
+    "lines_of_code",
+    "complexity",
+    "methods",
+]
+
+ISSUE_EVENTS = [
+    "issues_commented",
+    "issues_opened",
+    "pull_requests_commented",
+    "pull_requests_opened",
+]
+
+
+def connect(file_path, create=False):
+    """Open the database and create its tables if needed.
+
+    Raise FileNotFoundError like open() when the database does not exist,
+    unless create is True.
+    """
+    if not create and not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    # Wait for the transactions of other runs instead of failing
+    connection = sqlite3.connect(file_path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    with connection:
+        for statement in SCHEMA:
+            connection.execute(statement)
+    return connection
+
+
+def insert_commits(connection, commits):
+    """Append commit dictionaries to the commits and files tables.
+
+    The lines of every file are only stored by the miners that collect them,
+    file_lines records whether the commit had them.
+    """
+    for commit in commits:
+        values = [commit.get(column) for column in COMMIT_COLUMNS[:-1]]
+        values.append(json.dumps(commit["methods"]))
+        file_lines = "file_line_added" in commit
+        values.append(file_lines)
+        commit_position = connection.execute(
+            "INSERT INTO commits ({}, file_lines) VALUES ({})".format(
+                ", ".join(COMMIT_COLUMNS), ", ".join("?" * (len(COMMIT_COLUMNS) + 1))
+            ),
+            values,
+        ).lastrowid
+        missing_lines = [None] * len(commit["filename"])
+        file_columns = zip(
+            commit["filename"],
+            commit["filepath"],
+            commit.get("file_line_added", missing_lines),
+            commit.get("file_line_removed", missing_lines),
+        )
+        connection.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (commit_position, position, *file_values)
+                for position, file_values in enumerate(file_columns)
+            ],
+        )
+
+
+def upsert_contributor(connection, name, value):
+    """Insert or replace the row of a contributor and its issue events.
+
+    A new contributor is added after the existing ones while a replaced
+    contributor keeps its position.
+    """
+    events = {}
+    if isinstance(value, dict):
+        # The numbers are stored as rows, the data keeps an empty list in place
+        events = {
+            event: value[event]
+            for event in ISSUE_EVENTS
+            if isinstance(value.get(event), list)
+        }
+        value = {key: [] if key in events else item for key, item in value.items()}
+    connection.execute(
+        "INSERT INTO contributors VALUES (?, "
+        "(SELECT COALESCE(MAX(position), -1) + 1 FROM contributors), ?) "
+        "ON CONFLICT (name) DO UPDATE SET data = excluded.data",
+        (name, json.dumps(value)),
+    )
+    connection.execute("DELETE FROM issue_events WHERE name = ?", (name,))
+    connection.executemany(
+        "INSERT INTO issue_events VALUES (?, ?, ?, ?)",
+        [
+            (name, event, position, number)
+            for event, numbers in events.items()
+            for position, number in enumerate(numbers)
+        ],
+    )
+
+
+def update_dict(connection, new_entry):
+    """Apply dict.update with a dictionary to the stored dictionary."""
+    for name, value in new_entry.items():
+        if name == "RAW_DATA":
+            connection.execute("DELETE FROM commits")
+            connection.execute("DELETE FROM files")
+            insert_commits(connection, value)
+            # The row only records the place of RAW_DATA among the keys
+            value = None
+        upsert_contributor(connection, name, value)
+
+
+def write_dict(data_dict, file_path):
+    """Replace the stored dictionary with a dictionary."""
+    connection = connect(file_path, create=True)
+    try:
+        with connection:
+            for table in ["commits", "files", "contributors", "issue_events"]:
+                connection.execute("DELETE FROM {}".format(table))
+            update_dict(connection, data_dict)
+    finally:
+        connection.close()
+
+
+def add_entry(new_entry, file_path):
+    """Update the stored dictionary with the keys of a dictionary.
+
+    Only the rows of the updated keys are written.
+    """
+    connection = connect(file_path)
+    try:
+        with connection:
+            update_dict(connection, new_entry)
+    finally:
+        connection.close()
+
+
+def read_commits(connection, condition="", parameters=()):
+    """Return the commit dictionaries of the rows matching a SQL condition."""
+    rows = connection.execute(
+        "SELECT position, file_lines, {} FROM commits {} ORDER BY position".format(
+            ", ".join(COMMIT_COLUMNS), condition
+        ),
+        parameters,
+    ).fetchall()
+    files = {row[0]: ([], [], [], []) for row in rows}
+    for commit_position, *file_values in connection.execute(
+        "SELECT commit_position, filename, filepath, line_added, line_removed "
+        "FROM files WHERE commit_position IN (SELECT position FROM commits {}) "
+        "ORDER BY commit_position, position".format(condition),
+        parameters,
+    ):
+        for values, value in zip(files[commit_position], file_values):
+            values.append(value)
+    commits = []
+    for row in rows:
+        commit = dict(zip(COMMIT_COLUMNS, row[2:]))
+        # The date is only stored by the miners that collect it
+        if commit["author_date"] is None:
+            del commit["author_date"]
+        commit["merge"] = bool(commit["merge"])
+        commit["methods"] = json.loads(commit["methods"])
+        filename, filepath, line_added, line_removed = files[row[0]]
+        commit["filename"] = filename
+        commit["filepath"] = filepath
+        if row[1]:
+            commit["file_line_added"] = line_added
+            commit["file_line_removed"] = line_removed
+        commits.append(commit)
+    return commits
+
+
+def read_contributor(connection, name, data):
+    """Return the value of a contributor row with its issue events."""
+    value = json.loads(data)
+    if isinstance(value, dict):
+        for event, number in connection.execute(
+            "SELECT event, number FROM issue_events WHERE name = ? "
+            "ORDER BY event, position",
+            (name,),
+        ):
+            value[event].append(number)
+    return value
+
+
+def read_dict(file_path):
+    """Return the stored dictionary."""
+    connection = connect(file_path)
+    try:
+        data_dict = {}
+        for name, data in connection.execute(
+            "SELECT name, data FROM contributors ORDER BY position"
+        ).fetchall():
+            if name == "RAW_DATA":
+                data_dict[name] = read_commits(connection)
+            else:
+                data_dict[name] = read_contributor(connection, name, data)
+        return data_dict
+    finally:
+        connection.close()
+
+
+def query_commits(file_path, author=None, since=None, until=None):
+    """Return the stored commits of an author and between two dates.
+
+    The dates are compared as ISO 8601 strings, since is inclusive and until
+    is exclusive. Every argument left to None does not filter the commits.
+    """
+    conditions = []
+    parameters = []
+    for condition, parameter in [
+        ("author_name = ?", author),
+        ("author_date >= ?", since),
+        ("author_date < ?", until),
+    ]:
+        if parameter is not None:
+            conditions.append(condition)
+            parameters.append(parameter)
+    condition = ""
+    if conditions:
+        condition = "WHERE " + " AND ".join(conditions)
+    connection = connect(file_path)
+    try:
+        return read_commits(connection, condition, parameters)
+    finally:
+        connection.close()
+
+
+def get_contributor(file_path, name):
+    """Return the stored value of a contributor, or None."""
+    connection = connect(file_path)
+    try:
+        row = connection.execute(
+            "SELECT data FROM contributors WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        return read_contributor(connection, name, row[0])
+    finally:
+        connection.close()
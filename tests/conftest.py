@@ -1,6 +1,15 @@
 """Configuration file for the test suite."""
+import hashlib
+import json
 import os
+import subprocess
 import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
 
 GO_BACK_A_DIR = "/../"
 GO_INTO_SRC_DIR = "src"
@@ -8,3 +17,233 @@ GO_INTO_SRC_DIR = "src"
 # set the system path to contain the previous directory
 PREVIOUS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, PREVIOUS_DIRECTORY + GO_BACK_A_DIR + GO_INTO_SRC_DIR)
+
+
+def run_git(repo_path, *arguments):
+    """Run a git command inside of the given repository."""
+    subprocess.run(
+        ["git", "-c", "user.name=Tester", "-c", "user.email=tester@example.com"]
+        + list(arguments),
+        cwd=str(repo_path),
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+def commit_file(repo_path, file_name, content, message):
+    """Write a file in the repository and commit it."""
+    (repo_path / file_name).write_text(content)
+    run_git(repo_path, "add", file_name)
+    run_git(repo_path, "commit", "-m", message)
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """Create a local repository with two commits so tests do not need GitHub."""
+    repo_path = tmp_path / "repo"
+    repo_path.mkdir()
+    run_git(repo_path, "init")
+    commit_file(repo_path, "README.md", "# Test\n", "Initial commit")
+    commit_file(repo_path, "main.py", "def main():\n    return 1\n", "Add main")
+    return repo_path
+
+
+@pytest.fixture
+def add_commit():
+    """Provide a function that commits a file to a test repository."""
+    return commit_file
+
+
+@pytest.fixture
+def git_command():
+    """Provide a function that runs git commands in a test repository."""
+    return run_git
+
+
+class GithubStubHandler(BaseHTTPRequestHandler):
+    """Serve the json documents of a GithubStub like the GitHub REST API."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer a GET request with a json document or a page of a json list."""
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.stub.requests.append(self.path)
+        if url.path not in self.server.stub.routes:
+            self.send_json(404, {"message": "Not Found"})
+            return
+        document = self.server.stub.routes[url.path]
+        headers = {}
+        if isinstance(document, list) and "since" in query:
+            # Timestamps in the same format are compared as strings
+            document = [
+                item for item in document if item["updated_at"] >= query["since"][0]
+            ]
+        if isinstance(document, list):
+            # Paginate lists with Link headers like the GitHub API does
+            per_page = int(query.get("per_page", ["30"])[0])
+            page = int(query.get("page", ["1"])[0])
+            if page * per_page < len(document):
+                query["page"] = [str(page + 1)]
+                next_url = "{}{}?{}".format(
+                    self.server.stub.url, url.path, urlencode(query, doseq=True)
+                )
+                headers["Link"] = '<{}>; rel="next"'.format(next_url)
+            document = document[(page - 1) * per_page : page * per_page]
+        self.send_json(200, document, headers)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer a GraphQL query with the data of the stub."""
+        self.server.stub.requests.append(self.path)
+        length = int(self.headers["Content-Length"])
+        body = json.loads(self.rfile.read(length).decode("utf-8"))
+        data = self.server.stub.answer_graphql(body["query"], body["variables"])
+        self.send_json(200, {"data": data})
+
+    def send_json(self, status, document, headers=None):
+        """Send a json document with the rate limit headers of the stub."""
+        body = json.dumps(document).encode("utf-8")
+        # Answer conditional requests like the GitHub API does
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        if self.command == "GET" and self.headers.get("If-None-Match") == etag:
+            self.server.stub.not_modified += 1
+            status = 304
+            body = b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Limit", "5000")
+        self.send_header("X-RateLimit-Remaining", str(self.server.stub.remaining))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the output of the test suite clean."""
+
+
+class GithubStub:
+    """Local stand-in for the GitHub REST API of an org/repo repository.
+
+    Issue 1 is opened by alice and commented by bob and alice, pull request 2
+    is opened by bob and commented by alice, and issue 3 is opened by carol
+    and commented by bob. Like in the GitHub API, the newest issue is first.
+    """
+
+    def __init__(self):
+        """Start serving the stub on a free local port."""
+        self.requests = []
+        self.not_modified = 0
+        self.remaining = 5000
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), GithubStubHandler)
+        self.server.stub = self
+        self.url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        repo_url = self.url + "/repos/org/repo"
+        issues = [
+            self.create_issue(3, "carol"),
+            self.create_issue(2, "bob", pull_request=True),
+            self.create_issue(1, "alice"),
+        ]
+        comments = {1: ["bob", "alice"], 2: ["alice"], 3: ["bob"]}
+        self.routes = {
+            "/repos/org/repo": {
+                "id": 1,
+                "name": "repo",
+                "full_name": "org/repo",
+                "url": repo_url,
+            },
+            "/repos/org/repo/issues": issues,
+        }
+        self.routes["/repos/org/repo/issues/comments"] = []
+        comment_id = 0
+        for issue in issues:
+            self.routes["/repos/org/repo/issues/{}".format(issue["number"])] = issue
+            issue_comments = []
+            for login in comments[issue["number"]]:
+                comment_id += 1
+                issue_comments.append(
+                    {
+                        "id": comment_id,
+                        "user": {"login": login},
+                        "issue_url": issue["url"],
+                        "url": "{}/issues/comments/{}".format(repo_url, comment_id),
+                    }
+                )
+            self.routes[
+                "/repos/org/repo/issues/{}/comments".format(issue["number"])
+            ] = issue_comments
+            self.routes["/repos/org/repo/issues/comments"] += issue_comments
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def create_issue(self, number, login, pull_request=False):
+        """Create the json document of an issue or a pull request."""
+        issue = {
+            "id": number,
+            "number": number,
+            "user": {"login": login},
+            "state": "open",
+            "updated_at": "2020-01-01T00:00:00Z",
+            "url": "{}/repos/org/repo/issues/{}".format(self.url, number),
+        }
+        if pull_request:
+            issue["pull_request"] = {
+                "url": "{}/repos/org/repo/pulls/{}".format(self.url, number)
+            }
+        return issue
+
+    @staticmethod
+    def paginate_graphql(nodes, first, after):
+        """Create a page of a GraphQL connection, cursors are node indexes."""
+        start = int(after) if after is not None else 0
+        end = start + first
+        return {
+            "pageInfo": {"hasNextPage": end < len(nodes), "endCursor": str(end)},
+            "nodes": nodes[start:end],
+        }
+
+    def get_graphql_comments(self, issue, first, after=None):
+        """Create a page of the comments of an issue for a GraphQL query."""
+        comments = self.routes[
+            "/repos/org/repo/issues/{}/comments".format(issue["number"])
+        ]
+        nodes = [{"author": comment["user"]} for comment in comments]
+        return self.paginate_graphql(nodes, first, after)
+
+    def answer_graphql(self, query, variables):
+        """Answer the GraphQL queries of graphql_retrieval."""
+        issues = self.routes["/repos/org/repo/issues"]
+        first = variables["first"]
+        if "node(id: $id)" in query:
+            issue = self.routes["/repos/org/repo/issues/" + variables["id"]]
+            comments = self.get_graphql_comments(issue, first, variables["after"])
+            return {"node": {"comments": comments}}
+        connection = "pullRequests" if "pullRequests(" in query else "issues"
+        nodes = [
+            {
+                "id": str(issue["number"]),
+                "number": issue["number"],
+                "author": issue["user"],
+                "comments": self.get_graphql_comments(issue, first),
+            }
+            for issue in issues
+            if ("pull_request" in issue) == (connection == "pullRequests")
+        ]
+        page = self.paginate_graphql(nodes, first, variables["after"])
+        return {"repository": {connection: page}}
+
+    def close(self):
+        """Stop serving the stub."""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def github_stub():
+    """Provide a local stub of the GitHub API so tests do not need a token."""
+    stub = GithubStub()
+    yield stub
+    stub.close()
@@ -0,0 +1,92 @@
+"""Test suite for the activity index of the commits."""
+import pytest
+from src import activity_index
+from src import data_collection
+from src import json_handler
+
+COMMITS = [
+    {
+        "author_name": name,
+        "author_date": date,
+        "line_added": added,
+        "line_removed": 1,
+    }
+    for name, date, added in [
+        ("alice", "2020-03-02T10:00:00Z", 5),
+        ("bob", "2020-03-02T23:59:59Z", 3),
+        ("alice", "2020-03-02T12:00:00Z", 2),
+        ("alice", "2020-03-05T08:00:00Z", 4),
+        ("alice", "2020-03-10T08:00:00Z", 1),
+    ]
+]
+
+
+def test_query_activity():
+    """Check the contributions of every author in a window of days."""
+    index = activity_index.build_activity_index(COMMITS)
+    # The two commits of alice on the same day share a row
+    assert len(index["buckets"]) == 4
+    assert activity_index.query_activity(index, "2020-03-02", "2020-03-06") == {
+        "alice": {"COMMITS": 3, "ADDED": 11, "REMOVED": 3},
+        "bob": {"COMMITS": 1, "ADDED": 3, "REMOVED": 1},
+    }
+    assert activity_index.query_activity(index, since="2020-03-03") == {
+        "alice": {"COMMITS": 2, "ADDED": 5, "REMOVED": 2}
+    }
+
+
+def test_get_activity_series_weeks():
+    """Check the weekly series of an author, with the weeks starting on Monday."""
+    index = activity_index.build_activity_index(COMMITS, "week")
+    assert activity_index.get_activity_series(index, "alice") == [
+        {"DATE": "2020-03-02", "COMMITS": 3, "ADDED": 11, "REMOVED": 3},
+        {"DATE": "2020-03-09", "COMMITS": 1, "ADDED": 1, "REMOVED": 1},
+    ]
+    assert activity_index.get_activity_series(index, "carol") == []
+
+
+def test_merge_activity_indexes(tmp_path):
+    """Check that merging the indexes of two parts equals indexing everything."""
+    expected_index = activity_index.build_activity_index(COMMITS)
+    file_path = str(tmp_path / "activity.npz")
+    activity_index.write_activity_index(
+        activity_index.build_activity_index(COMMITS[:3]), file_path
+    )
+    merged_index = activity_index.merge_activity_indexes(
+        activity_index.read_activity_index(file_path),
+        activity_index.build_activity_index(COMMITS[3:]),
+    )
+    for field, values in expected_index.items():
+        assert merged_index[field].tolist() == values.tolist()
+    with pytest.raises(ValueError):
+        activity_index.merge_activity_indexes(
+            expected_index, activity_index.build_activity_index(COMMITS, "week")
+        )
+
+
+def test_collect_raw_data_writes_activity_index(tmp_path, git_repo, add_commit):
+    """Check that the streamed and the json raw data are indexed alike."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    data_collection.collect_and_stream_raw_data_to_jsonl(
+        str(git_repo), "streamed", data_path, incremental=True
+    )
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    data_collection.collect_and_stream_raw_data_to_jsonl(
+        str(git_repo), "streamed", data_path, incremental=True
+    )
+    data_collection.collect_and_add_raw_data_to_json(
+        str(git_repo), "raw_data.npz", data_path
+    )
+    raw_data = json_handler.get_dict_from_json_file("raw_data.npz", data_path)
+    assert raw_data["RAW_DATA"][0]["author_date"].endswith("Z")
+    streamed_index = activity_index.read_activity_index(
+        str(data_path / "streamed_activity.npz")
+    )
+    index = activity_index.read_activity_index(str(data_path / "raw_data_activity.npz"))
+    assert activity_index.query_activity(index) == {
+        "Tester": {"COMMITS": 3, "ADDED": 4, "REMOVED": 0}
+    }
+    assert activity_index.query_activity(streamed_index) == (
+        activity_index.query_activity(index)
+    )
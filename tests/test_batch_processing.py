@@ -0,0 +1,87 @@
+"""Test suite for the evaluation of many repositories in one batch."""
+import json
+import pytest
+from src import batch_processing
+from src import json_handler
+
+
+@pytest.mark.parametrize(
+    "link,expected_host",
+    [
+        ("https://github.com/GatorCogitate/cogitate_tool", "github.com"),
+        ("git@gitlab.com:GatorCogitate/cogitate_tool.git", "gitlab.com"),
+        ("../cogitate_tool", batch_processing.LOCAL_HOST),
+    ],
+)
+def test_get_repository_host(link, expected_host):
+    """Check that the tasks of a repository are limited by the right host."""
+    assert batch_processing.get_repository_host(link) == expected_host
+
+
+def test_read_manifest_repeated_names(tmp_path):
+    """Check that two repositories can not write to the same shard."""
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(["https://github.com/org/repo", "git@github.com:org/repo.git"])
+    )
+    with pytest.raises(ValueError):
+        batch_processing.read_manifest(str(manifest_path))
+
+
+def test_run_batch_and_combine_shards(tmp_path, git_repo, github_stub):
+    """Check that every repository gets a shard and that they are combined."""
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            [
+                str(git_repo),
+                {"link": str(git_repo), "repo": "org/repo", "name": "stub"},
+                {"link": str(tmp_path / "missing")},
+            ]
+        )
+    )
+    shard_path = tmp_path / "shards"
+    failures = batch_processing.run_batch(
+        str(manifest_path),
+        "token",
+        str(shard_path),
+        workers=2,
+        host_limits={"127.0.0.1": 1},
+        api_url=github_stub.url,
+    )
+    assert list(failures) == ["missing"]
+    assert sorted(path.name for path in shard_path.iterdir()) == [
+        "repo.json",
+        "stub.json",
+    ]
+    stub_shard = json_handler.get_dict_from_json_file("stub", shard_path)
+    assert stub_shard["alice"]["issues_opened"] == [1]
+    assert stub_shard["alice"]["COMMITS"] == 0
+
+    # Shards of older manifests are only combined without the names
+    json_handler.write_dict_to_json_file({"dave": {"COMMITS": 1}}, "old", shard_path)
+    assert "dave" in batch_processing.combine_shards(str(shard_path))
+    combined = batch_processing.combine_shards(str(shard_path), ["repo", "stub"])
+    assert "dave" not in combined
+    repo_metrics = json_handler.get_dict_from_json_file("repo", shard_path)
+    author = list(repo_metrics)[0]
+    assert combined[author]["COMMITS"] == 2 * repo_metrics[author]["COMMITS"]
+    assert combined[author]["REPOSITORIES"] == ["repo", "stub"]
+    assert "stub/main.py" in combined[author]["FILES"]
+    assert combined["alice"]["issues_opened"] == ["stub#1"]
+    assert combined[author]["FORMAT"] == [".md", ".py"]
+    assert repo_metrics[author]["LINES_PER_COMMIT"]["AVERAGE"] == 1.5
+    py_index = repo_metrics[author]["FORMAT_INDEX"][".py"]
+    assert combined[author]["FORMAT_INDEX"][".py"]["LINES"] == 2 * py_index["LINES"]
+
+
+def test_run_batch_rejects_host_limits_below_one(tmp_path, git_repo):
+    """Check that a host limit of 0 fails instead of never scheduling tasks."""
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps([str(git_repo)]))
+    with pytest.raises(ValueError):
+        batch_processing.run_batch(
+            str(manifest_path),
+            shard_path=str(tmp_path / "shards"),
+            host_limits={batch_processing.LOCAL_HOST: 0},
+        )
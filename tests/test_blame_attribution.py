@@ -0,0 +1,59 @@
+"""Test suite for the attribution of the surviving lines with git blame."""
+from src import blame_attribution
+
+
+def test_calculate_surviving_lines(tmp_path, monkeypatch, git_repo, git_command):
+    """Check the lines of every author at HEAD and that the cache is used."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    # Replace one of the two lines of main.py by another author
+    (git_repo / "main.py").write_text("def main():\n    return 2\n")
+    (git_repo / "logo.png").write_bytes(b"\x89PNG\x00\x01\x02")
+    git_command(git_repo, "add", "main.py", "logo.png")
+    git_command(git_repo, "commit", "-m", "Change main", "--author", "Other <o@x.org>")
+    surviving_lines = blame_attribution.calculate_surviving_lines(
+        str(git_repo), workers=2, data_path=data_path
+    )
+    assert surviving_lines == {"Tester": 2, "Other": 1}
+
+    blamed_paths = []
+    blame_file = blame_attribution.blame_file
+
+    def recorded_blame_file(repo_path, revision, path):
+        """Record the blamed files."""
+        blamed_paths.append(path)
+        return blame_file(repo_path, revision, path)
+
+    monkeypatch.setattr(blame_attribution, "blame_file", recorded_blame_file)
+    (git_repo / "README.md").write_text("# Test\nMore\n")
+    git_command(git_repo, "commit", "-am", "Extend README", "--author", "Other <o@x>")
+    surviving_lines = blame_attribution.calculate_surviving_lines(
+        str(git_repo), data_path=data_path
+    )
+    assert surviving_lines == {"Tester": 2, "Other": 2}
+    # Only the changed file was blamed again
+    assert blamed_paths == ["README.md"]
+
+
+def test_calculate_surviving_lines_mailmap(tmp_path, git_repo, git_command):
+    """Check that the lines keep the author names of the mined commits."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (git_repo / "lib.py").write_text("one = 1\ntwo = 2\nthree = 3\n")
+    (git_repo / ".mailmap").write_text("Jane Doe <jdoe@x.org>\n")
+    git_command(git_repo, "add", "lib.py", ".mailmap")
+    git_command(git_repo, "commit", "-m", "Add lib", "--author", "jdoe <jdoe@x.org>")
+    surviving_lines = blame_attribution.calculate_surviving_lines(
+        str(git_repo), data_path=data_path
+    )
+    assert surviving_lines == {"Tester": 3, "jdoe": 4}
+
+
+def test_add_surviving_lines():
+    """Check that every contributor gets its surviving lines."""
+    data = {"alice": {"ADDED": 10}, "bob": {"ADDED": 3}}
+    blame_attribution.add_surviving_lines(data, {"alice": 4, "carol": 1})
+    assert data == {
+        "alice": {"ADDED": 10, "SURVIVING": 4},
+        "bob": {"ADDED": 3, "SURVIVING": 0},
+    }
@@ -0,0 +1,34 @@
+"""Test suite for the cache of bare mirrors of remote repositories."""
+import os
+from git import Repo
+from src import clone_cache
+from src import data_collection
+
+
+def test_mirrored_repository_fetches_new_commits(tmp_path, git_repo, add_commit):
+    """Ensure a mirror is cloned once then updated with the new commits."""
+    cache_path = str(tmp_path / "cache")
+    with clone_cache.mirrored_repository(str(git_repo), cache_path) as mirror_path:
+        assert Repo(mirror_path).bare
+        assert data_collection.collect_commits_hash(
+            mirror_path
+        ) == data_collection.collect_commits_hash(str(git_repo))
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    with clone_cache.mirrored_repository(str(git_repo), cache_path) as second_path:
+        assert second_path == mirror_path
+        assert Repo(mirror_path).head.commit.message.strip() == "Add other"
+
+
+def test_evict_least_recently_used_mirror(tmp_path, git_repo):
+    """Ensure the least recently used mirrors are deleted above the cache size."""
+    other_repo = tmp_path / "other"
+    other_repo.mkdir()
+    Repo.clone_from(str(git_repo), str(other_repo))
+    cache_path = str(tmp_path / "cache")
+    with clone_cache.mirrored_repository(str(git_repo), cache_path) as first_path:
+        pass
+    # Make the first mirror the least recently used one
+    os.utime(first_path, (0, 0))
+    with clone_cache.mirrored_repository(str(other_repo), cache_path, 1) as path:
+        assert os.path.isdir(path)
+        assert not os.path.exists(first_path)
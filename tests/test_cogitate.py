@@ -0,0 +1,85 @@
+"""Test suite for the command line interface."""
+
+import argparse
+import sys
+import pytest
+from src import cogitate
+from src import data_collection
+
+
+def run_cogitate(monkeypatch, *arguments):
+    """Run the command line interface with the given arguments."""
+    monkeypatch.setattr(sys, "argv", ["cogitate.py", "-t", "token"] + list(arguments))
+    cogitate.main()
+
+
+def test_clone_cache_arguments(tmp_path, monkeypatch, git_repo):
+    """Check that the clone cache used for mining is the configured one."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    # Restore the configuration of the other tests afterwards
+    monkeypatch.setattr(
+        data_collection.clone_cache,
+        "CLONE_CACHE",
+        dict(data_collection.clone_cache.CLONE_CACHE),
+    )
+    cache_path = str(tmp_path / "mirrors")
+    run_cogitate(
+        monkeypatch,
+        "--pipeline",
+        "-l",
+        str(git_repo),
+        "--clone-cache",
+        cache_path,
+        "--clone-cache-size",
+        "5",
+    )
+    assert data_collection.clone_cache.CLONE_CACHE == {
+        "path": cache_path,
+        "max_size": 5 * 1024 * 1024,
+    }
+
+
+def test_parse_host_limit():
+    """Check that host limits must be HOST=N with N at least 1."""
+    assert cogitate.parse_host_limit("github.com=2") == ("github.com", 2)
+    for host_limit in ["github.com=0", "github.com", "=2", "github.com=-1"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            cogitate.parse_host_limit(host_limit)
+
+
+def test_queries_without_issues(tmp_path, monkeypatch, capsys, git_repo):
+    """Check that mining and the index questions do not retrieve the issues."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    run_cogitate(monkeypatch, "-l", str(git_repo), "--hotspots", "1", "--blame")
+    run_cogitate(monkeypatch, "--since", "2000-01-01")
+    output = capsys.readouterr().out
+    assert "Bus factor: 1" in output
+    assert "SURVIVING" in output
+    assert "Tester" in output
+    assert not (tmp_path / "data" / "contributor_data.json").exists()
+
+
+def test_issue_arguments_go_together(monkeypatch):
+    """Check that the repository and the state of the issues are both needed."""
+    for arguments in [[], ["-r", "org/repo"], ["-l", ".", "-s", "all"]]:
+        with pytest.raises(SystemExit):
+            run_cogitate(monkeypatch, *arguments)
+
+
+def test_checkpoints_are_opt_in(tmp_path, monkeypatch, git_repo):
+    """Check that mining only saves checkpoints when they were asked for."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    checkpointed_runs = []
+    monkeypatch.setattr(
+        data_collection,
+        "collect_checkpointed_raw_data",
+        lambda *args: checkpointed_runs.append(args),
+    )
+    run_cogitate(monkeypatch, "-l", str(git_repo))
+    assert checkpointed_runs == []
+    for argument in ["--stream", "-i"]:
+        with pytest.raises(SystemExit):
+            run_cogitate(monkeypatch, "-l", str(git_repo), "--resume", argument)
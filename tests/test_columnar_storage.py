@@ -0,0 +1,68 @@
+"""Test suite for the columnar storage of raw commit data."""
+
+import pytest
+from src import columnar_storage
+from src import data_collection
+from src import json_handler
+
+
+def test_write_and_read_raw_data(tmp_path):
+    """Ensure the commits are read back from a columnar file unchanged."""
+    test_data = json_handler.get_dict_from_json_file("individual_metrics_testfile")
+    raw_data = {"RAW_DATA": test_data["RAW_DATA"]}
+    # Deleted files do not have a path
+    raw_data["RAW_DATA"][0]["filepath"][0] = None
+    json_handler.write_dict_to_json_file(raw_data, "raw_data.npz", tmp_path)
+    assert json_handler.get_dict_from_json_file("raw_data.npz", tmp_path) == raw_data
+
+
+def test_write_empty_raw_data(tmp_path):
+    """Ensure an empty history can be stored and aggregated."""
+    json_handler.write_dict_to_json_file({"RAW_DATA": []}, "raw_data.npz", tmp_path)
+    assert json_handler.get_dict_from_json_file("raw_data.npz", tmp_path) == {
+        "RAW_DATA": []
+    }
+    assert data_collection.calculate_individual_metrics("raw_data.npz", tmp_path) == {}
+
+
+def test_write_other_keys_fails(tmp_path):
+    """Ensure only the raw data can be stored in a columnar file."""
+    with pytest.raises(ValueError):
+        columnar_storage.write_raw_data(
+            {"RAW_DATA": [], "METRICS": {}}, str(tmp_path / "raw_data.npz")
+        )
+
+
+def test_calculate_individual_metrics_columnar(tmp_path):
+    """Ensure the vectorized metrics equal the metrics of the json file."""
+    test_data = json_handler.get_dict_from_json_file("individual_metrics_testfile")
+    raw_data = {"RAW_DATA": test_data["RAW_DATA"]}
+    json_handler.write_dict_to_json_file(raw_data, "raw_data.npz", tmp_path)
+    expected_data = data_collection.calculate_individual_metrics(
+        "individual_metrics_testfile"
+    )
+    actual_data = data_collection.calculate_individual_metrics("raw_data.npz", tmp_path)
+    assert actual_data == expected_data
+    assert list(actual_data.keys()) == list(expected_data.keys())
+
+
+def test_write_and_read_mined_commits(tmp_path, git_repo):
+    """Ensure the dates and the lines of every file are read back unchanged."""
+    raw_data = {"RAW_DATA": data_collection.collect_commits_hash(str(git_repo))}
+    json_handler.write_dict_to_json_file(raw_data, "raw_data.npz", tmp_path)
+    assert json_handler.get_dict_from_json_file("raw_data.npz", tmp_path) == raw_data
+
+
+def test_long_messages_do_not_widen_columns(tmp_path):
+    """Ensure one long message does not grow the size of every message."""
+    test_data = json_handler.get_dict_from_json_file("individual_metrics_testfile")
+    commits = test_data["RAW_DATA"] * 100
+    commits[0] = dict(commits[0], author_msg="Squash ✓\n" * 2000)
+    columns = columnar_storage.commits_to_columns(commits)
+    message_bytes = sum(len(commit["author_msg"].encode("utf-8")) for commit in commits)
+    assert columns["author_msg"].nbytes == message_bytes
+    assert columns["hash"].dtype.itemsize == len(commits[0]["hash"])
+    json_handler.write_dict_to_json_file({"RAW_DATA": commits}, "raw.npz", tmp_path)
+    assert json_handler.get_dict_from_json_file("raw.npz", tmp_path) == {
+        "RAW_DATA": commits
+    }
@@ -0,0 +1,51 @@
+"""Test suite for the compact records of the mined commits."""
+import pytest
+from src import commit_record
+from src import data_collection
+from src import json_handler
+
+
+def test_commit_record_reads_like_dictionary():
+    """Check that a record has the fields and the shape of its dictionary."""
+    raw_data = json_handler.get_dict_from_json_file("individual_metrics_testfile")
+    for commit in raw_data["RAW_DATA"]:
+        record = commit_record.CommitRecord(commit)
+        assert record == commit
+        assert record.to_dict() == commit
+        assert list(record.keys()) == list(commit.keys())
+        assert record["filename"] == tuple(commit["filename"])
+        # The fixture was mined before the dates were recorded
+        assert "author_date" not in record
+        assert record.get("author_date") is None
+        with pytest.raises(KeyError):
+            record["author_date"]  # pylint: disable=pointless-statement
+
+
+def test_commit_record_interns_strings():
+    """Check that the records of different commits share their strings."""
+    raw_data = json_handler.get_dict_from_json_file("individual_metrics_testfile")
+    commits = []
+    for _ in range(2):
+        commit = dict(raw_data["RAW_DATA"][0])
+        # Build new string objects like the ones of every mined commit
+        commit["author_name"] = "".join(list(commit["author_name"]))
+        commit["filename"] = ["".join(list(name)) for name in commit["filename"]]
+        commits.append(commit)
+    assert commits[0]["author_name"] is not commits[1]["author_name"]
+    first_record, second_record = commit_record.compact_commits(commits)
+    assert first_record["author_name"] is second_record["author_name"]
+    assert first_record["filename"][0] is second_record["filename"][0]
+
+
+@pytest.mark.parametrize("codec", list(json_handler.JSON_CODECS))
+def test_write_commit_records(tmp_path, monkeypatch, git_repo, codec):
+    """Check that records are written as their dictionaries by every codec."""
+    monkeypatch.setitem(
+        json_handler.JSON_CODEC, "codec", json_handler.JSON_CODECS[codec]
+    )
+    commits = data_collection.collect_commits_hash(str(git_repo))
+    records = data_collection.collect_commits_hash(str(git_repo), compact=True)
+    assert records == commits
+    json_handler.write_dict_to_json_file({"RAW_DATA": records}, "records", tmp_path)
+    stored_data = json_handler.get_dict_from_json_file("records", tmp_path)
+    assert stored_data == {"RAW_DATA": commits}
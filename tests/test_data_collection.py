@@ -5,6 +5,7 @@ The test case will take the current repository.
 
 Unless that path variable is changed.
 """
+import itertools
 import pytest
 import os
 from src import data_collection
@@ -431,3 +432,331 @@ def test_get_commit_average(input_lines, input_commits, expected_output):
     assert (
         data_collection.get_commit_average(input_lines, input_commits)
     ) == expected_output
+
+
+def test_collect_commits_hash_local(git_repo):
+    """Check the commits of a local repository are collected in order."""
+    commit_list = data_collection.collect_commits_hash(str(git_repo))
+    assert [commit["author_msg"] for commit in commit_list] == [
+        "Initial commit",
+        "Add main",
+    ]
+
+
+def test_collect_and_add_raw_data_to_json_incremental(tmp_path, git_repo, add_commit):
+    """Check that an incremental run only appends the new commits."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    data_collection.collect_and_add_raw_data_to_json(
+        str(git_repo), "raw_data_testfile", data_path, incremental=True
+    )
+    first_run = json_handler.get_dict_from_json_file("raw_data_testfile", data_path)
+    assert len(first_run["RAW_DATA"]) == 2
+    assert (
+        data_collection.get_mining_watermark(str(git_repo), data_path=data_path)
+        == first_run["RAW_DATA"][-1]["hash"]
+    )
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    data_collection.collect_and_add_raw_data_to_json(
+        str(git_repo), "raw_data_testfile", data_path, incremental=True
+    )
+    second_run = json_handler.get_dict_from_json_file("raw_data_testfile", data_path)
+    assert second_run["RAW_DATA"][:2] == first_run["RAW_DATA"]
+    assert [commit["author_msg"] for commit in second_run["RAW_DATA"][2:]] == [
+        "Add other"
+    ]
+
+
+def test_collect_incremental_raw_data_rewritten_history(
+    tmp_path, git_repo, add_commit, git_command
+):
+    """Check that the whole history is mined again after a force push."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    data_collection.collect_and_add_raw_data_to_json(
+        str(git_repo), "raw_data_testfile", data_path, incremental=True
+    )
+    # Replace the last commit so the watermark is not part of the history
+    git_command(git_repo, "reset", "--hard", "HEAD~1")
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    commit_list = data_collection.collect_incremental_raw_data(
+        str(git_repo), "raw_data_testfile", data_path
+    )
+    assert [commit["author_msg"] for commit in commit_list] == [
+        "Initial commit",
+        "Add other",
+    ]
+
+
+@pytest.mark.parametrize(
+    "items,chunk_count,expected_chunks",
+    [
+        ([1, 2, 3, 4, 5], 2, [[1, 2, 3], [4, 5]]),
+        ([1, 2], 4, [[1], [2]]),
+        ([], 4, []),
+    ],
+)
+def test_split_into_chunks(items, chunk_count, expected_chunks):
+    """Check that lists are split into contiguous chunks."""
+    assert data_collection.split_into_chunks(items, chunk_count) == expected_chunks
+
+
+def test_collect_commits_hash_parallel(git_repo, add_commit):
+    """Check that parallel mining matches mining in a single process."""
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    expected_list = data_collection.collect_commits_hash(str(git_repo))
+    actual_list = data_collection.collect_commits_hash(str(git_repo), workers=2)
+    assert actual_list == expected_list
+
+
+def test_iterate_commits_parallel_bounded(monkeypatch, git_repo, add_commit):
+    """Check that only a window of the ranges is submitted ahead of the consumer."""
+    for number in range(10):
+        add_commit(git_repo, "file{}.py".format(number), "x = 1\n", "Add file")
+    submitted = []
+
+    class RecordingExecutor(data_collection.ThreadPoolExecutor):
+        """Run the ranges in threads, recording when they are submitted."""
+
+        def __init__(self, max_workers, initializer, initargs):
+            """Use one thread, the threads would share the opened repository."""
+            super().__init__(1, initializer=initializer, initargs=initargs)
+
+        def submit(self, *args):
+            """Record the number of commits consumed before every submission."""
+            submitted.append(len(consumed))
+            return super().submit(*args)
+
+    monkeypatch.setattr(data_collection, "ProcessPoolExecutor", RecordingExecutor)
+    consumed = []
+    for commit in data_collection.iterate_commits_parallel(str(git_repo), 2):
+        consumed.append(commit["hash"])
+    assert len(consumed) == 12
+    # 6 ranges of 2 commits, the 5th is only submitted once the first range
+    # was consumed
+    assert submitted == [0, 0, 0, 0, 2, 4]
+
+
+def test_get_commit_hashes_from_commit(git_repo, add_commit):
+    """Check that from_commit is included like it is in PyDriller."""
+    commit_list = data_collection.collect_commits_hash(str(git_repo))
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    commit_hashes = data_collection.get_commit_hashes(
+        str(git_repo), commit_list[-1]["hash"]
+    )
+    assert len(commit_hashes) == 2
+    assert commit_hashes[0] == commit_list[-1]["hash"]
+
+
+def test_collect_commits_numstat(git_repo, add_commit, git_command):
+    """Check that the fast profile matches the full profile on cheap fields."""
+    git_command(git_repo, "mv", "main.py", "app.py")
+    add_commit(git_repo, "app.py", "def main():\n    return 2\n", "Rename main")
+    git_command(git_repo, "rm", "README.md")
+    git_command(git_repo, "commit", "-m", "Remove README")
+    full_list = data_collection.collect_commits_hash(str(git_repo))
+    fast_list = data_collection.collect_commits_hash(str(git_repo), profile="fast")
+    assert len(fast_list) == len(full_list)
+    for fast_commit, full_commit in zip(fast_list, full_list):
+        assert list(fast_commit.keys()) == list(full_commit.keys())
+        for key in [
+            "hash",
+            "author_msg",
+            "author_name",
+            "author_email",
+            "author_date",
+            "merge",
+            "line_added",
+            "line_removed",
+            "filename",
+            "filepath",
+            "file_line_added",
+            "file_line_removed",
+        ]:
+            assert fast_commit[key] == full_commit[key]
+        assert fast_commit["methods"] == []
+
+
+def test_collect_and_stream_raw_data_to_jsonl(tmp_path, git_repo, add_commit):
+    """Check that streamed raw data gives the same metrics as the json file."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    data_collection.collect_and_add_raw_data_to_json(
+        str(git_repo), "raw_data_testfile", data_path
+    )
+    data_collection.collect_and_stream_raw_data_to_jsonl(
+        str(git_repo), "raw_data_testfile", data_path, incremental=True
+    )
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    data_collection.collect_and_stream_raw_data_to_jsonl(
+        str(git_repo), "raw_data_testfile", data_path, incremental=True
+    )
+    streamed_commits = list(
+        json_handler.get_entries_from_jsonl_file("raw_data_testfile", data_path)
+    )
+    assert len(streamed_commits) == 3
+    assert streamed_commits[-1]["author_msg"] == "Add other"
+    data_collection.collect_and_add_raw_data_to_json(
+        str(git_repo), "raw_data_testfile", data_path
+    )
+    assert data_collection.calculate_individual_metrics_from_jsonl(
+        "raw_data_testfile", data_path
+    ) == data_collection.calculate_individual_metrics("raw_data_testfile", data_path)
+
+
+def test_stream_raw_data_after_truncated_entry(
+    tmp_path, monkeypatch, git_repo, add_commit
+):
+    """Check that incremental streaming resumes after an interrupted write."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    data_collection.collect_and_stream_raw_data_to_jsonl(
+        str(git_repo), "raw_data_testfile", data_path
+    )
+    new_commits = []
+    collect_new_commits_hash = data_collection.collect_new_commits_hash
+
+    def recorded_collect_new_commits_hash(*args):
+        """Record the commits mined after the watermark."""
+        new_commits.append(collect_new_commits_hash(*args))
+        return new_commits[-1]
+
+    monkeypatch.setattr(
+        data_collection, "collect_new_commits_hash", recorded_collect_new_commits_hash
+    )
+    # An interrupted run leaves the last commit cut off
+    with open(data_path / "raw_data_testfile.jsonl", "ab") as jsonl_file:
+        jsonl_file.write(b'{"hash": "0123')
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    data_collection.collect_and_stream_raw_data_to_jsonl(
+        str(git_repo), "raw_data_testfile", data_path, incremental=True
+    )
+    streamed_commits = list(
+        json_handler.get_entries_from_jsonl_file("raw_data_testfile", data_path)
+    )
+    assert [commit["author_msg"] for commit in streamed_commits][-1] == "Add other"
+    assert len(streamed_commits) == 3
+    # Only the new commit was mined, after the last complete entry
+    assert [len(commits) for commits in new_commits] == [1]
+
+
+def test_calculate_metrics_from_commits_files():
+    """Check that the files of every author are merged without duplicates."""
+    commits = [
+        {
+            "author_name": name,
+            "author_email": name + "@allegheny.edu",
+            "line_added": 2,
+            "line_removed": 1,
+            "filename": files,
+        }
+        for name, files in [
+            ("schultzh", ["b.py", "a.py"]),
+            ("noorbuchi", ["c.py"]),
+            ("schultzh", ["a.py", "README.md"]),
+        ]
+    ]
+    data = data_collection.calculate_metrics_from_commits(iter(commits))
+    assert data["schultzh"]["FILES"] == ["README.md", "a.py", "b.py"]
+    assert data["schultzh"]["COMMITS"] == 2
+    assert data["schultzh"]["ADDED"] == 4
+    assert data["noorbuchi"]["FILES"] == ["c.py"]
+
+
+def test_collect_checkpointed_raw_data_resume(
+    tmp_path, monkeypatch, git_repo, add_commit
+):
+    """Check that an interrupted run resumes after its last checkpoint."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    add_commit(git_repo, "other.py", "x = 1\n", "Add other")
+    expected_commits = data_collection.collect_commits_hash(str(git_repo))
+    iterate_commits_hash = data_collection.iterate_commits_hash
+
+    def interrupted_iterate_commits_hash(*args):
+        """Stop mining after the first two commits."""
+        yield from itertools.islice(iterate_commits_hash(*args), 2)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(
+        data_collection, "iterate_commits_hash", interrupted_iterate_commits_hash
+    )
+    with pytest.raises(KeyboardInterrupt):
+        data_collection.collect_and_add_raw_data_to_json(
+            str(git_repo), "raw_data_testfile", data_path, checkpoint_every=1
+        )
+    from_commits = []
+
+    def recorded_iterate_commits_hash(repo, from_commit, *args):
+        """Record where mining starts."""
+        from_commits.append(from_commit)
+        return iterate_commits_hash(repo, from_commit, *args)
+
+    monkeypatch.setattr(
+        data_collection, "iterate_commits_hash", recorded_iterate_commits_hash
+    )
+    checkpoint = json_handler.get_dict_from_json_file(
+        "raw_data_testfile_checkpoint", data_path
+    )
+    assert checkpoint["commits"] == 2
+    assert checkpoint["last_hash"] == expected_commits[1]["hash"]
+
+    data_collection.collect_and_add_raw_data_to_json(
+        str(git_repo), "raw_data_testfile", data_path, resume=True
+    )
+    raw_data = json_handler.get_dict_from_json_file("raw_data_testfile", data_path)
+    assert raw_data["RAW_DATA"] == expected_commits
+    assert from_commits == [expected_commits[1]["hash"]]
+    assert sorted(os.listdir(data_path)) == [
+        "mining_watermarks.json",
+        "raw_data_testfile.json",
+        "raw_data_testfile_activity.npz",
+        "raw_data_testfile_files.npz",
+    ]
+
+
+def test_collect_checkpointed_raw_data_keeps_checkpoint(
+    tmp_path, monkeypatch, git_repo, git_command
+):
+    """Check that errors keep the checkpoint and rewritten histories drop it."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    data_collection.collect_checkpointed_raw_data(
+        str(git_repo), "raw_data_testfile", data_path, checkpoint_every=1
+    )
+    commit_hashes = [
+        commit["hash"]
+        for commit in json_handler.get_entries_from_jsonl_file(
+            "raw_data_testfile_checkpoint", data_path
+        )
+    ]
+    assert len(commit_hashes) == 2
+
+    def failing_iterate_commits_hash(*args):
+        """Fail like a transient git error."""
+        raise OSError("transient")
+        yield  # pylint: disable=unreachable
+
+    monkeypatch.setattr(
+        data_collection, "iterate_commits_hash", failing_iterate_commits_hash
+    )
+    with pytest.raises(OSError):
+        data_collection.collect_checkpointed_raw_data(
+            str(git_repo), "raw_data_testfile", data_path, resume=True
+        )
+    monkeypatch.undo()
+    checkpoint = {"repo": str(git_repo), "branch": None, "profile": "full"}
+    assert [
+        commit["hash"]
+        for commit in data_collection.load_mining_checkpoint(
+            checkpoint, "raw_data_testfile", data_path
+        )
+    ] == commit_hashes
+
+    # Rewrite the history so that the last checkpointed commit is gone
+    git_command(git_repo, "reset", "--hard", "HEAD~1")
+    assert not data_collection.is_commit_in_history(str(git_repo), commit_hashes[1])
+    commits = data_collection.collect_checkpointed_raw_data(
+        str(git_repo), "raw_data_testfile", data_path, resume=True
+    )
+    assert [commit["hash"] for commit in commits] == commit_hashes[:1]
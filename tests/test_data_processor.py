@@ -0,0 +1,61 @@
+"""Test suite for the statistics calculated by data_processor."""
+import numpy as np
+import pytest
+from src import data_collection
+from src import data_processor
+from src import json_handler
+
+
+def test_process_data_fills_fields():
+    """Check that TOTAL, MODIFIED, RATIO and FORMAT match the scalar helpers."""
+    data = data_collection.calculate_individual_metrics("individual_metrics_testfile")
+    data["ghost"] = data_collection.create_author_metrics("N/A", 0)
+    data_processor.process_data(data)
+    for metrics in data.values():
+        assert metrics["TOTAL"] == metrics["ADDED"] - metrics["REMOVED"]
+        assert metrics["MODIFIED"] == metrics["ADDED"] + metrics["REMOVED"]
+        assert metrics["RATIO"] == data_collection.get_commit_average(
+            metrics["MODIFIED"], metrics["COMMITS"]
+        )
+        assert metrics["FORMAT"] == data_collection.get_file_formats(metrics["FILES"])
+    assert data["noorbuchi"]["FORMAT"] == [".lock", ".py", ".sh", "Pipfile"]
+
+
+@pytest.mark.parametrize(
+    "lines_by_author",
+    [[[1, 5, 3, 10], [7], []], [[2, 2], [0, 100, 50, 25, 75]]],
+)
+def test_calculate_lines_per_commit(lines_by_author):
+    """Check the vectorized statistics against NumPy for every author."""
+    author_codes = np.array(
+        [code for code, lines in enumerate(lines_by_author) for _ in lines],
+        dtype=np.int64,
+    )
+    lines = np.array([line for lines in lines_by_author for line in lines])
+    # Interleave the authors to check the commits are grouped
+    order = np.random.default_rng(0).permutation(len(lines))
+    averages, percentiles = data_processor.calculate_lines_per_commit(
+        author_codes[order], lines[order], len(lines_by_author), [50, 90]
+    )
+    for code, author_lines in enumerate(lines_by_author):
+        if not author_lines:
+            assert averages[code] == 0
+            assert list(percentiles[code]) == [0, 0]
+            continue
+        assert averages[code] == pytest.approx(np.mean(author_lines))
+        assert percentiles[code] == pytest.approx(np.percentile(author_lines, [50, 90]))
+
+
+def test_process_data_lines_per_commit():
+    """Check the lines per commit statistics of the contributors."""
+    raw_data = json_handler.get_dict_from_json_file("individual_metrics_testfile")
+    data = data_collection.calculate_metrics_from_commits(raw_data["RAW_DATA"])
+    data_processor.process_data(data, raw_data["RAW_DATA"])
+    statistics = data["noorbuchi"]["LINES_PER_COMMIT"]
+    assert statistics == {
+        "AVERAGE": 694.0,
+        "MEDIAN": 694.0,
+        "P25": 694.0,
+        "P75": 694.0,
+        "P90": 694.0,
+    }
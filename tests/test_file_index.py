@@ -0,0 +1,101 @@
+"""Test suite for the ownership and churn index of the files."""
+
+from src import data_collection
+from src import file_index
+
+COMMITS = [
+    {
+        "author_name": name,
+        "filepath": paths,
+        "file_line_added": added,
+        "file_line_removed": [0] * len(paths),
+    }
+    for name, paths, added in [
+        ("alice", ["src/a.py", "README.md"], [10, 2]),
+        ("bob", ["src/a.py", "src/b.py"], [4, 3]),
+        ("alice", ["src/a.py", None], [1, 0]),
+        ("carol", ["src/c.py"], [5]),
+        ("bob", ["src/b.py"], [6]),
+    ]
+]
+
+
+def test_get_file_owners():
+    """Check the contributors of a path, the largest owner first."""
+    index = file_index.build_file_index(COMMITS)
+    assert index["paths"].tolist() == ["README.md", "src/a.py", "src/b.py", "src/c.py"]
+    assert file_index.get_file_owners(index, "src/a.py") == [
+        {"AUTHOR": "alice", "COMMITS": 2, "ADDED": 11, "REMOVED": 0, "SHARE": 0.73},
+        {"AUTHOR": "bob", "COMMITS": 1, "ADDED": 4, "REMOVED": 0, "SHARE": 0.27},
+    ]
+    assert file_index.get_file_owners(index, "missing.py") == []
+
+
+def test_hotspots_and_bus_factor():
+    """Check the most modified paths and the fewest owners of most paths."""
+    index = file_index.build_file_index(COMMITS)
+    hotspots = file_index.get_hotspots(index, 2)
+    assert hotspots == [
+        {
+            "PATH": "src/a.py",
+            "COMMITS": 3,
+            "MODIFIED": 15,
+            "AUTHORS": 2,
+            "OWNER": "alice",
+        },
+        {"PATH": "src/b.py", "COMMITS": 2, "MODIFIED": 9, "AUTHORS": 1, "OWNER": "bob"},
+    ]
+    # alice owns two of the four paths, bob or carol is needed for more
+    assert file_index.calculate_bus_factor(index) == 2
+    assert file_index.calculate_bus_factor(index, 0.25) == 1
+
+
+def test_merge_file_indexes(tmp_path):
+    """Check that merging the indexes of two parts equals indexing everything."""
+    expected_index = file_index.build_file_index(COMMITS)
+    file_path = str(tmp_path / "files.npz")
+    file_index.write_file_index(file_index.build_file_index(COMMITS[:2]), file_path)
+    merged_index = file_index.merge_file_indexes(
+        file_index.read_file_index(file_path), file_index.build_file_index(COMMITS[2:])
+    )
+    for field, values in expected_index.items():
+        assert merged_index[field].tolist() == values.tolist()
+
+
+def test_collect_raw_data_writes_file_index(tmp_path, git_repo, add_commit):
+    """Check that the streamed and the json raw data are indexed alike."""
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    data_collection.collect_and_stream_raw_data_to_jsonl(
+        str(git_repo), "streamed", data_path, incremental=True
+    )
+    add_commit(git_repo, "main.py", "def main():\n    return 2\n", "Change main")
+    data_collection.collect_and_stream_raw_data_to_jsonl(
+        str(git_repo), "streamed", data_path, incremental=True
+    )
+    data_collection.collect_and_add_raw_data_to_json(
+        str(git_repo), "raw_data.sqlite", data_path
+    )
+    index = file_index.read_file_index(str(data_path / "raw_data_files.npz"))
+    streamed_index = file_index.read_file_index(str(data_path / "streamed_files.npz"))
+    assert file_index.get_file_owners(index, "main.py") == [
+        {"AUTHOR": "Tester", "COMMITS": 2, "ADDED": 3, "REMOVED": 1, "SHARE": 1.0}
+    ]
+    for field, values in index.items():
+        assert streamed_index[field].tolist() == values.tolist()
+
+
+def test_index_streamed_commits_in_batches(git_repo, add_commit):
+    """Check that indexing the commits in batches gives the same indexes."""
+    add_commit(git_repo, "main.py", "def main():\n    return 2\n", "Change main")
+    commits = data_collection.collect_commits_hash(str(git_repo))
+    indexes = data_collection.build_commit_indexes([])
+    streamed_commits = list(
+        data_collection.index_streamed_commits(iter(commits), indexes, batch_size=2)
+    )
+    assert streamed_commits == commits
+    expected_indexes = data_collection.build_commit_indexes(commits)
+    for index, expected_index in zip(indexes, expected_indexes):
+        assert sorted(index) == sorted(expected_index)
+        for name, values in expected_index.items():
+            assert index[name].tolist() == values.tolist()
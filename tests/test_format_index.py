@@ -0,0 +1,76 @@
+"""Test suite for the file format index of the contributors."""
+
+from src import data_collection
+from src import format_index
+from src import json_handler
+
+
+def test_index_file_formats():
+    """Check the files and lines of every format of the contributors."""
+    commits = [
+        {
+            "author_name": "alice",
+            "line_added": 10,
+            "line_removed": 2,
+            "filename": ["main.py", "README.md", "test_main.py"],
+            "file_line_added": [4, 5, 1],
+            "file_line_removed": [2, 0, 0],
+        },
+        {
+            "author_name": "bob",
+            "line_added": 1,
+            "line_removed": 0,
+            "filename": ["Pipfile"],
+            "file_line_added": [1],
+            "file_line_removed": [0],
+        },
+        {
+            "author_name": "alice",
+            "line_added": 3,
+            "line_removed": 0,
+            "filename": ["main.py"],
+            "file_line_added": [3],
+            "file_line_removed": [0],
+        },
+        # Mined before the lines of every file were recorded
+        {
+            "author_name": "bob",
+            "line_added": 5000,
+            "line_removed": 0,
+            "filename": ["data.json"],
+        },
+    ]
+    index = format_index.index_file_formats(commits)
+    assert index == {
+        "alice": {
+            ".md": {"FILES": 1, "LINES": 5},
+            ".py": {"FILES": 2, "LINES": 10},
+        },
+        "bob": {".json": {"FILES": 1, "LINES": 0}, "Pipfile": {"FILES": 1, "LINES": 1}},
+    }
+    assert list(format_index.index_file_formats(commits, ["bob"])) == ["bob"]
+
+
+def test_index_file_formats_matches_format():
+    """Check that the formats of the index are the FORMAT of the contributors."""
+    raw_data = json_handler.get_dict_from_json_file("individual_metrics_testfile")
+    data = data_collection.calculate_metrics_from_commits(raw_data["RAW_DATA"])
+    index = format_index.index_file_formats(raw_data["RAW_DATA"])
+    for author, metrics in data.items():
+        assert list(index[author]) == data_collection.get_file_formats(metrics["FILES"])
+    # The extension of every file name is only parsed once
+    assert data_collection.parse_for_type.cache_info().hits > 0
+
+
+def test_combine_format_indexes():
+    """Check that the counts of the same format are added up."""
+    combined = format_index.combine_format_indexes(
+        [
+            {".py": {"FILES": 2, "LINES": 15}},
+            {".md": {"FILES": 1, "LINES": 4}, ".py": {"FILES": 1, "LINES": 1}},
+        ]
+    )
+    assert combined == {
+        ".md": {"FILES": 1, "LINES": 4},
+        ".py": {"FILES": 3, "LINES": 16},
+    }
@@ -0,0 +1,89 @@
+"""Test suite for the resolution of the usernames of the same contributor."""
+
+import pytest
+from src import data_collection
+from src import identity_resolution
+
+MAILMAP = """
+# Names and emails of the same people
+Henry Schultz <schultzh@allegheny.edu> <henry@laptop.local>
+<noor@allegheny.edu> Noor B <noor@home.org>
+"""
+
+
+def create_metrics(email, commits, files, issues_opened=None):
+    """Create the metrics of a username with some commits and files."""
+    metrics = data_collection.create_author_metrics(email, commits)
+    metrics["ADDED"] = commits * 10
+    metrics["FILES"] = files
+    metrics["issues_opened"] = issues_opened or []
+    return metrics
+
+
+@pytest.mark.parametrize(
+    "name,expected_name",
+    [("Noor Buchi", "noorbuchi"), ("noor-buchi", "noorbuchi"), ("José", "jose")],
+)
+def test_normalize_name(name, expected_name):
+    """Check that case, accents, spaces and punctuation are ignored."""
+    assert identity_resolution.normalize_name(name) == expected_name
+
+
+def test_resolve_and_merge_identities():
+    """Check that the usernames are grouped by name, email, login and mailmap."""
+    data = {
+        "Noor Buchi": create_metrics("noor@allegheny.edu", 5, ["a.py"]),
+        "schultzh": create_metrics("henry@laptop.local", 2, ["b.py"]),
+        "noorbuchi": create_metrics("N/A", 0, [], [3]),
+        "Noor B": create_metrics("noor@home.org", 1, ["a.py", "c.py"]),
+        "Henry": create_metrics("schultzh@allegheny.edu", 3, ["c.py"]),
+        "lussiere": create_metrics("N/A", 0, [], [4]),
+        "Lussier": create_metrics("12+lussiere@users.noreply.github.com", 1, []),
+        "Other": create_metrics("N/A", 1, ["d.py"]),
+    }
+    mailmap = identity_resolution.parse_mailmap(MAILMAP)
+    clusters = identity_resolution.resolve_identities(data, mailmap=mailmap)
+    assert clusters == {
+        "Noor Buchi": ["Noor Buchi", "noorbuchi", "Noor B"],
+        "Henry Schultz": ["schultzh", "Henry"],
+        "Lussier": ["lussiere", "Lussier"],
+        "Other": ["Other"],
+    }
+    merged = identity_resolution.merge_identities(data, clusters)
+    assert list(merged) == list(clusters)
+    assert merged["Noor Buchi"]["COMMITS"] == 6
+    assert merged["Noor Buchi"]["ADDED"] == 60
+    assert merged["Noor Buchi"]["FILES"] == ["a.py", "c.py"]
+    assert merged["Noor Buchi"]["issues_opened"] == [3]
+    assert merged["Noor Buchi"]["ALIASES"] == ["noorbuchi", "Noor B"]
+    assert merged["Henry Schultz"]["EMAIL"] == "schultzh@allegheny.edu"
+    assert merged["Henry Schultz"]["ALIASES"] == ["schultzh", "Henry"]
+    assert merged["Other"] is data["Other"]
+
+
+def test_resolve_identities_commit_emails():
+    """Check that every email of the commits links the usernames."""
+    data = {
+        "alice": create_metrics("alice@work.org", 2, []),
+        "Alice Smith": create_metrics("alice@home.org", 1, []),
+    }
+    assert len(identity_resolution.resolve_identities(data, match_names=False)) == 2
+    commits = [
+        {"author_name": "alice", "author_email": "alice@work.org"},
+        {"author_name": "alice", "author_email": "alice@home.org"},
+    ]
+    assert identity_resolution.resolve_identities(data, commits, match_names=False) == {
+        "alice": ["alice", "Alice Smith"]
+    }
+
+
+def test_resolve_identities_same_group_names():
+    """Check that groups with the same name are joined instead of replaced."""
+    data = {
+        "Alice": create_metrics("alice@home.org", 2, []),
+        "ally": create_metrics("alice@work.org", 1, []),
+    }
+    mailmap = identity_resolution.parse_mailmap("Alice <alice@work.org>")
+    assert identity_resolution.resolve_identities(
+        data, mailmap=mailmap, match_names=False
+    ) == {"Alice": ["Alice", "ally"]}
@@ -1,9 +1,12 @@
 """Contains the test case(s) for retrieve_issue_data in data_collection."""
 
 import os
+import time
 import pytest
+import requests
 from github import Github
 from src import data_collection
+from src import graphql_retrieval
 from src import json_handler
 
 # As of the current state, this test requires a token to function
@@ -76,3 +79,125 @@ def test_retrieve_issue_data_retrieves_issues(
                     if comment.user.login == username:
                         contributor_found = True
             assert contributor_found is True
+
+
+EXPECTED_STUB_DATA = {
+    "alice": {
+        "issues_commented": [1],
+        "pull_requests_commented": [2],
+        "issues_opened": [1],
+        "pull_requests_opened": [],
+    },
+    "bob": {
+        "issues_commented": [3, 1],
+        "pull_requests_commented": [],
+        "issues_opened": [],
+        "pull_requests_opened": [2],
+    },
+}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_retrieve_issue_data_stub(github_stub, workers):
+    """Test that issues are associated with contributors with any number of workers"""
+    ghub = Github(base_url=github_stub.url, per_page=2)
+    repository = ghub.get_repo("org/repo")
+    contributor_data = data_collection.retrieve_issue_data(
+        repository, "all", {}, workers, ghub
+    )
+    assert contributor_data == EXPECTED_STUB_DATA
+
+
+class RateLimitedGithub:
+    """Github object whose rate limit is exhausted and resets in two seconds."""
+
+    rate_limiting = (0, 5000)
+
+    def __init__(self):
+        """Reset the rate limit two seconds from now."""
+        self.rate_limiting_resettime = time.time() + 2
+
+
+def test_wait_for_rate_limit(monkeypatch):
+    """Test that requests wait for the rate limit to reset"""
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    data_collection.wait_for_rate_limit(RateLimitedGithub())
+    assert len(sleeps) == 1
+    assert 2 < sleeps[0] <= 3
+    data_collection.wait_for_rate_limit(None)
+    assert len(sleeps) == 1
+
+
+def test_retrieve_issue_data_bulk_stub(github_stub):
+    """Test that bulk retrieval gives the same data without per issue listings"""
+    ghub = Github(base_url=github_stub.url, per_page=2)
+    repository = ghub.get_repo("org/repo")
+    contributor_data = data_collection.retrieve_issue_data(
+        repository, "all", {}, bulk=True
+    )
+    assert contributor_data == EXPECTED_STUB_DATA
+    for path in github_stub.requests:
+        assert not path.split("?")[0].endswith("/1/comments")
+        assert not path.split("?")[0].endswith("/2/comments")
+
+
+def test_retrieve_issue_data_graphql_stub(github_stub):
+    """Test that the GraphQL backend fills the same data as the REST backend"""
+    contributor_data = graphql_retrieval.retrieve_issue_data_graphql(
+        "token", "org/repo", "all", {}, page_size=1, url=github_stub.url + "/graphql"
+    )
+    assert contributor_data == EXPECTED_STUB_DATA
+    # Two pages of issues, one of pull requests and one for the second comment
+    # of issue 1 because every page holds a single node
+    assert len(github_stub.requests) == 4
+
+
+def test_sync_issue_data_stub(github_stub, tmp_path):
+    """Test that syncing only fetches updated issues and replaces their comments"""
+    ghub = Github(base_url=github_stub.url, per_page=2)
+    repository = ghub.get_repo("org/repo")
+    contributor_data = data_collection.sync_issue_data(
+        repository, "all", {}, data_path=tmp_path
+    )
+    assert contributor_data == EXPECTED_STUB_DATA
+    # Delete the comment of bob on issue 1, which updates the issue
+    issue = github_stub.routes["/repos/org/repo/issues/1"]
+    issue["updated_at"] = "2999-01-01T00:00:00Z"
+    comments = github_stub.routes["/repos/org/repo/issues/1/comments"]
+    del comments[0]
+    github_stub.requests.clear()
+    for _ in range(2):
+        contributor_data = data_collection.sync_issue_data(
+            repository, "all", {}, data_path=tmp_path
+        )
+        assert contributor_data["bob"]["issues_commented"] == [3]
+        assert contributor_data["alice"] == EXPECTED_STUB_DATA["alice"]
+    # Only the comments of the updated issue were fetched again
+    comment_requests = [path for path in github_stub.requests if "/comments" in path]
+    assert len(comment_requests) == 2
+    assert all("/issues/1/comments" in path for path in comment_requests)
+
+
+def test_get_login_graphql():
+    """Test that GraphQL logins match the logins of the REST API"""
+    assert graphql_retrieval.get_login(None) == "ghost"
+    user = {"login": "alice", "__typename": "User"}
+    assert graphql_retrieval.get_login(user) == "alice"
+    bot = {"login": "dependabot", "__typename": "Bot"}
+    assert graphql_retrieval.get_login(bot) == "dependabot[bot]"
+
+
+def test_run_graphql_query_timeout(monkeypatch):
+    """Test that a stalled GraphQL query fails instead of hanging"""
+    timeouts = []
+
+    def stalled_post(url, **keywords):
+        """Time out like a connection that stopped responding."""
+        timeouts.append(keywords["timeout"])
+        raise requests.Timeout("read timed out")
+
+    monkeypatch.setattr(graphql_retrieval.requests, "post", stalled_post)
+    with pytest.raises(RuntimeError, match="timed out"):
+        graphql_retrieval.run_graphql_query("token", "query {}", {})
+    assert timeouts == [graphql_retrieval.REQUEST_TIMEOUT]
@@ -13,7 +13,8 @@ from src import json_handler
 def test_write_dict_to_json():
     """Ensure a dictionary is written to a specified file."""
     test_dictionary = {"username": "test_data"}
-    json_handler.write_dict_to_json_file(test_dictionary, "testfile")
+    # data/testfile.json is committed in its pretty form
+    json_handler.write_dict_to_json_file(test_dictionary, "testfile", pretty=True)
     assert "testfile.json" in os.listdir("./data/")  # file is created
     with open("./data/testfile.json") as file:
         file_contents = file.read()
@@ -43,3 +44,131 @@ def test_add_user_to_users_dictionary():
     json_handler.add_user_to_users_dictionary(test_dictionary, user_to_add)
     assert "new_user" in test_dictionary.keys()
     assert "test_data" in test_dictionary["new_user"]
+
+
+def test_write_and_get_entries_jsonl(tmp_path):
+    """Ensure entries written to a JSON Lines file are read back in order."""
+    entries = [{"hash": "a", "added": 1}, {"hash": "b", "added": 2}]
+    last_entry = json_handler.write_entries_to_jsonl_file(
+        iter(entries), "testfile", tmp_path
+    )
+    assert last_entry == entries[-1]
+    json_handler.write_entries_to_jsonl_file(
+        [{"hash": "c"}], "testfile", tmp_path, append=True
+    )
+    actual_entries = list(
+        json_handler.get_entries_from_jsonl_file("testfile", tmp_path)
+    )
+    assert actual_entries == entries + [{"hash": "c"}]
+    assert json_handler.get_last_entry_from_jsonl_file("testfile", tmp_path) == {
+        "hash": "c"
+    }
+
+
+def test_get_last_entry_from_empty_jsonl(tmp_path):
+    """Ensure an empty JSON Lines file does not have a last entry."""
+    (tmp_path / "testfile.jsonl").write_text("\n")
+    assert json_handler.get_last_entry_from_jsonl_file("testfile", tmp_path) is None
+
+
+def test_truncated_last_jsonl_entry(tmp_path):
+    """Ensure a last entry cut off while it was written is skipped and removed."""
+    json_handler.write_entries_to_jsonl_file(
+        [{"hash": "a"}, {"hash": "b"}], "testfile", tmp_path
+    )
+    with open(tmp_path / "testfile.jsonl", "ab") as jsonl_file:
+        jsonl_file.write(b'{"hash": "c", "add')
+    assert json_handler.get_last_entry_from_jsonl_file("testfile", tmp_path) == {
+        "hash": "b"
+    }
+    assert list(json_handler.get_entries_from_jsonl_file("testfile", tmp_path)) == [
+        {"hash": "a"},
+        {"hash": "b"},
+    ]
+    json_handler.write_entries_to_jsonl_file(
+        [{"hash": "c"}], "testfile", tmp_path, append=True
+    )
+    assert (tmp_path / "testfile.jsonl").read_bytes().endswith(b'"b"}\n{"hash":"c"}\n')
+
+
+def test_jsonl_entry_without_newline(tmp_path):
+    """Ensure a whole last entry without a newline is kept when appending."""
+    (tmp_path / "testfile.jsonl").write_text('{"hash": "a"}\n{"hash": "b"}')
+    assert json_handler.get_last_entry_from_jsonl_file("testfile", tmp_path) == {
+        "hash": "b"
+    }
+    json_handler.write_entries_to_jsonl_file(
+        [{"hash": "c"}], "testfile", tmp_path, append=True
+    )
+    assert list(json_handler.get_entries_from_jsonl_file("testfile", tmp_path)) == [
+        {"hash": "a"},
+        {"hash": "b"},
+        {"hash": "c"},
+    ]
+
+
+@pytest.fixture
+def json_codec():
+    """Restore the selected JSON library after a test selects another one."""
+    selected_codec = json_handler.JSON_CODEC["codec"]
+    yield json_handler.set_json_codec
+    json_handler.JSON_CODEC["codec"] = selected_codec
+
+
+@pytest.mark.parametrize("codec", list(json_handler.JSON_CODECS))
+@pytest.mark.parametrize("pretty", [False, True])
+@pytest.mark.parametrize(
+    "json_file", ["contributor_data_template", "individual_metrics_testfile"],
+)
+def test_json_codecs_round_trip(tmp_path, json_codec, codec, pretty, json_file):
+    """Ensure the json files are read back unchanged with every JSON library."""
+    json_codec(codec)
+    test_dictionary = json_handler.get_dict_from_json_file(json_file)
+    json_handler.write_dict_to_json_file(test_dictionary, json_file, tmp_path, pretty)
+    assert json_handler.get_dict_from_json_file(json_file, tmp_path) == test_dictionary
+    file_contents = (tmp_path / (json_file + ".json")).read_text()
+    assert ("\n    " in file_contents) == pretty
+
+
+def test_set_missing_json_codec(json_codec):
+    """Ensure selecting a JSON library that is not installed fails."""
+    with pytest.raises(ValueError):
+        json_codec("missing")
+
+
+def test_failed_write_keeps_json_file(tmp_path):
+    """Ensure a write that fails leaves the previous file and no temporary file."""
+    json_handler.write_dict_to_json_file(
+        {"username": "test_data"}, "testfile", tmp_path
+    )
+    with pytest.raises(TypeError):
+        json_handler.write_dict_to_json_file(
+            {"username": object()}, "testfile", tmp_path
+        )
+    assert os.listdir(tmp_path) == ["testfile.json"]
+    assert json_handler.get_dict_from_json_file("testfile", tmp_path) == {
+        "username": "test_data"
+    }
+
+
+def test_atomic_write_file_mode(tmp_path):
+    """Ensure new files are readable by all and replaced files keep their mode."""
+    json_handler.write_dict_to_json_file({"username": "a"}, "testfile", tmp_path)
+    assert os.stat(tmp_path / "testfile.json").st_mode & 0o777 == 0o644
+    os.chmod(tmp_path / "testfile.json", 0o600)
+    json_handler.write_dict_to_json_file({"username": "b"}, "testfile", tmp_path)
+    assert os.stat(tmp_path / "testfile.json").st_mode & 0o777 == 0o600
+
+
+@pytest.mark.parametrize("codec", list(json_handler.JSON_CODECS))
+def test_get_dict_from_memory_mapped_json(monkeypatch, json_codec, codec):
+    """Ensure large json files are read through a memory mapping."""
+    json_codec(codec)
+    expected_dictionary = json_handler.get_dict_from_json_file(
+        "individual_metrics_testfile"
+    )
+    monkeypatch.setattr(json_handler, "MMAP_THRESHOLD", 1)
+    test_dictionary = json_handler.get_dict_from_json_file(
+        "individual_metrics_testfile"
+    )
+    assert test_dictionary == expected_dictionary
@@ -0,0 +1,101 @@
+"""Test suite for the end-to-end evaluation of a repository."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src import pipeline
+
+
+@pytest.mark.parametrize("backend", ["rest", "graphql"])
+def test_run_pipeline(
+    tmp_path, monkeypatch, git_repo, git_command, github_stub, backend
+):
+    """Check that the commits, issues, aliases and surviving lines are merged."""
+    # The blame cache is written to the data directory of the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (git_repo / "main.py").write_text("def main():\n    return 2\n")
+    git_command(git_repo, "-c", "user.name=tester", "commit", "-am", "Fix main")
+    data = pipeline.run_pipeline(
+        str(git_repo),
+        "token",
+        "org/repo",
+        backend=backend,
+        blame=True,
+        api_url=github_stub.url,
+    )
+    assert sorted(data) == ["Tester", "alice", "bob"]
+    assert data["Tester"]["COMMITS"] == 3
+    assert data["Tester"]["ALIASES"] == ["tester"]
+    assert data["Tester"]["SURVIVING"] == 3
+    assert data["Tester"]["MODIFIED"] == 5
+    assert data["Tester"]["FORMAT_INDEX"][".py"]["LINES"] == 4
+    assert data["alice"]["issues_opened"] == [1]
+    assert data["alice"]["pull_requests_commented"] == [2]
+    assert data["bob"]["SURVIVING"] == 0
+
+
+def test_run_pipeline_without_issues(git_repo):
+    """Check that the issues are skipped without a repository name."""
+    data = pipeline.run_pipeline(str(git_repo), profile="fast")
+    assert list(data) == ["Tester"]
+    assert data["Tester"]["COMMITS"] == 2
+    assert data["Tester"]["issues_opened"] == []
+
+
+def test_run_pipeline_mining_error(monkeypatch, git_repo):
+    """Check that a mining error is raised without waiting for the issues."""
+    retrieved = threading.Event()
+
+    def retrieve_issues(*arguments):
+        """Block until the mining error was raised."""
+        retrieved.wait(10)
+        return {}
+
+    def mine_commits(*arguments):
+        """Fail like a repository that can not be mined."""
+        raise ValueError("mining failed")
+
+    monkeypatch.setattr(pipeline, "retrieve_issues", retrieve_issues)
+    monkeypatch.setattr(pipeline, "mine_commits", mine_commits)
+    start = time.monotonic()
+    with pytest.raises(ValueError, match="mining failed"):
+        pipeline.run_pipeline(str(git_repo), "token", "org/repo")
+    assert time.monotonic() - start < 5
+    retrieved.set()
+
+
+def test_run_pipeline_mining_error_cancels_blame(monkeypatch, git_repo):
+    """Check that the stages that did not start are cancelled on a mining error."""
+    retrieved = threading.Event()
+    executors = []
+    blamed = []
+
+    def create_executor(max_workers):
+        """Run one stage at once so that the blame waits for the issues."""
+        executors.append(ThreadPoolExecutor(max_workers=1))
+        return executors[-1]
+
+    def retrieve_issues(*arguments):
+        """Block until the mining error was raised."""
+        retrieved.wait(10)
+        return {}
+
+    def mine_commits(*arguments):
+        """Fail like a repository that can not be mined."""
+        raise ValueError("mining failed")
+
+    monkeypatch.setattr(pipeline, "ThreadPoolExecutor", create_executor)
+    monkeypatch.setattr(pipeline, "retrieve_issues", retrieve_issues)
+    monkeypatch.setattr(pipeline, "mine_commits", mine_commits)
+    monkeypatch.setattr(
+        pipeline.blame_attribution,
+        "calculate_surviving_lines",
+        lambda *arguments, **keywords: blamed.append(arguments),
+    )
+    with pytest.raises(ValueError, match="mining failed"):
+        pipeline.run_pipeline(str(git_repo), "token", "org/repo", blame=True)
+    retrieved.set()
+    executors[0].shutdown()
+    assert blamed == []
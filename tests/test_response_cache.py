@@ -0,0 +1,82 @@
+"""Test suite for the persistent cache of GitHub API responses."""
+
+import pytest
+import requests
+from github import Github
+from src import data_collection
+from src import response_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Provide an empty response cache stored in a temporary directory."""
+    test_cache = response_cache.ResponseCache(str(tmp_path / "cache.sqlite"))
+    yield test_cache
+    test_cache.close()
+
+
+def test_put_and_get_response(cache):
+    """Ensure stored responses are returned by URL."""
+    cache.put("https://api.github.com/a", '"etag"', None, {"A": "1"}, b"body")
+    assert cache.get("https://api.github.com/a") == {
+        "etag": '"etag"',
+        "last_modified": None,
+        "headers": {"A": "1"},
+        "body": b"body",
+    }
+    assert cache.get("https://api.github.com/b") is None
+
+
+def test_evict_least_recently_used(cache):
+    """Ensure the least recently used responses are evicted above the size limit."""
+    cache.max_size = 50
+    cache.put("first", '"1"', None, {}, b"x" * 20)
+    cache.put("second", '"2"', None, {}, b"x" * 20)
+    # Using the first response makes the second one the least recently used
+    cache.get("first")
+    cache.put("third", '"3"', None, {}, b"x" * 20)
+    assert cache.get("first") is not None
+    assert cache.get("second") is None
+    assert cache.get("third") is not None
+
+
+def test_clear(cache):
+    """Ensure clearing the cache deletes every response."""
+    cache.put("first", '"1"', None, {}, b"body")
+    cache.clear()
+    assert cache.get("first") is None
+
+
+def test_retrieve_issue_data_from_cache(cache, github_stub):
+    """Ensure a second retrieval is answered with not modified responses."""
+    response_cache.install_github_cache(cache)
+    try:
+        results = []
+        for _ in range(2):
+            ghub = Github(base_url=github_stub.url, per_page=2)
+            repository = ghub.get_repo("org/repo")
+            results.append(
+                data_collection.retrieve_issue_data(repository, "all", {}, 4, ghub)
+            )
+    finally:
+        response_cache.uninstall_github_cache()
+    assert results[0] == results[1]
+    # Every request of the second retrieval was already cached
+    assert github_stub.not_modified * 2 == len(github_stub.requests)
+
+
+def test_responses_are_not_shared_between_tokens(cache, github_stub):
+    """Ensure a response is only revalidated with the token that requested it."""
+    response_cache.install_github_cache(cache)
+    try:
+        for token in ["first", "second"]:
+            ghub = Github(token, base_url=github_stub.url)
+            ghub.get_repo("org/repo")
+    finally:
+        response_cache.uninstall_github_cache()
+    assert github_stub.not_modified == 0
+    request = requests.Request("GET", "https://api.github.com/a").prepare()
+    assert response_cache.get_cache_key(request) == "https://api.github.com/a"
+    request.headers["Authorization"] = "token first"
+    assert response_cache.get_cache_key(request).endswith(" https://api.github.com/a")
+    assert "first" not in response_cache.get_cache_key(request)
@@ -0,0 +1,72 @@
+"""Test suite for the SQLite storage of the json_handler dictionaries."""
+import pytest
+from src import json_handler
+from src import sqlite_storage
+
+
+@pytest.mark.parametrize(
+    "json_file_name", ["individual_metrics_testfile", "contributor_data_template"],
+)
+def test_write_and_read_dict(tmp_path, json_file_name):
+    """Ensure the stored dictionaries are read back unchanged and in order."""
+    data = json_handler.get_dict_from_json_file(json_file_name)
+    json_handler.write_dict_to_json_file(data, "storage.sqlite", tmp_path)
+    stored_data = json_handler.get_dict_from_json_file("storage.sqlite", tmp_path)
+    assert stored_data == data
+    assert list(stored_data.keys()) == list(data.keys())
+
+
+def test_add_entry_upserts_contributors(tmp_path):
+    """Ensure added keys replace their rows and keep the order of the keys."""
+    json_handler.write_dict_to_json_file(
+        {"alice": {"issues_opened": [1]}, "bob": 2}, "storage.sqlite", tmp_path
+    )
+    json_handler.add_entry(
+        {"alice": {"issues_opened": [3, 2]}, "carol": 4}, "storage.sqlite", tmp_path
+    )
+    stored_data = json_handler.get_dict_from_json_file("storage.sqlite", tmp_path)
+    assert stored_data == {"alice": {"issues_opened": [3, 2]}, "bob": 2, "carol": 4}
+    assert list(stored_data.keys()) == ["alice", "bob", "carol"]
+    assert sqlite_storage.get_contributor(str(tmp_path / "storage.sqlite"), "bob") == 2
+
+
+def test_add_entry_missing_database(tmp_path):
+    """Ensure a missing database is reported like a missing json file."""
+    with pytest.raises(FileNotFoundError):
+        json_handler.add_entry({"alice": 1}, "storage.sqlite", tmp_path)
+
+
+def test_query_commits(tmp_path):
+    """Ensure the commits are filtered by author and date."""
+    commits = [
+        {
+            "hash": str(index),
+            "author_msg": "",
+            "author_name": name,
+            "author_email": name + "@allegheny.edu",
+            "author_date": date,
+            "merge": False,
+            "line_added": 1,
+            "line_removed": 0,
+            "lines_of_code": 0,
+            "complexity": 0,
+            "methods": [],
+            "filename": ["a.py"],
+            "filepath": ["src/a.py"],
+            "file_line_added": [1],
+            "file_line_removed": [0],
+        }
+        for index, (name, date) in enumerate(
+            [("alice", "2020-01-01"), ("bob", "2020-02-01"), ("alice", "2020-03-01")]
+        )
+    ]
+    file_path = str(tmp_path / "storage.sqlite")
+    sqlite_storage.write_dict({"RAW_DATA": commits}, file_path)
+    assert sqlite_storage.query_commits(file_path, author="alice") == [
+        commits[0],
+        commits[2],
+    ]
+    assert sqlite_storage.query_commits(
+        file_path, since="2020-02-01", until="2020-03-01"
+    ) == [commits[1]]
+